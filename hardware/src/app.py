@@ -1,8 +1,14 @@
 import time
 import logging
+from functools import partial
+from dataclasses import replace
 from datetime import datetime
-from .providers.real import RealOBDProvider
-from .domain import TelemetryData
+from .domain import TelemetryData, TelemetryBuffer
+from .capture import CrankingCaptureWorker
+from .clock import SystemClock
+from . import scheduler as polling
+from .metrics import GatewayMetrics
+from lambda_functions.processor.domain.plateau import analyze_crank
 
 class SmartDriveApp:
     # --- CONSTANTS ---
@@ -13,84 +19,427 @@ class SmartDriveApp:
     INTERVAL_CRANKING = 0.1
     INTERVAL_STEADY = 5.0
     INTERVAL_SLEEP = 1800.0
+    # Gyors első újrapróbálás (gyújtás után), majd visszalépés 5 s-ra
+    RECONNECT_DELAYS = (0.5, 1.0, 2.0, 5.0)
+    # Smart Guard: ennyi álló (RPM = 0) idő után sentinel módba lépünk (docs/algorithms.md 5.1)
+    PARKED_IDLE_S = 300.0
 
-    def __init__(self, vin: str, port: str = None, publisher=None):
+    def __init__(self, vin: str, port: str = None, publisher=None, compressor=None,
+                 provider=None, clock=None, scheduler=None, metrics=None, profiler=None,
+                 sentinel=None):
         self.vin = vin
-        self.provider = RealOBDProvider(vin=vin, port=port)
+        # Injektálható óra és provider: VirtualClock + SimulatedOBDProvider = gyorsított visszajátszás
+        self.clock = clock or SystemClock()
+        if provider is None:
+            from .providers.real import RealOBDProvider
+            provider = RealOBDProvider(vin=vin, port=port)
+        self.provider = provider
         self.publisher = publisher
+        # Async runtime: a logikai szálról induló publisher hívások a kimenő sorra
+        # kerülnek, így minden MQTT / spool hozzáférés az egyetlen cloud szálon fut
+        self.outbox = None
+        # Opcionális deadband / swinging-door tömörítés a steady-state mintákra
+        self.compressor = compressor
+        # Preallocated columnar sample store (no per-sample objects in the poll loop)
+        self.buffer = TelemetryBuffer(vin)
         
         self.current_interval = self.INTERVAL_STEADY
         self.power_saving_active = False
+
+        # Opcionális PID-enkénti ütemező: a soros link lekérdezéseit ez osztja be,
+        # a current_interval ilyenkor csak a felhőbe küldés ütemét adja
+        self.scheduler = scheduler
+        self._latest = None  # Utoljára mért értékek: speed, rpm, voltage, coolant_temp
+        self._next_publish = 0.0
+
+        # Smart Guard: AT RV-only wakes, the next wake is planned from the discharge slope
+        self.sentinel = sentinel or polling.SentinelScheduler(self.V_VAMPIRE_THRESHOLD,
+                                                              max_wake=self.INTERVAL_SLEEP)
+        self._parked_since = None
+        self._drain_alerted = False
+
+        # High-rate AT RV capture runs on its own thread during cranking
+        self.capture = CrankingCaptureWorker(self.provider, clock=self.clock)
+        self.is_cranking = False
+        self.crank_coolant_temp = None
+        self.last_crank = None  # Legutóbbi helyben számolt V_min (felhő nélkül is elérhető)
+
+        # Per-stage timers and counters; providers and the publisher report into the same object
+        self.metrics = metrics or GatewayMetrics(clock=self.clock)
+        self.provider.metrics = self.metrics
+        if self.publisher:
+            self.publisher.metrics = self.metrics
+        self.profiler = profiler  # Opcionális mintavételes profiler (terepi hibakereséshez)
         logging.info("🚀 SmartDrive Gateway v1.3 initialized.")
 
-    def run(self):
-        while True:
+    def run(self, duration: float = None):
+        """
+        Main polling loop. `duration` (clock seconds) bounds the run,
+        e.g. for replays on a VirtualClock; None runs forever.
+        """
+        deadline = None if duration is None else self.clock.time() + duration
+        if not self.clock.is_virtual:
+            self.capture.start()
+
+        attempts = 0
+        while deadline is None or self.clock.time() < deadline:
             # Újracsatlakozási logika
             if not self.provider.connect():
                 logging.warning("⏳ Reconnecting to OBD...")
-                time.sleep(5)
+                self.clock.sleep(self.reconnect_delay(attempts))
+                attempts += 1
                 continue
+            attempts = 0
 
             try:
-                while True:
-                    data = self.provider.fetch_data()
+                while deadline is None or self.clock.time() < deadline:
+                    self._drain_crank_windows()
+
+                    # Give the serial link to the capture worker while it runs
+                    if self.capture.is_capturing:
+                        self.clock.sleep(self.INTERVAL_CRANKING)
+                        continue
+
+                    started = time.perf_counter()
+                    if self.power_saving_active:
+                        data = self._sentinel_wake()
+                    elif self.scheduler:
+                        field = self.scheduler.next_field(self.clock.monotonic())
+                        if field is None:
+                            self.clock.sleep(self.scheduler.delay(self.clock.monotonic()))
+                            continue
+                        data = self._record_pid(field, self._poll(field))
+                        if data and field != polling.DECISION_FIELD:
+                            continue  # Stored in the buffer, decision waits for a fresh RPM
+                    else:
+                        data = self._poll()
                     if not data:
+                        self.metrics.count("link_errors")
                         break
 
-                    self._process_adaptive_logic(data)
+                    self._process_sample(data)
                     
-                    if not self.power_saving_active:
+                    if self._should_ingest():
                         self._ingest_to_cloud(data)
 
-                    time.sleep(self.current_interval)
+                    # Sentinel módban a rádiót csak riasztás ébreszti
+                    snapshot = None if self.power_saving_active else self.collect_metrics()
+                    if snapshot and self.publisher:
+                        self.publisher.publish_metrics(snapshot)
+
+                    if self.power_saving_active or not self.scheduler:
+                        # A ciklus munkája már önmagában kitöltötte az intervallumot
+                        if time.perf_counter() - started > self.current_interval:
+                            self.metrics.count("overruns")
+                        self.clock.sleep(self.current_interval)
 
             except Exception as e:
                 logging.error(f"❌ Runtime error: {e}")
-                time.sleep(1)
+                self.clock.sleep(1)
+
+    def _poll(self, field: str = None):
+        """One provider round-trip: a full sample, or a single PID for the scheduler."""
+        with self.metrics.time("query"):
+            if field is None:
+                return self.provider.fetch_into(self.buffer)
+            return self.provider.query_pid(field)
+
+    def _sentinel_wake(self):
+        """
+        Smart Guard pulse: one AT RV read (adapter only, the ECU stays asleep).
+        An off-trend voltage triggers a full sample so the logic sees the RPM.
+        """
+        with self.metrics.time("query"):
+            volts = self.provider.fetch_raw_voltage()
+        self.metrics.count("sentinel_wakes")
+        if volts <= 0:
+            return None  # Adapter gone: reconnect like any link error
+
+        if self.sentinel.changed(self.clock.monotonic(), volts):
+            logging.info(f"🔔 Sentinel: {volts}V is off the discharge trend, taking a full sample")
+            self.metrics.count("sentinel_full_wakes")
+            return self._poll()
+
+        coolant = self.buffer.column("coolant_temp", last=1)
+        return self.buffer.append(int(self.clock.time()), 0.0, 0.0, volts, coolant[0] if coolant else 0.0)
+
+    def _process_sample(self, data: TelemetryData):
+        with self.metrics.time("process"):
+            self._process_adaptive_logic(data)
+        self.metrics.record_sample(self.current_interval)
+        if self.metrics.first_sample_s is None and not self.clock.is_virtual:
+            self.metrics.mark_first_sample()
+
+    def metrics_snapshot(self, reset: bool = False) -> dict:
+        """Metrics window plus the counters other components keep themselves."""
+        snapshot = self.metrics.snapshot(reset)
+        snapshot["vin"] = self.vin
+        snapshot["timestamp"] = self._iso(self.clock.time())
+        snapshot["counters"]["dropped_crank_windows"] = self.capture.dropped_windows
+        if self.scheduler:
+            snapshot["counters"]["missed_deadlines"] = self.scheduler.skipped
+        if self.publisher and getattr(self.publisher, "spool", None):
+            snapshot["spool"] = self.publisher.queue_stats()
+        return snapshot
+
+    def collect_metrics(self):
+        """Returns (and rolls) the metrics window once per export interval, else None."""
+        if not self.metrics.due():
+            return None
+
+        snapshot = self.metrics_snapshot(reset=True)
+        stages = snapshot["stages"]
+        logging.info(
+            f"📈 {snapshot['sample_rate']['achieved_hz']}/{snapshot['sample_rate']['target_hz']} Hz | "
+            + " | ".join(f"{stage} p95 {stages[stage]['p95_ms']}ms" for stage in stages if stages[stage]["count"])
+            + f" | {snapshot['counters']}"
+        )
+        if self.profiler:
+            self.profiler.dump()
+        return snapshot
+
+    def reconnect_delay(self, attempts: int) -> float:
+        return self.RECONNECT_DELAYS[min(attempts, len(self.RECONNECT_DELAYS) - 1)]
 
     def _process_adaptive_logic(self, data: TelemetryData):
-        # 1. Vampire Drain Protection
-        if data.rpm == 0 and data.voltage < self.V_VAMPIRE_THRESHOLD:
+        now = self.clock.monotonic()
+        if data.rpm > 0 or self._parked_since is None:
+            self._parked_since = now
+        parked_idle = (now - self._parked_since >= self.PARKED_IDLE_S
+                       and data.voltage < self.V_RESUME_THRESHOLD)
+
+        # 0. The engine turns: leave the sentinel at once so the crank logic below runs
+        if self.power_saving_active and data.rpm > 0:
+            logging.info(f"🟢 Power Saving Deactivated: {data.rpm} RPM")
+            self._leave_sentinel()
+
+        # 1. Vampire Drain Protection / Smart Guard sentinel
+        if data.rpm == 0 and (data.voltage < self.V_VAMPIRE_THRESHOLD or parked_idle):
             if not self.power_saving_active:
-                logging.warning(f"⚠️ Power Saving Active: {data.voltage}V < {self.V_VAMPIRE_THRESHOLD}V")
+                logging.warning(f"⚠️ Power Saving Active: {data.voltage}V (parked {now - self._parked_since:.0f}s)")
                 self.power_saving_active = True
-            self.current_interval = self.INTERVAL_SLEEP
+                self.sentinel.reset()
+                # Ne ragadjanak bent a kötegelt minták a hosszú alvás alatt
+                self._flush_compressed()
+                if self.publisher and getattr(self.publisher, 'framing', False):
+                    self._publish(self.publisher.flush)
+            self.sentinel.observe(now, data.voltage)
+            if data.voltage <= self.V_VAMPIRE_THRESHOLD:
+                self._send_drain_alert(data.voltage)
+            self.current_interval = self.sentinel.next_wake(data.voltage)
 
         # 2. Resumption
         elif self.power_saving_active and data.voltage >= self.V_RESUME_THRESHOLD:
             logging.info(f"🟢 Power Saving Deactivated: {data.voltage}V")
-            self.power_saving_active = False
+            self._leave_sentinel()
+            self._parked_since = now
             self.current_interval = self.INTERVAL_STEADY
 
         # 3. Cranking Phase
         elif data.rpm < self.CRANKING_RPM_LIMIT and not self.power_saving_active:
             self.current_interval = self.INTERVAL_CRANKING
+            if data.rpm > 0 and not self.is_cranking:
+                self.is_cranking = True
+                self._flush_compressed()  # Az utolsó steady-state pont az indítás előtt
+                self.crank_coolant_temp = data.coolant_temp
+                self._start_capture()
 
         # 4. Steady State
         elif data.rpm >= self.CRANKING_RPM_LIMIT:
             self.current_interval = self.INTERVAL_STEADY
 
-    def _ingest_to_cloud(self, data: TelemetryData):
-        """Forward data to AWS IoT Core via MQTT."""
-        logging.info(f"📊 Ingesting: {data.voltage}V | {data.rpm} RPM | Interval: {self.current_interval}s")
-        
+        # Re-arm the capture once the crank is over (engine running or stalled)
+        if data.rpm == 0 or data.rpm >= self.CRANKING_RPM_LIMIT:
+            self.is_cranking = False
+
+        if self.scheduler:
+            self.scheduler.set_state(self.vehicle_state(), self.clock.monotonic())
+
+    def _leave_sentinel(self):
+        self.power_saving_active = False
+        self._drain_alerted = False  # Re-armed for the next parking
+
+    def _send_drain_alert(self, voltage: float):
+        """Smart Guard external drain alert, once per parking (the radio wake is the costly part)."""
+        if self._drain_alerted:
+            return
+        self._drain_alerted = True
+        slope = self.sentinel.slope()
+        trend = f", trend {slope * 3600:+.2f} V/h" if slope is not None else ""
+        logging.warning(f"🚨 External drain alert: {voltage}V <= {self.V_VAMPIRE_THRESHOLD}V{trend}")
         if self.publisher:
-            # JAVÍTÁS: Időbélyeg konverzió (int -> datetime -> isoformat)
-            ts = data.timestamp
-            if isinstance(ts, (int, float)):
-                ts_str = datetime.fromtimestamp(ts).isoformat()
-            else:
-                # Ha már datetime objektum
-                ts_str = ts.isoformat()
-
-            payload = {
+            self._publish(self.publisher.publish_event, self.vin, "VAMPIRE_DRAIN", f"{voltage}V{trend}",
+                          timestamp=self._iso(self.clock.time()))
+
+    def _flush_compressed(self):
+        """
+        Publishes the compressor's held segment end (the last steady-state
+        point) before a crank or a parking, when no more samples follow.
+        """
+        if self.compressor and self.publisher:
+            self._publish(self._publish_compressor_flush)
+
+    def _publish_compressor_flush(self):
+        # A cloud szálon fut: a tömörítő állapotát csak ez a szál módosítja
+        points = self.compressor.flush()
+        if points:
+            ts = max(t for pid_points in points.values() for t, _ in pid_points)
+            self.publisher.publish_telemetry(self._telemetry_payload(ts, points))
+
+    def _publish(self, call, *args, **kwargs):
+        """Publisher call: inline in the sync loop, via the outbound queue under asyncio."""
+        if self.outbox is not None:
+            self.outbox(partial(call, *args, **kwargs))
+        else:
+            call(*args, **kwargs)
+
+    def vehicle_state(self) -> str:
+        """Polling state for the per-PID scheduler, derived from the adaptive logic."""
+        if self.power_saving_active:
+            return polling.SENTINEL
+        if self.is_cranking:
+            return polling.CRANKING
+        if self._latest and self._latest[1] >= self.CRANKING_RPM_LIMIT:
+            return polling.STEADY
+        return polling.PARKED
+
+    def _record_pid(self, field: str, value):
+        """
+        Stores one scheduled PID reading as a full buffer record; the other
+        signals hold their last measured value. The first call seeds all of
+        them with one complete sample.
+        """
+        if value is None:
+            self._latest = None
+            return None
+        if self._latest is None:
+            return self._seed_latest(self.provider.fetch_into(self.buffer))
+
+        self._latest[polling.SAMPLE_FIELDS.index(field)] = value
+        return self.buffer.append(int(self.clock.time()), *self._latest)
+
+    def _seed_latest(self, data):
+        if data:
+            self._latest = [data.speed, data.rpm, data.voltage, data.coolant_temp]
+        return data
+
+    def _should_ingest(self) -> bool:
+        # A cranking ablak crank-event rekordként megy fel, nem nyers mintaként
+        if self.power_saving_active or self.is_cranking:
+            return False
+        if not self.scheduler:
+            return True
+
+        # Ütemezett módban a lekérdezések sűrűbbek, mint a küldés
+        now = self.clock.monotonic()
+        if now < self._next_publish:
+            return False
+        self._next_publish = now + self.current_interval
+        return True
+
+    def _start_capture(self):
+        # Virtuális óránál nincs valódi párhuzamosság: az ablakot helyben rögzítjük
+        if self.clock.is_virtual:
+            self.capture.capture_inline()
+        else:
+            self.capture.trigger()
+
+    def _drain_crank_windows(self):
+        """Publishes completed cranking windows without waiting on the capture thread."""
+        window = self.capture.poll_window()
+        while window is not None:
+            window["coolant_temp"] = self.crank_coolant_temp
+            if not self.power_saving_active:
+                self._ingest_crank_window(window)
+            window = self.capture.poll_window()
+
+    def _ingest_crank_window(self, window: dict):
+        """
+        Runs the plateau algorithm on a captured cranking window (same code as
+        the silver Lambda) and uploads a compact crank-event record instead of
+        the raw 10 Hz samples. V_min is known even when the cloud is unreachable.
+        """
+        # Monotonikus időbélyegek -> Unix idő a kezdőpont alapján
+        offset = window["wall_start"] - window["monotonic_start"]
+        if "analysis" in window:
+            # Already estimated while capturing
+            result = window["analysis"]
+            if result is not None:
+                result = replace(result, start_time=result.start_time + offset)
+        else:
+            result = analyze_crank((t + offset, v) for t, v in window["samples"])
+        if result is None:
+            logging.warning(f"⚠️ Cranking window too short: {len(window['samples'])} samples")
+            return
+
+        self.last_crank = result
+        logging.info(
+            f"🔋 Crank analysed: plateau {result.plateau_voltage}V | "
+            f"inrush min {result.inrush_min}V | {result.sample_count} samples"
+        )
+
+        if self.publisher:
+            self.publisher.publish_crank_event({
                 "vin": self.vin,
-                "timestamp": ts_str,
-                "rpm": data.rpm,
-                "voltage": data.voltage,
-                "pids": [
-                    {"pid_code": "RPM", "value": data.rpm, "timestamp": ts_str},
-                    {"pid_code": "BATTERY_VOLTAGE", "value": data.voltage, "timestamp": ts_str}
-                ]
-            }
-            self.publisher.publish_telemetry(payload)
+                "start_time": self._iso(result.start_time),
+                "plateau_voltage": result.plateau_voltage,
+                "inrush_min": result.inrush_min,
+                "sample_count": result.sample_count,
+                "coolant_temp": window.get("coolant_temp")
+            })
+
+    def _ingest_to_cloud(self, data: TelemetryData, interval: float = None):
+        """
+        Forward data to AWS IoT Core via MQTT. `interval` is the polling
+        interval when the sample was taken (the async runtime runs this later,
+        on the cloud thread); None means the current one.
+        """
+        interval = self.current_interval if interval is None else interval
+        logging.info(
+            f"📊 Ingesting: {data.voltage}V | {data.rpm} RPM | Interval: {interval}s"
+            f" | Rate: {getattr(self.provider, 'sample_rate', 0.0):.1f} Hz"
+        )
+        
+        if self.publisher:
+            values = {"RPM": data.rpm, "BATTERY_VOLTAGE": data.voltage}
+            points = self._compress(data.timestamp, values)
+            if not points:
+                return  # Within tolerance: nothing needed to reconstruct the signal
+
+            self.publisher.publish_telemetry(self._telemetry_payload(data.timestamp, points, data.rpm, data.voltage))
+
+    def _telemetry_payload(self, ts, points: dict, rpm: float = None, voltage: float = None) -> dict:
+        """v1.3 telemetry message; the per-PID points carry their own timestamps."""
+        return {
+            "vin": self.vin,
+            "timestamp": self._iso(ts),
+            "rpm": rpm,
+            "voltage": voltage,
+            "pids": [
+                {"pid_code": pid_code, "value": v, "timestamp": self._iso(t)}
+                for pid_code, pid_points in points.items()
+                for t, v in pid_points
+            ]
+        }
+
+    @staticmethod
+    def _iso(ts) -> str:
+        # JAVÍTÁS: Időbélyeg konverzió (int -> datetime -> isoformat)
+        if isinstance(ts, (int, float)):
+            return datetime.fromtimestamp(ts).isoformat()
+        # Ha már datetime objektum
+        return ts.isoformat()
+
+    def _compress(self, ts, values: dict) -> dict:
+        """
+        Samples go through the compressor, including parked 0-RPM data at the
+        0.1 s interval. Crank windows go up as crank-event records and never
+        get here; the held points are flushed when a crank starts or the
+        sentinel takes over (_flush_compressed).
+        """
+        if not self.compressor:
+            return {pid_code: [(ts, v)] for pid_code, v in values.items()}
+
+        if not isinstance(ts, (int, float)):
+            ts = ts.timestamp()
+        return self.compressor.offer(ts, values)
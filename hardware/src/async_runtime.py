@@ -0,0 +1,235 @@
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .app import SmartDriveApp
+from .domain import TelemetryRecord
+from .scheduler import DECISION_FIELD
+
+class OutboundQueue:
+    """
+    Cloud calls for the single cloud thread, in submission order. Only
+    telemetry samples are droppable: beyond `maxsize` of them the oldest
+    sample goes. Alerts, crank events, flushes and metrics are never dropped
+    (they are rare, and losing one is worse than a late sample).
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items = deque()  # (droppable, call)
+        self._droppable = 0
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, call, droppable: bool = False) -> bool:
+        """Never blocks; returns True if a queued telemetry sample was dropped for this one."""
+        dropped = False
+        if droppable:
+            if self._droppable >= self.maxsize:
+                for i, (is_sample, _) in enumerate(self._items):
+                    if is_sample:
+                        del self._items[i]
+                        break
+                self._droppable -= 1
+                dropped = True
+            self._droppable += 1
+        self._items.append((droppable, call))
+        self._ready.set()
+        return dropped
+
+    async def get(self):
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        droppable, call = self._items.popleft()
+        if droppable:
+            self._droppable -= 1
+        return call
+
+
+class AsyncGatewayRuntime:
+    """
+    asyncio runtime for SmartDriveApp.
+    Polling, adaptive logic and cloud ingestion run as separate tasks
+    connected by bounded queues, so a slow MQTT publish or an OBD timeout
+    no longer stalls the other stages. Under backpressure only telemetry
+    samples are dropped (see OutboundQueue). Blocking python-obd and
+    AWSIoTMQTTClient calls run in dedicated executors.
+    """
+    QUEUE_SIZE = 64
+
+    def __init__(self, app: SmartDriveApp, queue_size: int = QUEUE_SIZE):
+        self.app = app
+        self.queue_size = queue_size
+        # One worker each: the serial link and the MQTT client are not concurrent-safe
+        self._obd_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="obd")
+        self._cloud_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mqtt")
+        self._running = False
+        self._interval_changed = None
+        self.dropped_samples = 0
+
+    def run(self):
+        asyncio.run(self.run_pipeline())
+
+    def stop(self):
+        self._running = False
+
+    async def run_pipeline(self):
+        self._running = True
+        self._interval_changed = asyncio.Event()
+        self.app.capture.start()
+        samples = asyncio.Queue(maxsize=self.queue_size)
+        outbound = OutboundQueue(self.queue_size)
+        # Alerts and flushes raised inside _process_sample take the same single cloud thread
+        self.app.outbox = outbound.put
+
+        tasks = [
+            asyncio.create_task(self._poll_task(samples), name="poll"),
+            asyncio.create_task(self._logic_task(samples, outbound), name="logic"),
+            asyncio.create_task(self._ingest_task(outbound), name="ingest"),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.app.capture.stop()
+            self.app.outbox = None
+            self._obd_executor.shutdown(wait=False)
+            self._cloud_executor.shutdown(wait=False)
+
+    def _put_latest(self, queue: asyncio.Queue, item):
+        """Bounded put that never blocks the producer: drops the oldest item."""
+        if queue.full():
+            queue.get_nowait()
+            self._count_drop()
+        queue.put_nowait(item)
+
+    def _put_sample(self, outbound: OutboundQueue, call):
+        """Telemetry sample upload: the only droppable kind of outbound call."""
+        if outbound.put(call, droppable=True):
+            self._count_drop()
+
+    def _count_drop(self):
+        self.dropped_samples += 1
+        self.app.metrics.count("dropped_samples")
+
+    async def _poll_task(self, samples: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        provider = self.app.provider
+        connected = False
+        attempts = 0
+
+        while self._running:
+            if not connected:
+                connected = await loop.run_in_executor(self._obd_executor, provider.connect)
+                if not connected:
+                    logging.warning("⏳ Reconnecting to OBD...")
+                    await asyncio.sleep(self.app.reconnect_delay(attempts))
+                    attempts += 1
+                    continue
+                attempts = 0
+
+            # Give the serial link to the capture worker while it runs
+            if self.app.capture.is_capturing:
+                await asyncio.sleep(self.app.INTERVAL_CRANKING)
+                continue
+
+            if self.app.power_saving_active:
+                # Smart Guard: AT RV pulse only, the sentinel plans the next wake
+                data = await loop.run_in_executor(self._obd_executor, self.app._sentinel_wake)
+                if not data:
+                    self.app.metrics.count("link_errors")
+                    connected = False
+                    continue
+                self._put_latest(samples, data)
+                await self._sleep_interval(self.app.current_interval)
+                continue
+
+            scheduler = self.app.scheduler
+            if scheduler:
+                field = scheduler.next_field(self.app.clock.monotonic())
+                if field is None:
+                    await self._sleep_interval(scheduler.delay(self.app.clock.monotonic()))
+                    continue
+
+            try:
+                if scheduler and self.app._latest is not None:
+                    value = await loop.run_in_executor(self._obd_executor, self.app._poll, field)
+                    data = self.app._record_pid(field, value)
+                else:
+                    data = await loop.run_in_executor(self._obd_executor, self.app._poll)
+                    self.app._seed_latest(data)
+            except Exception as e:
+                logging.error(f"❌ Runtime error: {e}")
+                data = None
+
+            if not data:
+                self.app.metrics.count("link_errors")
+                connected = False
+                continue
+
+            # Ütemezett módban csak a friss RPM-es rekord megy az állapotgépre
+            if not scheduler or field == DECISION_FIELD:
+                self._put_latest(samples, data)
+            if not scheduler:
+                await self._sleep_interval(self.app.current_interval)
+
+    async def _sleep_interval(self, timeout: float):
+        """
+        Sleeps for the adaptive interval (or until the next scheduled PID), but
+        wakes early when the logic task changes the plan (e.g. STEADY -> CRANKING
+        must not wait out the 5 s sleep).
+        """
+        self._interval_changed.clear()
+        try:
+            await asyncio.wait_for(self._interval_changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _logic_task(self, samples: asyncio.Queue, outbound: OutboundQueue):
+        while self._running:
+            try:
+                data = await asyncio.wait_for(samples.get(), timeout=self.app.INTERVAL_CRANKING)
+            except asyncio.TimeoutError:
+                data = None
+
+            window = self.app.capture.poll_window()
+            while window is not None:
+                window["coolant_temp"] = self.app.crank_coolant_temp
+                if not self.app.power_saving_active:
+                    outbound.put(partial(self.app._ingest_crank_window, window))
+                window = self.app.capture.poll_window()
+
+            if data is None:
+                continue
+
+            previous_interval = self.app.current_interval
+            previous_state = self.app.scheduler.state if self.app.scheduler else None
+            self.app._process_sample(data)
+            if self.app.current_interval != previous_interval or (
+                    previous_state and self.app.scheduler.state != previous_state):
+                self._interval_changed.set()
+            if self.app._should_ingest():
+                # Runs later on the cloud thread: the sample and the interval are captured now
+                # (the buffer slot and the app state move on with the next samples)
+                frozen = data.freeze() if isinstance(data, TelemetryRecord) else data
+                self._put_sample(outbound, partial(self.app._ingest_to_cloud, frozen, self.app.current_interval))
+
+            snapshot = None if self.app.power_saving_active else self.app.collect_metrics()
+            if snapshot and self.app.publisher:
+                outbound.put(partial(self.app.publisher.publish_metrics, snapshot))
+
+    async def _ingest_task(self, outbound: OutboundQueue):
+        loop = asyncio.get_running_loop()
+        while self._running:
+            try:
+                call = await asyncio.wait_for(outbound.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+            try:
+                await loop.run_in_executor(self._cloud_executor, call)
+            except Exception as e:
+                logging.error(f"❌ Cloud ingestion error: {e}")
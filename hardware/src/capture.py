@@ -0,0 +1,146 @@
+import queue
+import logging
+import threading
+from array import array
+from typing import List, Optional, Tuple
+from .clock import SystemClock
+from lambda_functions.processor.domain.plateau import PlateauEstimator
+
+class VoltageRingBuffer:
+    """
+    Fixed-size, preallocated (timestamp, voltage) ring buffer.
+    No allocation happens on append, so the capture loop stays jitter-free.
+    """
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._t = array('d', bytes(8 * capacity))
+        self._v = array('d', bytes(8 * capacity))
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def append(self, timestamp: float, voltage: float):
+        self._t[self._head] = timestamp
+        self._v[self._head] = voltage
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def snapshot(self) -> List[Tuple[float, float]]:
+        """Returns the buffered samples in chronological order."""
+        start = (self._head - self._count) % self.capacity
+        return [
+            (self._t[(start + i) % self.capacity], self._v[(start + i) % self.capacity])
+            for i in range(self._count)
+        ]
+
+class CrankingCaptureWorker(threading.Thread):
+    """
+    Dedicated high-rate AT RV sampler for the cranking window.
+    Runs independently of the main polling loop, so processing and MQTT
+    publishing cannot add jitter to the 100 ms blanking + 500 ms plateau.
+    Samples are fed to a streaming PlateauEstimator; the capture ends as
+    soon as the plateau window closes and hands off the finished analysis.
+    """
+    WINDOW_S = 1.0         # Longest capture (the estimator normally closes it at ~0.6 s)
+    MIN_PERIOD_S = 0.01    # Upper bound of 100 Hz for adapters that answer instantly
+    CAPACITY = 256
+
+    def __init__(self, provider, window_s: float = WINDOW_S, capacity: int = CAPACITY, clock=None):
+        super().__init__(name="crank-capture", daemon=True)
+        self.provider = provider
+        self.clock = clock or SystemClock()
+        self.window_s = window_s
+        self.buffer = VoltageRingBuffer(capacity)
+        self.estimator = PlateauEstimator()
+        self.completed = queue.Queue(maxsize=4)
+        self.dropped_windows = 0
+
+        self._trigger = threading.Event()
+        self._stop_event = threading.Event()
+        self._capturing = threading.Event()
+
+    @property
+    def is_capturing(self) -> bool:
+        return self._capturing.is_set() or self._trigger.is_set()
+
+    def trigger(self) -> bool:
+        """Requests a capture window. Ignored while one is already running."""
+        if self.is_capturing:
+            return False
+        self._trigger.set()
+        return True
+
+    def stop(self):
+        self._stop_event.set()
+        self._trigger.set()
+
+    def poll_window(self) -> Optional[dict]:
+        """Non-blocking hand-off of the next completed window (or None)."""
+        try:
+            return self.completed.get_nowait()
+        except queue.Empty:
+            return None
+
+    def capture_inline(self):
+        """Captures one window on the caller's thread (virtual-clock replays)."""
+        self._hand_off(self._capture())
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._trigger.wait()
+            if self._stop_event.is_set():
+                break
+            self._capturing.set()
+            self._trigger.clear()
+            try:
+                self._hand_off(self._capture())
+            except Exception as e:
+                logging.error(f"❌ Cranking capture error: {e}")
+            finally:
+                self._capturing.clear()
+
+    def _capture(self) -> dict:
+        self.buffer.clear()
+        self.estimator.reset()
+        wall_start = self.clock.time()
+        t_start = self.clock.monotonic()
+        t_end = t_start + self.window_s
+
+        now = t_start
+        while now < t_end and not self._stop_event.is_set():
+            voltage = self.provider.fetch_raw_voltage()
+            now = self.clock.monotonic()
+            if voltage > 0:
+                self.buffer.append(now, voltage)
+                if self.estimator.add(now, voltage) is not None:
+                    break  # Plateau window closed: give the link back
+
+            # Only sleeps when the adapter answers faster than MIN_PERIOD_S
+            remaining = self.MIN_PERIOD_S - (self.clock.monotonic() - now)
+            if remaining > 0:
+                self.clock.sleep(remaining)
+            now = self.clock.monotonic()
+
+        return {
+            "wall_start": wall_start,
+            "monotonic_start": t_start,
+            "samples": self.buffer.snapshot(),
+            "analysis": self.estimator.finish()  # Monotonic timestamps, like the samples
+        }
+
+    def _hand_off(self, window: dict):
+        logging.info(f"⚡ Cranking window captured: {len(window['samples'])} samples")
+        try:
+            self.completed.put_nowait(window)
+        except queue.Full:
+            # Processing side is behind: drop the oldest window, keep the newest
+            self.completed.get_nowait()
+            self.dropped_windows += 1
+            self.completed.put_nowait(window)
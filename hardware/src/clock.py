@@ -0,0 +1,40 @@
+import time
+
+class SystemClock:
+    """Real wall/monotonic time (default for the gateway)."""
+    is_virtual = False
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Simulated time for faster-than-real-time replays.
+    sleep() advances the clock instantly, so a full day of driving and
+    parking runs in seconds; wall and monotonic time move together.
+    """
+    is_virtual = True
+
+    def __init__(self, start: float = None):
+        self._wall_start = time.time() if start is None else start
+        self._elapsed = 0.0
+
+    def time(self) -> float:
+        return self._wall_start + self._elapsed
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self._elapsed += seconds
+
+    def advance(self, seconds: float):
+        self.sleep(seconds)
@@ -0,0 +1,163 @@
+from typing import Dict, List, Optional, Tuple
+
+Point = Tuple[float, float]
+
+class DeadbandFilter:
+    """
+    Emits a point only when it moved more than `tolerance` away from the last
+    emitted value (or after `max_interval` seconds as a heartbeat).
+    """
+    def __init__(self, tolerance: float, max_interval: float = 300.0):
+        self.tolerance = tolerance
+        self.max_interval = max_interval
+        self._last: Optional[Point] = None       # Last emitted point
+        self._pending: Optional[Point] = None    # Last suppressed point
+
+    def offer(self, t: float, v: float) -> List[Point]:
+        if (self._last is None or abs(v - self._last[1]) > self.tolerance or
+                t - self._last[0] >= self.max_interval):
+            self._last = (t, v)
+            self._pending = None
+            return [(t, v)]
+        self._pending = (t, v)
+        return []
+
+    def flush(self) -> List[Point]:
+        pending = [self._pending] if self._pending else []
+        self._last = self._pending = None
+        return pending
+
+
+class SwingingDoorFilter:
+    """
+    Swinging-door trending: keeps only the points needed so that linear
+    interpolation between emitted points stays within `tolerance` of every
+    raw sample. The door is the range of slopes from the last archived point
+    that still fit all samples seen since; once it closes, the previous
+    sample is archived and becomes the new pivot. If the straight line to
+    that sample would leave the door, its value is clamped onto the door edge
+    (still within `tolerance` of the raw value).
+    """
+    def __init__(self, tolerance: float, max_interval: float = 300.0):
+        self.tolerance = tolerance
+        self.max_interval = max_interval
+        self._archived: Optional[Point] = None
+        self._last: Optional[Point] = None
+        self._slope_min = float("-inf")
+        self._slope_max = float("inf")
+
+    def _open_door(self, pivot: Point):
+        self._archived = pivot
+        self._last = None
+        self._slope_min = float("-inf")
+        self._slope_max = float("inf")
+
+    def _narrow(self, t: float, v: float) -> bool:
+        """Narrows the door with (t, v); returns False if it closed."""
+        t0, v0 = self._archived
+        dt = t - t0
+        if dt <= 0:
+            return abs(v - v0) <= self.tolerance
+        slope_min = max(self._slope_min, (v - v0 - self.tolerance) / dt)
+        slope_max = min(self._slope_max, (v - v0 + self.tolerance) / dt)
+        if slope_min > slope_max:
+            return False
+        self._slope_min, self._slope_max = slope_min, slope_max
+        return True
+
+    def _segment_end(self) -> Optional[Point]:
+        """The last sample, clamped so the segment from the pivot stays inside the door."""
+        if self._last is None:
+            return None
+        (t0, v0), (t, v) = self._archived, self._last
+        if t <= t0:
+            return self._last
+        slope = min(max((v - v0) / (t - t0), self._slope_min), self._slope_max)
+        return (t, v0 + slope * (t - t0))
+
+    def offer(self, t: float, v: float) -> List[Point]:
+        if self._archived is None:
+            self._open_door((t, v))
+            return [(t, v)]
+
+        if t - self._archived[0] >= self.max_interval:
+            end = self._segment_end()
+            self._open_door((t, v))
+            return ([end] if end else []) + [(t, v)]
+
+        if self._narrow(t, v):
+            self._last = (t, v)
+            return []
+
+        # Door closed: the previous sample is the last point the segment can reach
+        pivot = self._segment_end()
+        if pivot is None:
+            self._open_door((t, v))
+            return [(t, v)]
+        self._open_door(pivot)
+        if not self._narrow(t, v):
+            # Gap from the new pivot is beyond tolerance too: archive this sample as well
+            self._open_door((t, v))
+            return [pivot, (t, v)]
+        self._last = (t, v)
+        return [pivot]
+
+    def flush(self) -> List[Point]:
+        end = self._segment_end() if self._archived else None
+        self._archived = self._last = None
+        return [end] if end else []
+
+
+class TelemetryCompressor:
+    """
+    Edge-side compression stage for steady-state telemetry.
+    One filter per PID with its own deadband/tolerance; PIDs without a
+    configured tolerance always pass through. Cranking windows and alerts
+    must bypass this stage (see SmartDriveApp._ingest_to_cloud).
+    """
+    DEFAULT_TOLERANCES = {
+        "BATTERY_VOLTAGE": 0.05,  # V
+        "RPM": 50.0,              # 1/min
+    }
+    MODES = {"DEADBAND": DeadbandFilter, "SDT": SwingingDoorFilter}
+
+    def __init__(self, mode: str = "SDT", tolerances: Dict[str, float] = None, max_interval: float = 300.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown compression mode: {mode}")
+        self.mode = mode
+        self.tolerances = dict(self.DEFAULT_TOLERANCES if tolerances is None else tolerances)
+        self.max_interval = max_interval
+        self._filters = {}
+        self.offered = 0
+        self.emitted = 0
+
+    def _filter(self, pid_code: str):
+        if pid_code not in self._filters:
+            self._filters[pid_code] = self.MODES[self.mode](self.tolerances[pid_code], self.max_interval)
+        return self._filters[pid_code]
+
+    def offer(self, t: float, values: Dict[str, float]) -> Dict[str, List[Point]]:
+        """Returns the points to publish per PID (empty dict: nothing to send)."""
+        out = {}
+        for pid_code, v in values.items():
+            self.offered += 1
+            points = [(t, v)] if pid_code not in self.tolerances else self._filter(pid_code).offer(t, v)
+            if points:
+                out[pid_code] = points
+                self.emitted += len(points)
+        return out
+
+    def flush(self) -> Dict[str, List[Point]]:
+        """Emits pending points and resets all filters (e.g. before a cranking window)."""
+        out = {}
+        for pid_code, f in self._filters.items():
+            points = f.flush()
+            if points:
+                out[pid_code] = points
+                self.emitted += len(points)
+        return out
+
+    @property
+    def ratio(self) -> float:
+        """Raw points per emitted point."""
+        return self.offered / self.emitted if self.emitted else 0.0
@@ -0,0 +1,52 @@
+import os
+import json
+import time
+import logging
+from typing import Optional
+
+
+class ConnectionCache:
+    """
+    Last known-good OBD link per VIN: serial port, baud rate, ELM327 protocol
+    id and the Mode 01 supported-PID bitmap (bit n set = PID n supported).
+    Lets a reconnect skip port scanning, baud probing and protocol search.
+    Written atomically (os.replace), like the spool cursor.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries = self._load()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logging.warning(f"⚠️ Unreadable connection cache {self.path}, starting cold.")
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.path)
+
+    def get(self, vin: str) -> Optional[dict]:
+        return self._entries.get(vin)
+
+    def put(self, vin: str, port: str, baudrate: Optional[int], protocol: str, pid_bitmap: int):
+        entry = {"port": port, "baudrate": baudrate, "protocol": protocol, "pid_bitmap": pid_bitmap}
+        if {k: v for k, v in self._entries.get(vin, {}).items() if k != "updated"} == entry:
+            return  # Unchanged: no flash write on every reconnect
+        entry["updated"] = int(time.time())
+        self._entries[vin] = entry
+        self._save()
+
+    def invalidate(self, vin: str):
+        if self._entries.pop(vin, None) is not None:
+            self._save()
@@ -1,3 +1,4 @@
+from array import array
 from dataclasses import dataclass
 from typing import Optional
 
@@ -17,3 +18,94 @@ class TelemetryData:
     # Optional fields for future scaling (e.g., G-sensor for Driver Scoring)
     accel_x: Optional[float] = 0.0 #
     accel_y: Optional[float] = 0.0 #
+
+
+class TelemetryRecord:
+    """
+    Lightweight view of one row in a TelemetryBuffer.
+    Duck-types TelemetryData (same attribute names) without copying the values.
+    Only valid until the ring buffer wraps around onto its slot.
+    """
+    __slots__ = ("_buffer", "_index")
+
+    def __init__(self, buffer: "TelemetryBuffer", index: int):
+        self._buffer = buffer
+        self._index = index
+
+    @property
+    def vin(self) -> str:
+        return self._buffer.vin
+
+    def freeze(self) -> TelemetryData:
+        """Immutable copy of the row, for work that runs after the slot may be reused."""
+        return TelemetryData(self.vin, *(getattr(self, f) for f in TelemetryBuffer.FIELDS))
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{f}={getattr(self, f)}" for f in TelemetryBuffer.FIELDS)
+        return f"TelemetryRecord(vin={self.vin!r}, {values})"
+
+
+def _column_property(name: str):
+    def getter(self):
+        return self._buffer.columns[name][self._index]
+
+    def setter(self, value):
+        self._buffer.columns[name][self._index] = value
+
+    return property(getter, setter)
+
+
+class TelemetryBuffer:
+    """
+    Preallocated struct-of-arrays telemetry store (one array('d') column per field).
+    Providers append samples straight into the columns, so a 10 Hz poll loop
+    does not allocate a TelemetryData / dict per sample; readers get either a
+    TelemetryRecord view or whole columns for analytics.
+    """
+    FIELDS = ("timestamp", "speed", "rpm", "voltage", "coolant_temp", "accel_x", "accel_y")
+    CAPACITY = 4096
+
+    def __init__(self, vin: str, capacity: int = CAPACITY):
+        self.vin = vin
+        self.capacity = capacity
+        self.columns = {name: array('d', bytes(8 * capacity)) for name in self.FIELDS}
+        self.written = 0  # Monotonic sample counter (sequence number of the next sample)
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def append(self, timestamp: float, speed: float, rpm: float, voltage: float,
+               coolant_temp: float, accel_x: float = 0.0, accel_y: float = 0.0) -> TelemetryRecord:
+        index = self.written % self.capacity
+        columns = self.columns
+        columns["timestamp"][index] = timestamp
+        columns["speed"][index] = speed
+        columns["rpm"][index] = rpm
+        columns["voltage"][index] = voltage
+        columns["coolant_temp"][index] = coolant_temp
+        columns["accel_x"][index] = accel_x
+        columns["accel_y"][index] = accel_y
+        self.written += 1
+        return TelemetryRecord(self, index)
+
+    def record(self, seq: int) -> TelemetryRecord:
+        """View of the sample with sequence number `seq` (must still be in the buffer)."""
+        if not self.written - len(self) <= seq < self.written:
+            raise IndexError(f"Sample {seq} is no longer buffered")
+        return TelemetryRecord(self, seq % self.capacity)
+
+    def column(self, name: str, last: int = None) -> array:
+        """Copy of the newest `last` values of one field in chronological order."""
+        count = len(self) if last is None else min(last, len(self))
+        end = self.written % self.capacity
+        start = (self.written - count) % self.capacity
+        col = self.columns[name]
+        if count == 0:
+            return array('d')
+        if start < end:
+            return col[start:end]
+        return col[start:] + col[:end]
+
+
+for _field in TelemetryBuffer.FIELDS:
+    setattr(TelemetryRecord, _field, _column_property(_field))
@@ -0,0 +1,142 @@
+import time
+import logging
+import binascii
+from typing import List, Optional, Tuple
+
+PROMPT = b">"
+REPEAT = b"\r"  # A bare CR makes the ELM327 repeat the previous request
+# One-time adapter setup: echo, linefeeds, spaces and headers off, aggressive adaptive timing
+SETUP_COMMANDS = (b"ATE0\r", b"ATL0\r", b"ATS0\r", b"ATH0\r", b"ATAT2\r")
+VOLTAGE_REQUEST = b"ATRV\r"
+
+
+def mode01_request(*pids: int) -> bytes:
+    """
+    Pre-encoded Mode 01 request. The trailing response count ("1") lets the
+    ELM327 answer after the first ECU reply instead of waiting for its timeout.
+    """
+    return b"01" + b"".join(b"%02X" % pid for pid in pids) + b"1\r"
+
+
+def _lines(buf: bytearray, length: int) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the non-empty lines in buf[:length]."""
+    lines = []
+    start = 0
+    while start < length:
+        end = buf.find(b"\r", start, length)
+        if end < 0:
+            end = length
+        if end > start:
+            lines.append((start, end))
+        start = end + 1
+    return lines
+
+
+def decode_reply(buf: bytearray, length: int) -> Optional[bytes]:
+    """
+    Hex reply in buf[:length] (echo, spaces and headers off) -> payload bytes.
+    Single-frame replies are unhexlified straight from a memoryview slice;
+    CAN multi-frame replies ("00B", "0:...", "1:...") are joined first.
+    Returns None for NO DATA, "?" and other non-hex answers.
+    """
+    view = memoryview(buf)
+    lines = [(s, e) for s, e in _lines(buf, length) if not buf.startswith(b"SEARCHING", s, e)]
+    if not lines:
+        return None
+
+    try:
+        s, e = lines[0]
+        if len(lines) > 1 and buf.find(b":", lines[1][0], lines[1][1]) >= 0:
+            total = int(bytes(view[s:e]), 16)
+            frames = b"".join(view[buf.find(b":", fs, fe) + 1:fe] for fs, fe in lines[1:])
+            return binascii.unhexlify(frames)[:total]
+        return binascii.unhexlify(view[s:e])
+    except ValueError:
+        return None
+
+
+def decode_voltage(buf: bytearray, length: int) -> float:
+    """b'12.6V' -> 12.6 (0.0 if the adapter did not answer with a voltage)."""
+    lines = _lines(buf, length)
+    if not lines:
+        return 0.0
+    s, e = lines[0]
+    try:
+        return float(bytes(buf[s:e]).rstrip(b"Vv"))
+    except ValueError:
+        return 0.0
+
+
+class ElmTransport:
+    """
+    Thin ELM327 transport for the polling hot path.
+    Writes pre-encoded request bytes on an already-open serial port and
+    reads the reply into a reused buffer; python-obd stays in charge of
+    port discovery, protocol detection and PID support checks.
+    """
+    BUFFER_SIZE = 256
+    TIMEOUT = 1.0  # Seconds; python-obd opens the port with 10 s
+
+    def __init__(self, port, timeout: float = TIMEOUT):
+        self.port = port
+        self.port.timeout = timeout
+        self._buf = bytearray(self.BUFFER_SIZE)
+        self._length = 0
+        self._last_request = None
+        self.metrics = None  # GatewayMetrics: reply decoding is reported as "parse"
+
+    def setup(self, protocol_id: str = None) -> bool:
+        """Configures the adapter for raw replies. Pins the protocol python-obd detected."""
+        commands = list(SETUP_COMMANDS)
+        if protocol_id:
+            commands.append(b"ATSP" + protocol_id.encode() + b"\r")
+
+        for command in commands:
+            self.command(command)
+            if self._buf.find(b"OK", 0, self._length) < 0:
+                if command == b"ATAT2\r":
+                    continue  # Optional on clones: adaptive timing stays at its default
+                logging.warning(f"⚠️ ELM327 setup failed at {command.strip().decode()}")
+                return False
+        return True
+
+    def command(self, request: bytes) -> int:
+        """Sends one request and reads up to the prompt. Returns the reply length (0 on timeout)."""
+        port = self.port
+        port.reset_input_buffer()
+        # Repeated requests (e.g. AT RV during a crank) cost one byte on the wire
+        port.write(REPEAT if request == self._last_request else request)
+        self._last_request = request
+
+        buf = self._buf
+        length = 0
+        while True:
+            chunk = port.read(port.in_waiting or 1)
+            if not chunk:
+                logging.debug(f"⚠️ ELM327 timeout on {request.strip()}")
+                self._last_request = None
+                break
+            buf[length:length + len(chunk)] = chunk
+            length += len(chunk)
+            if chunk.endswith(PROMPT):
+                length -= 1
+                break
+        self._length = length
+        return length
+
+    def query(self, request: bytes) -> Optional[bytes]:
+        """Mode 01 request -> response payload (e.g. b'\\x41\\x0c\\x1a\\xf8'), or None."""
+        length = self.command(request)
+        started = time.perf_counter()
+        payload = decode_reply(self._buf, length)
+        if self.metrics:
+            self.metrics.observe("parse", time.perf_counter() - started)
+        return payload
+
+    def voltage(self) -> float:
+        length = self.command(VOLTAGE_REQUEST)
+        started = time.perf_counter()
+        volts = decode_voltage(self._buf, length)
+        if self.metrics:
+            self.metrics.observe("parse", time.perf_counter() - started)
+        return volts
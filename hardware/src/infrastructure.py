@@ -1,51 +1,263 @@
 import json
+import time
 import logging
+import threading
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from lambda_functions.processor.frame_codec import encode_frame
+from .spool import pack_message, unpack_message
 
 class AWSCloudPublisher:
-    def __init__(self, mqtt_client):
+    FRAME_MAX_SAMPLES = 50   # Flush after N samples...
+    FRAME_MAX_AGE = 30.0     # ...or T seconds, whichever comes first
+
+    DRAIN_BATCH = 500
+    # Inline drain per publish: the sync poll loop must not wait out a whole
+    # backlog of QoS 1 PUBACKs after a reconnect (a crank could be missed)
+    DRAIN_SLICE = 20
+    DRAIN_SLICE_S = 0.5
+
+    PENDING_MAX = 1000  # Messages held in memory (no spool): deferred connect or failed publish
+    CONNECT_RETRY_DELAYS = (1.0, 2.0, 5.0, 10.0, 30.0)
+
+    def __init__(self, mqtt_client, framing: bool = False,
+                 frame_max_samples: int = FRAME_MAX_SAMPLES, frame_max_age: float = FRAME_MAX_AGE,
+                 spool=None):
         """
         Wrapper around the AWS IoT MQTT Client.
+        With framing enabled, samples are coalesced into compact binary
+        SDF1 frames (see frame_codec) instead of one JSON message each.
+        With a spool (SegmentQueue), failed publishes are stored on disk
+        and drained in batches once the connection is back.
+        With mqtt_client=None and connect_in_background(), messages are
+        held (spool or memory) until the cloud connection is up.
         """
         self.client = mqtt_client
+        self.spool = spool
+        self.framing = framing
+        self.frame_max_samples = frame_max_samples
+        self.frame_max_age = frame_max_age
+
+        self._frame_vin = None
+        self._frame_rows = {}  # timestamp_ms -> {pid_code: value}
+        self._frame_started = 0.0
+        self.metrics = None  # GatewayMetrics (serialize / publish timers), set by the app
+
+        # Cleared while a deferred connect is in progress
+        self.online = threading.Event()
+        self.online.set()
+        self._pending = deque(maxlen=self.PENDING_MAX)
+
+    @property
+    def enabled(self) -> bool:
+        """A connected client, or one still being connected in the background."""
+        return self.client is not None or not self.online.is_set()
+
+    def connect_in_background(self, client_factory) -> threading.Thread:
+        """
+        Fast start: builds and connects the MQTT client on a daemon thread
+        (SDK import, TLS handshake) while OBD polling already runs.
+        Retries until it succeeds; held messages go out with the next publish.
+        """
+        self.online.clear()
+
+        def connect():
+            attempts = 0
+            while True:
+                try:
+                    client = client_factory()
+                    if client.connect():
+                        break
+                    logging.error("❌ AWS Connection Failed")
+                except Exception as e:
+                    logging.error(f"⚠️ Cloud Connection Error: {e}")
+                time.sleep(self.CONNECT_RETRY_DELAYS[min(attempts, len(self.CONNECT_RETRY_DELAYS) - 1)])
+                attempts += 1
+
+            self.client = client
+            self.online.set()
+            held = len(self._pending) + (self.spool.depth if self.spool else 0)
+            logging.info(f"✅ AWS Cloud Connected in background ({held} messages held)")
+
+        thread = threading.Thread(target=connect, name="cloud-connect", daemon=True)
+        thread.start()
+        return thread
+
+    def _timed(self, stage: str):
+        return self.metrics.time(stage) if self.metrics else nullcontext()
 
     def publish_telemetry(self, payload: dict):
         """
         Publishes telemetry data to the vehicle-specific topic.
         Topic format: vehicle/{VIN}/telemetry
         """
-        if not self.client:
+        if not self.enabled:
             logging.warning("⚠️ MQTT Client not initialized, skipping publish.")
             return
 
+        if self.framing:
+            self._add_to_frame(payload)  # Encoding is timed when the frame is flushed
+            return
+
         try:
             # 1. Topic meghatározása a VIN alapján
             vin = payload.get('vin', 'UNKNOWN_VIN')
             topic = f"vehicle/{vin}/telemetry"
             
             # 2. JSON sorosítás
-            message_json = json.dumps(payload)
+            with self._timed("serialize"):
+                message_json = json.dumps(payload)
             
             # 3. Küldés (QoS 1 - At least once delivery)
             # A library publish metódusa: topic, payload, QoS
-            self.client.publish(topic, message_json, 1)
+            with self._timed("publish"):
+                self._send(topic, message_json, 1, lane="telemetry")
             
             logging.debug(f"📡 MQTT Sent to {topic}: {len(message_json)} bytes")
             
         except Exception as e:
             logging.error(f"❌ Failed to publish MQTT message: {e}")
 
-    def publish_event(self, vin: str, event_type: str, details: str):
+    @staticmethod
+    def _to_epoch_ms(ts_str: str) -> int:
+        # Naiv falióra-idő UTC-ként kódolva, így a dekóder ugyanazt az időt adja vissza
+        dt = datetime.fromisoformat(ts_str)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return round(dt.timestamp() * 1000)
+
+    def _add_to_frame(self, payload: dict):
+        vin = payload.get('vin', 'UNKNOWN_VIN')
+        if self._frame_rows and vin != self._frame_vin:
+            self.flush()
+
+        if not self._frame_rows:
+            self._frame_vin = vin
+            self._frame_started = time.monotonic()
+
+        for pid in payload.get('pids', []):
+            ts_ms = self._to_epoch_ms(pid.get('timestamp') or payload['timestamp'])
+            self._frame_rows.setdefault(ts_ms, {})[pid['pid_code']] = pid['value']
+
+        if (len(self._frame_rows) >= self.frame_max_samples or
+                time.monotonic() - self._frame_started >= self.frame_max_age):
+            self.flush()
+
+    def flush(self):
+        """
+        Sends the pending samples as one SDF1 frame.
+        Topic format: vehicle/{VIN}/frames
+        """
+        if not self._frame_rows or not self.enabled:
+            return
+
+        rows = sorted(self._frame_rows.items())
+        self._frame_rows = {}
+        try:
+            topic = f"vehicle/{self._frame_vin}/frames"
+            with self._timed("serialize"):
+                frame = encode_frame(self._frame_vin, rows)
+            with self._timed("publish"):
+                self._send(topic, frame, 1, lane="telemetry")
+            logging.debug(f"📡 MQTT Frame sent to {topic}: {len(rows)} samples, {len(frame)} bytes")
+        except Exception as e:
+            logging.error(f"❌ Failed to publish telemetry frame: {e}")
+
+    def publish_event(self, vin: str, event_type: str, details: str, timestamp: str = None):
         """
         Opcionális: Riasztások küldése (pl. Vampire Drain Alert)
         Topic format: vehicle/{VIN}/alerts
         """
-        if not self.client: return
+        if not self.enabled: return
 
         topic = f"vehicle/{vin}/alerts"
         payload = {
             "vin": vin,
             "type": event_type,
             "details": details,
-            "timestamp": None # Ide jöhetne datetime.now().isoformat()
+            "timestamp": timestamp
         }
-        self.client.publish(topic, json.dumps(payload), 1)
+        self._send(topic, json.dumps(payload), 1, lane="alerts")
+
+    def publish_crank_event(self, record: dict):
+        """
+        On-device cranking analysis result (plateau V_min, inrush minimum, ...).
+        Topic format: vehicle/{VIN}/events
+        """
+        if not self.enabled: return
+
+        topic = f"vehicle/{record.get('vin', 'UNKNOWN_VIN')}/events"
+        self._send(topic, json.dumps(record), 1, lane="events")
+
+    def publish_metrics(self, snapshot: dict):
+        """
+        Periodic edge instrumentation snapshot (stage latencies, rates, drops).
+        Topic format: vehicle/{VIN}/metrics
+        """
+        if not self.enabled: return
+
+        topic = f"vehicle/{snapshot.get('vin', 'UNKNOWN_VIN')}/metrics"
+        self._send(topic, json.dumps(snapshot), 0, lane="telemetry")
+
+    def _try_publish(self, topic: str, message, qos: int) -> bool:
+        try:
+            return self.client.publish(topic, message, qos) is not False
+        except Exception as e:
+            logging.debug(f"⚠️ MQTT publish failed: {e}")
+            return False
+
+    def _send(self, topic: str, message, qos: int, lane: str):
+        """
+        Single guarded send path for every topic. Publishes directly while
+        nothing is held; otherwise queues behind the backlog to keep ordering.
+        Undeliverable messages go to the spool, or without one to the bounded
+        in-memory queue. Before a deferred connect completes, everything is held.
+        Never raises on a client error.
+        """
+        if not self.online.is_set():
+            if self.spool:
+                self.spool.append(lane, pack_message(topic, message, qos))
+            else:
+                self._pending.append((topic, message, qos))
+            return
+
+        if not self.spool:
+            self._send_pending()
+            if self._pending or not self._try_publish(topic, message, qos):
+                self._pending.append((topic, message, qos))
+            return
+
+        record = pack_message(topic, message, qos)
+        if self.spool.depth == 0:
+            if not self._try_publish(topic, message, qos):
+                self.spool.append(lane, record)
+            return
+
+        self.spool.append(lane, record)
+        self.drain_spool(self.DRAIN_SLICE, self.DRAIN_SLICE_S)
+
+    def _send_pending(self):
+        """Publishes the messages held in memory, oldest first; stops at the first failure."""
+        while self._pending:
+            if not self._try_publish(*self._pending[0]):
+                return
+            self._pending.popleft()
+
+    def drain_spool(self, max_batch: int = DRAIN_BATCH, max_seconds: float = None) -> int:
+        """Sends up to `max_batch` spooled messages (within `max_seconds`); stops at the first failure."""
+        if not self.spool or self.spool.depth == 0:
+            return 0
+
+        sent = self.spool.drain(lambda record: self._try_publish(*unpack_message(record)), max_batch, max_seconds)
+        if sent:
+            stats = self.spool.stats()
+            logging.info(
+                f"📦 Drained {sent} spooled messages ({stats['last_drain_rate']} msg/s), "
+                f"{stats['depth']} remaining"
+            )
+        return sent
+
+    def queue_stats(self) -> dict:
+        """Spool depth, size and drain throughput (for sizing the store-and-forward queue)."""
+        return self.spool.stats() if self.spool else {}
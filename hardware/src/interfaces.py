@@ -1,7 +1,10 @@
 import abc
-from .domain import TelemetryData
+from typing import Optional
+from .domain import TelemetryData, TelemetryBuffer, TelemetryRecord
 
 class OBDProvider(abc.ABC):
+    metrics = None  # GatewayMetrics, set by the app (optional)
+
     @abc.abstractmethod
     def connect(self) -> bool:
         pass
@@ -10,6 +13,27 @@ class OBDProvider(abc.ABC):
     def fetch_data(self) -> TelemetryData:
         pass
 
+    def fetch_into(self, buffer: TelemetryBuffer) -> Optional[TelemetryRecord]:
+        """
+        Writes one sample into a TelemetryBuffer (allocation-free hot path).
+        Providers override this; the default falls back to fetch_data().
+        """
+        data = self.fetch_data()
+        if not data:
+            return None
+        return buffer.append(data.timestamp, data.speed, data.rpm, data.voltage,
+                             data.coolant_temp, data.accel_x or 0.0, data.accel_y or 0.0)
+
+    def query_pid(self, field: str) -> Optional[float]:
+        """
+        Reads a single signal (speed, rpm, voltage, coolant_temp) for the
+        per-PID scheduler. The default falls back to a full fetch_data().
+        """
+        data = self.fetch_data()
+        if not data:
+            return None
+        return getattr(data, field)
+
 class CloudPublisher(abc.ABC):
     @abc.abstractmethod
     def publish(self, topic: str, payload: str) -> bool:
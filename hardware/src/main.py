@@ -1,17 +1,24 @@
 import logging
 import os
 import sys
-from AWSIoTPythonSDK.MQTTLib import AWSIoTMQTTClient
-from .providers.simulated import SimulatedOBDProvider
-from .providers.real import RealOBDProvider
 # JAVÍTÁS 1: A helyes osztály importálása
 from .app import SmartDriveApp
+from .async_runtime import AsyncGatewayRuntime
 from .infrastructure import AWSCloudPublisher
+from .spool import SegmentQueue
+from .compression import TelemetryCompressor
+from .scheduler import PidScheduler
+from .connection_cache import ConnectionCache
+from .metrics import GatewayMetrics, MetricsServer, SamplingProfiler
 
-def create_aws_iot_client(vin: str):
+def create_aws_iot_client(vin: str, offline_queue: bool = True):
     """
     Configures the AWS IoT MQTT client.
+    With offline_queue=False the SDK's in-memory queue is disabled and
+    failed publishes are left to the disk-backed spool.
     """
+    # Lazy: the SDK (paho, ssl) is only loaded on the thread that connects
+    from AWSIoTPythonSDK.MQTTLib import AWSIoTMQTTClient
     client = AWSIoTMQTTClient(vin)
     # Endpoint a te régiódhoz (Frankfurt)
     client.configureEndpoint("a3de8eyv1wr96p-ats.iot.eu-central-1.amazonaws.com", 8883)
@@ -24,12 +31,21 @@ def create_aws_iot_client(vin: str):
     )
 
     client.configureAutoReconnectBackoffTime(1, 32, 20)
-    client.configureOfflinePublishQueueing(-1)
+    client.configureOfflinePublishQueueing(-1 if offline_queue else 0)
     client.configureDrainingFrequency(2)
     client.configureConnectDisconnectTimeout(10)
     client.configureMQTTOperationTimeout(5)
     return client
 
+def create_provider(mode: str, vin: str, port: str, cache=None):
+    """Imports only the selected provider: python-obd is not loaded for SIMULATED."""
+    if mode == "REAL":
+        from .providers.real import RealOBDProvider
+        return RealOBDProvider(vin=vin, port=port, cache=cache)
+
+    from .providers.simulated import SimulatedOBDProvider
+    return SimulatedOBDProvider(vin=vin, scenario=os.getenv("SMARTDRIVE_SCENARIO", "NORMAL_START"))
+
 def main():
     logging.basicConfig(
         level=logging.INFO, 
@@ -41,29 +57,74 @@ def main():
     MODE = os.getenv("SMARTDRIVE_MODE", "SIMULATED")
     # JAVÍTÁS 2: OBD_PORT használata, hogy kompatibilis legyen a paranccsal
     PORT = os.getenv("OBD_PORT", "/dev/ttyUSB0") 
+    # SYNC: klasszikus blokkoló ciklus | ASYNC: asyncio pipeline (poll / logic / ingest)
+    RUNTIME = os.getenv("SMARTDRIVE_RUNTIME", "SYNC")
+    # Kötegelt, bináris SDF1 frame-ek a mintánkénti JSON helyett
+    FRAMING = os.getenv("SMARTDRIVE_FRAMING", "0") == "1"
+    # Lemezes store-and-forward sor (üres érték = SDK memóriabeli sora)
+    SPOOL_DIR = os.getenv("SMARTDRIVE_SPOOL_DIR", "hardware/spool")
+    SPOOL_MAX_MB = int(os.getenv("SMARTDRIVE_SPOOL_MAX_MB", "64"))
+    # Steady-state tömörítés: OFF | DEADBAND | SDT (swinging door)
+    COMPRESSION = os.getenv("SMARTDRIVE_COMPRESSION", "OFF")
+    # PID-enkénti, állapotfüggő lekérdezési ütemező az egységes intervallum helyett
+    SCHEDULER = os.getenv("SMARTDRIVE_SCHEDULER", "0") == "1"
+    # Utolsó jó port / protokoll / PID bitmap VIN-enként (üres érték = mindig teljes keresés)
+    CONNECTION_CACHE = os.getenv("SMARTDRIVE_CONNECTION_CACHE", "hardware/cache/obd_connection.json")
+    # Műszerezés: metrika üzenetek gyakorisága, helyi /stats végpont, opcionális profiler kimenet
+    METRICS_INTERVAL = float(os.getenv("SMARTDRIVE_METRICS_INTERVAL", "60"))
+    STATS_PORT = int(os.getenv("SMARTDRIVE_STATS_PORT", "0"))
+    PROFILE_PATH = os.getenv("SMARTDRIVE_PROFILE", "")
+    # Gyorsindítás: az OBD lekérdezés azonnal indul, az AWS kapcsolat a háttérben épül fel
+    FAST_START = os.getenv("SMARTDRIVE_FAST_START", "0") == "1"
 
     logging.info(f"🚀 Starting SmartDrive Edge Gateway in [{MODE}] mode...")
 
+    spool = SegmentQueue(SPOOL_DIR, max_bytes=SPOOL_MAX_MB * 1024 * 1024) if SPOOL_DIR else None
+
     # 1. AWS Kapcsolat felépítése
-    try:
-        aws_client = create_aws_iot_client(VIN)
-        if aws_client.connect():
-            logging.info(f"✅ AWS Cloud Connected (VIN: {VIN})")
-        else:
-            logging.error("❌ AWS Connection Failed")
-            # Éles tesztnél nem lépünk ki, hogy a logokat lássuk, de a felhő nem fog menni
-    except Exception as e:
-        logging.error(f"⚠️ Cloud Connection Error: {e}")
-        aws_client = None
+    if FAST_START:
+        # A minták a spoolban / memóriában várnak, amíg a kapcsolat létrejön
+        publisher = AWSCloudPublisher(None, framing=FRAMING, spool=spool)
+        publisher.connect_in_background(lambda: create_aws_iot_client(VIN, offline_queue=not SPOOL_DIR))
+    else:
+        try:
+            aws_client = create_aws_iot_client(VIN, offline_queue=not SPOOL_DIR)
+            if aws_client.connect():
+                logging.info(f"✅ AWS Cloud Connected (VIN: {VIN})")
+            else:
+                logging.error("❌ AWS Connection Failed")
+                # Éles tesztnél nem lépünk ki, hogy a logokat lássuk, de a felhő nem fog menni
+        except Exception as e:
+            logging.error(f"⚠️ Cloud Connection Error: {e}")
+            aws_client = None
 
-    publisher = AWSCloudPublisher(aws_client) if aws_client else None
+        publisher = AWSCloudPublisher(aws_client, framing=FRAMING, spool=spool) if aws_client else None
 
     # 2. App indítása
     try:
         # JAVÍTÁS 3: Dependency Injection
         # Átadjuk a VIN-t, Portot és a Publishert az App-nak
-        app = SmartDriveApp(vin=VIN, port=PORT, publisher=publisher)
-        app.run()
+        compressor = TelemetryCompressor(mode=COMPRESSION) if COMPRESSION != "OFF" else None
+        scheduler = PidScheduler() if SCHEDULER else None
+        cache = ConnectionCache(CONNECTION_CACHE) if CONNECTION_CACHE else None
+        provider = create_provider(MODE, VIN, PORT, cache)
+        metrics = GatewayMetrics(export_interval=METRICS_INTERVAL)
+        if STATS_PORT:
+            MetricsServer(metrics, STATS_PORT).start()
+        profiler = SamplingProfiler(PROFILE_PATH) if PROFILE_PATH else None
+        if profiler:
+            profiler.start()
+
+        app = SmartDriveApp(vin=VIN, port=PORT, publisher=publisher, compressor=compressor,
+                            provider=provider, scheduler=scheduler, metrics=metrics, profiler=profiler)
+        try:
+            if RUNTIME == "ASYNC":
+                AsyncGatewayRuntime(app).run()
+            else:
+                app.run()
+        finally:
+            if profiler:
+                profiler.stop()
 
     except Exception as e:
         logging.critical(f"💥 Critical system failure: {e}")
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import math
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+# Hot-path stages, in pipeline order
+STAGES = ("query", "parse", "process", "serialize", "publish")
+
+_LOADED = time.monotonic()
+
+
+def process_uptime() -> float:
+    """
+    Seconds since this process was started, interpreter start-up and imports
+    included (Linux /proc, 10 ms resolution). Elsewhere: since this module loaded.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime, clock ticks after boot); comm may contain spaces
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.monotonic() - _LOADED
+
+
+class LatencyHistogram:
+    """
+    Log2-bucketed latency histogram: 10 µs .. ~10 s in 21 buckets.
+    Fixed size, O(1) observe; percentiles are the upper bucket edge.
+    """
+    MIN_S = 1e-5
+    BUCKETS = 21
+
+    def __init__(self):
+        self.counts = [0] * (self.BUCKETS + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        if seconds < self.MIN_S:
+            index = 0
+        else:
+            index = min(int(math.log2(seconds / self.MIN_S)) + 1, self.BUCKETS)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.MIN_S * 2 ** index, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class GatewayMetrics:
+    """
+    Per-stage timers, latency histograms, sample-rate and drop counters for
+    the edge hot path. Histograms cover one export window (rolled on
+    snapshot(reset=True)); counters are cumulative since start.
+    Stages are written by one thread each (OBD, logic, MQTT), so no lock.
+    """
+    EXPORT_INTERVAL = 60.0
+
+    def __init__(self, export_interval: float = EXPORT_INTERVAL, clock=time):
+        self.export_interval = export_interval
+        self.clock = clock
+        self.stages: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+        self.counters: Counter = Counter()
+        self.target_interval = 0.0
+        self._window_start = clock.monotonic()
+        self._window_samples = 0
+        self._last_export = self._window_start
+        self.first_sample_s = None  # Process start -> first OBD sample
+
+    def observe(self, stage: str, seconds: float):
+        self.stages[stage].observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage].observe(time.perf_counter() - started)
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def record_sample(self, target_interval: float):
+        self._window_samples += 1
+        self.target_interval = target_interval
+
+    def mark_first_sample(self):
+        if self.first_sample_s is None:
+            self.first_sample_s = process_uptime()
+            logging.info(f"⏱️ First sample {self.first_sample_s:.2f}s after process start")
+
+    def due(self) -> bool:
+        return self.clock.monotonic() - self._last_export >= self.export_interval
+
+    def snapshot(self, reset: bool = False) -> dict:
+        now = self.clock.monotonic()
+        window = now - self._window_start
+        snapshot = {
+            "window_s": round(window, 1),
+            "sample_rate": {
+                "achieved_hz": round(self._window_samples / window, 2) if window > 0 else 0.0,
+                "target_hz": round(1 / self.target_interval, 2) if self.target_interval else 0.0,
+            },
+            "stages": {stage: hist.snapshot() for stage, hist in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+        if self.first_sample_s is not None:
+            snapshot["first_sample_s"] = round(self.first_sample_s, 3)
+        if reset:
+            self.stages = {stage: LatencyHistogram() for stage in STAGES}
+            self._window_start = self._last_export = now
+            self._window_samples = 0
+        return snapshot
+
+
+class MetricsServer(threading.Thread):
+    """Local stats endpoint: GET /stats returns the current (unreset) snapshot as JSON."""
+
+    def __init__(self, metrics: GatewayMetrics, port: int, host: str = "127.0.0.1"):
+        super().__init__(name="metrics-http", daemon=True)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/stats":
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Keep polling clients out of the gateway log
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+
+    def run(self):
+        logging.info(f"📈 Stats endpoint on http://{self.server.server_address[0]}:{self.server.server_address[1]}/stats")
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class SamplingProfiler(threading.Thread):
+    """
+    Opt-in sampling profiler for field debugging. Samples the target
+    thread's stack every `interval` seconds and writes collapsed stacks
+    ("file:func;file:func count"), ready for flamegraph.pl or speedscope.
+    """
+    INTERVAL = 0.005
+
+    def __init__(self, path: str, thread_id: int = None, interval: float = INTERVAL):
+        super().__init__(name="sampling-profiler", daemon=True)
+        self.path = path
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._lock = threading.Lock()  # dump() runs on the gateway thread
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                with self._lock:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self):
+        with self._lock:
+            stacks = self.stacks.most_common()
+        with open(self.path, "w") as f:
+            for stack, n in stacks:
+                f.write(f"{stack} {n}\n")
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.dump()
@@ -1,2 +1,14 @@
-from .simulated import SimulatedOBDProvider
-from .real import RealOBDProvider
+import importlib
+
+# Loaded on first access: the real provider pulls in python-obd, the
+# simulated one must not pay for it
+_PROVIDERS = {
+    "SimulatedOBDProvider": ".simulated",
+    "RealOBDProvider": ".real",
+}
+
+
+def __getattr__(name):
+    if name in _PROVIDERS:
+        return getattr(importlib.import_module(_PROVIDERS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
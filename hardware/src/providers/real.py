@@ -1,80 +1,464 @@
 import logging
 import time
-import obd
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+import serial
 from ..interfaces import OBDProvider
-from ..domain import TelemetryData
+from ..domain import TelemetryData, TelemetryBuffer, TelemetryRecord
+from ..elm327 import ElmTransport, mode01_request
+from ..connection_cache import ConnectionCache
+
+# python-obd (and pint under it) is imported on first use: a warm start on the
+# lean transport reaches the first sample without it.
+
+# Mode 01 PID -> (TelemetryData field, payload length, decoder)
+# SAE J1979 scaling, applied directly on the raw payload bytes.
+MODE01_PIDS = {
+    0x0D: ("speed", 1, lambda d: float(d[0])),
+    0x0C: ("rpm", 2, lambda d: ((d[0] << 8) | d[1]) / 4.0),
+    0x05: ("coolant_temp", 1, lambda d: float(d[0] - 40)),
+}
+
+FIELD_PIDS = {field: pid for pid, (field, _, _) in MODE01_PIDS.items()}
+PID_REQUESTS = {pid: mode01_request(pid) for pid in MODE01_PIDS}
+
+# ELM327 / J1979 limit: one Mode 01 request may carry at most 6 PIDs.
+MAX_PIDS_PER_REQUEST = 6
+
+
+def parse_multi_pid_response(data) -> dict:
+    """
+    Single-pass parser for a (multi-PID) Mode 01 response payload.
+    Example: 41 0D 32 0C 1A F8 05 5A -> {0x0D: b'2', 0x0C: b'\x1a\xf8', 0x05: b'Z'}
+    Stops at the first unknown PID, since its length cannot be inferred.
+    """
+    values = {}
+    view = memoryview(bytes(data))
+    if len(view) < 1 or view[0] != 0x41:
+        return values
+
+    i = 1
+    while i < len(view):
+        pid = view[i]
+        spec = MODE01_PIDS.get(pid)
+        if spec is None:
+            break
+        length = spec[1]
+        if i + 1 + length > len(view):
+            break
+        values[pid] = view[i + 1:i + 1 + length]
+        i += 1 + length
+    return values
+
 
 class RealOBDProvider(OBDProvider):
-    def __init__(self, vin: str, port: str = None):
+    RATE_WINDOW = 50  # Number of samples used for the achieved sample rate
+    BATCH_REJECT_LIMIT = 3  # Consecutive empty batch replies before falling back
+
+    def __init__(self, vin: str, port: str = None, batch_queries: bool = True,
+                 lean_transport: bool = True, cache: ConnectionCache = None):
         self.vin = vin
         self.port = port 
         self.connection = None
+        # Serialises access to the ELM327 link (main loop vs. capture worker)
+        self._link_lock = threading.Lock()
+
+        # Batched Mode 01 queries (one round-trip for all PIDs)
+        self.batch_queries = batch_queries
+        self._batch_pids = []
+        self._batch_command = None
+        self._batch_failures = 0
+        self._batch_request = None
+        self._sample_times = deque(maxlen=self.RATE_WINDOW)
+
+        # Raw ELM327 transport for the hot path (python-obd: discovery + support checks only)
+        self.lean_transport = lean_transport
+        self.transport = None
+
+        # Warm start: last good port / baud / protocol / PID bitmap for this VIN
+        self.cache = cache
+        self.last_connect_time = None  # Seconds spent in the last successful connect()
 
     def connect(self) -> bool:
+        started = time.monotonic()
+        self._close()
+
+        warm = self._warm_start()
+        if warm is None:
+            return False  # Adapter answered on the cached port, the car did not: retry later
+        if warm or self._cold_start():
+            self.last_connect_time = time.monotonic() - started
+            logging.info(f"⏱️ OBD link ready in {self.last_connect_time:.2f}s")
+            return True
+        return False
+
+    def _close(self):
+        """Releases the previous link before a reconnect (the port would stay busy)."""
+        transport, connection = self.transport, self.connection
+        self.transport = self.connection = None
+        try:
+            if connection is not None:
+                connection.close()
+            elif transport is not None:
+                transport.port.close()
+        except Exception as e:
+            logging.debug(f"⚠️ Closing stale OBD link: {e}")
+
+    def _warm_start(self) -> Optional[bool]:
+        """True: connected. False: no usable cache entry. None: adapter found, ECU silent."""
+        entry = self.cache.get(self.vin) if self.cache else None
+        if not entry or (self.port and entry["port"] != self.port):
+            return False
+
+        logging.info(f"🔍 [REAL] Warm start on cached port {entry['port']} (protocol {entry['protocol']})")
+        supported = [pid for pid in MODE01_PIDS if entry["pid_bitmap"] >> pid & 1]
+        try:
+            if self.lean_transport:
+                opened = self._open_cached_transport(entry)
+                if opened:
+                    self._prepare_batch_command(supported)
+                if opened is not False:
+                    return opened
+            else:
+                import obd
+                # python-obd still loads the PID list, but skips baud probing and protocol search
+                conn = obd.OBD(entry["port"], baudrate=entry["baudrate"],
+                               protocol=entry["protocol"], fast=True)
+                if conn.status() == obd.OBDStatus.CAR_CONNECTED:
+                    self.connection = conn
+                    self._prepare_batch_command()
+                    return True
+                conn.close()
+        except Exception as e:
+            logging.warning(f"⚠️ Warm start failed: {e}")
+            self._close()
+
+        logging.info("🔍 [REAL] Cached link no longer valid, falling back to a full scan.")
+        self.cache.invalidate(self.vin)
+        return False
+
+    def _open_cached_transport(self, entry: dict) -> Optional[bool]:
+        """Opens the serial port directly: no python-obd init, no ATZ, pinned protocol."""
+        port = serial.serial_for_url(entry["port"], baudrate=entry["baudrate"] or 38400,
+                                     timeout=ElmTransport.TIMEOUT)
+        transport = ElmTransport(port)
+        transport.metrics = self.metrics
+        with self._link_lock:
+            if not transport.setup(entry["protocol"]):
+                port.close()
+                return False
+            # 0100 doubles as the "is the car there" check
+            if not transport.query(mode01_request(0x00)):
+                port.close()
+                logging.warning("⏳ Adapter ready, ECU not answering (ignition off?)")
+                return None
+        self.transport = transport
+        logging.info("⚡ Lean ELM327 transport enabled (warm start)")
+        return True
+
+    def _cold_start(self) -> bool:
+        import obd
         if self.port:
             logging.info(f"🔍 [REAL] Connecting on direct port: {self.port}...")
-            return self._attempt_connection(self.port)
+            ports = [self.port]
+        else:
+            ports = obd.scan_serial()
+            if not ports:
+                logging.error("❌ No paired OBD-II devices found.")
+                return False
 
-        ports = obd.scan_serial()
-        if not ports:
-            logging.error("❌ No paired OBD-II devices found.")
+        conn = self._probe_ports(ports)
+        if conn is None:
             return False
 
-        for port in ports:
-            if self._attempt_connection(port):
-                return True
-        return False
+        self.connection = conn
+        self._prepare_batch_command()
+        self._open_transport()
+        self._remember(conn)
+        logging.info(f"✅ Connection successful on {conn.port_name()}")
+        return True
 
-    def _attempt_connection(self, port_name: str) -> bool:
+    def _probe(self, port_name: str):
+        """Full python-obd negotiation on one port; returns the connection or None."""
+        import obd
         try:
             conn = obd.OBD(port_name, fast=True)
-            time.sleep(1.5)
-            status = conn.status()
-
-            if status == obd.OBDStatus.CAR_CONNECTED:
-                self.connection = conn
-                logging.info(f"✅ Connection successful on {port_name}")
-                return True
-            
-            return False
+            if conn.status() == obd.OBDStatus.CAR_CONNECTED:
+                return conn
+            conn.close()
         except Exception as e:
             logging.error(f"❌ Connection error on {port_name}: {e}")
-            return False
+        return None
+
+    def _probe_ports(self, ports):
+        """
+        Negotiates on every candidate port concurrently; the first car wins.
+        Slower probes are closed in the background when they finish.
+        """
+        if len(ports) == 1:
+            return self._probe(ports[0])
+
+        pool = ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="obd-probe")
+        futures = [pool.submit(self._probe, port) for port in ports]
+        winner = None
+        for future in as_completed(futures):
+            winner = future.result()
+            if winner is not None:
+                break
+
+        def discard(future):
+            conn = future.result()
+            if conn is not None and conn is not winner:
+                conn.close()
+
+        for future in futures:
+            future.add_done_callback(discard)
+        pool.shutdown(wait=False)
+        return winner
+
+    def _remember(self, conn):
+        if not self.cache:
+            return
+        port = getattr(conn.interface, "_ELM327__port", None)
+        pid_bitmap = 0
+        for cmd in conn.supported_commands:
+            if cmd.mode == 1 and cmd.pid is not None:
+                pid_bitmap |= 1 << cmd.pid
+        self.cache.put(self.vin, conn.port_name(), getattr(port, "baudrate", None),
+                       conn.protocol_id(), pid_bitmap)
+
+    def _link_ready(self) -> bool:
+        if self.transport:
+            return True
+        import obd
+        return self.connection is not None and self.connection.status() == obd.OBDStatus.CAR_CONNECTED
 
     def fetch_raw_voltage(self) -> float:
         """
-        A lehető leggyorsabb feszültséglekérés direkt AT RV paranccsal.
+        A lehető leggyorsabb feszültséglekérés AT RV paranccsal (lean transporton nyers bájtokkal).
         Kikerüli az ECU lekérdezést, csak az adaptert kérdezi.
         """
+        if self.transport:
+            with self._link_lock:
+                return self._transport_call(self.transport.voltage, 0.0)
+
         if not self.connection or not self.connection.interface:
             return 0.0
-        
+
+        # python-obd 0.7 has no raw send on its ELM327 interface: AT RV via its own command
+        import obd
         try:
-            # Direkt parancsküldés az ELM327-nek
-            raw_response = self.connection.interface.send_and_receive(b"AT RV\r")
-            
-            # Tisztítás: pl. b'12.6V\r>' -> 12.6
-            clean_val = raw_response.replace(b"V", b"").replace(b"\r", b"").replace(b">", b"").strip()
-            return float(clean_val)
+            with self._link_lock:
+                return self._query_value(obd.commands.ELM_VOLTAGE)
         except Exception as e:
             logging.debug(f"⚠️ Raw voltage error: {e}")
             return 0.0
 
+    @property
+    def sample_rate(self) -> float:
+        """Achieved fetch_data() rate in Hz over the last RATE_WINDOW samples."""
+        if len(self._sample_times) < 2:
+            return 0.0
+        span = self._sample_times[-1] - self._sample_times[0]
+        return (len(self._sample_times) - 1) / span if span > 0 else 0.0
+
+    def _prepare_batch_command(self, supported=None):
+        """
+        Builds one multi-PID Mode 01 command from the PIDs the ECU supports
+        (asked from python-obd, or the cached list on a warm start).
+        Falls back to per-PID queries if fewer than two PIDs qualify.
+        """
+        self._batch_pids = []
+        self._batch_command = None
+        self._batch_request = None
+        self._batch_failures = 0
+        if not self.batch_queries:
+            return
+
+        if supported is None:
+            import obd
+            supported = [pid for pid in MODE01_PIDS if self.connection.supports(obd.commands[1][pid])]
+        self._batch_pids = list(supported)[:MAX_PIDS_PER_REQUEST]
+
+        if len(self._batch_pids) < 2:
+            return
+
+        self._batch_request = mode01_request(*self._batch_pids)
+        if self.transport:
+            # Warm start: the lean transport is already up, python-obd is never imported
+            logging.info(f"⚡ Batched Mode 01 query enabled: {self._batch_request.strip().decode()}")
+            return
+
+        import obd
+        request = b"01" + b"".join(b"%02X" % pid for pid in self._batch_pids)
+        self._batch_command = obd.OBDCommand(
+            "SMARTDRIVE_BATCH",
+            "SmartDrive multi-PID Mode 01 request",
+            request,
+            0,  # Variable length: skip python-obd's payload padding
+            lambda messages: bytes(messages[0].data),
+            obd.ECU.ENGINE,
+            False
+        )
+        logging.info(f"⚡ Batched Mode 01 query enabled: {request.decode()}")
+
+    def _open_transport(self):
+        """
+        Takes over python-obd's open serial port for the lean transport.
+        python-obd keeps no public handle on it; if that ever changes,
+        the provider stays on the python-obd query path.
+        """
+        self.transport = None
+        if not self.lean_transport:
+            return
+
+        port = getattr(self.connection.interface, "_ELM327__port", None)
+        if port is None:
+            logging.warning("⚠️ Serial port not reachable, staying on python-obd queries.")
+            return
+
+        transport = ElmTransport(port)
+        transport.metrics = self.metrics
+        with self._link_lock:
+            if not transport.setup(self.connection.protocol_id()):
+                return
+        self.transport = transport
+        logging.info("⚡ Lean ELM327 transport enabled")
+
+    def _transport_call(self, call, default, *args):
+        """Runs a transport call; a serial error drops the link so the app reconnects."""
+        try:
+            return call(*args)
+        except Exception as e:
+            logging.error(f"❌ ELM327 link error: {e}")
+            self._close()
+            return default
+
+    def _transport_pid(self, pid: int) -> float:
+        decode = MODE01_PIDS[pid][2]
+        raw = parse_multi_pid_response(self.transport.query(PID_REQUESTS[pid]) or b"")
+        return decode(raw[pid]) if pid in raw else 0.0
+
+    def _transport_sample(self) -> dict:
+        """Lean counterpart of _query_batch(): same fallback rules, raw request bytes."""
+        raw = {}
+        if self._batch_request is not None:
+            raw = parse_multi_pid_response(self.transport.query(self._batch_request) or b"")
+            if raw:
+                self._batch_failures = 0
+            else:
+                self._batch_failures += 1
+                if self._batch_failures >= self.BATCH_REJECT_LIMIT:
+                    logging.warning("⚠️ ECU rejects multi-PID requests, falling back to per-PID queries.")
+                    self._batch_request = None
+
+        values = {}
+        for pid, (field, _, decode) in MODE01_PIDS.items():
+            values[field] = decode(raw[pid]) if pid in raw else self._transport_pid(pid)
+        values["voltage"] = self.transport.voltage()
+        return values
+
+    def _query_value(self, cmd) -> float:
+        response = self.connection.query(cmd)
+        if not response.is_null() and hasattr(response.value, 'magnitude'):
+            return float(response.value.magnitude)
+        return 0.0
+
+    def _query_batch(self) -> dict:
+        """
+        Sends the batched request and decodes every PID in one pass.
+        PIDs missing from the reply are fetched one by one; if the ECU
+        keeps rejecting multi-PID requests, batching is disabled.
+        """
+        import obd
+        values = {}
+        raw = {}
+        response = self.connection.query(self._batch_command, force=True)
+        if not response.is_null():
+            raw = parse_multi_pid_response(response.value)
+
+        if raw:
+            self._batch_failures = 0
+        else:
+            self._batch_failures += 1
+            if self._batch_failures >= self.BATCH_REJECT_LIMIT:
+                logging.warning("⚠️ ECU rejects multi-PID requests, falling back to per-PID queries.")
+                self._batch_command = None
+
+        for pid in MODE01_PIDS:
+            field, _, decode = MODE01_PIDS[pid]
+            if pid in raw:
+                values[field] = decode(raw[pid])
+            else:
+                values[field] = self._query_value(obd.commands[1][pid])
+        return values
+
+    def _read_sample(self):
+        """One OBD sample as (speed, rpm, voltage, coolant_temp), or None if offline."""
+        if not self._link_ready():
+            return None
+
+        with self._link_lock:
+            if self.transport:
+                values = self._transport_call(self._transport_sample, None)
+                if values is None:
+                    return None
+                self._sample_times.append(time.monotonic())
+                return values["speed"], values["rpm"], values["voltage"], values["coolant_temp"]
+
+            import obd
+            if self._batch_command is not None:
+                values = self._query_batch()
+            else:
+                values = {
+                    field: self._query_value(obd.commands[1][pid])
+                    for pid, (field, _, _) in MODE01_PIDS.items()
+                }
+            voltage = self._query_value(obd.commands.ELM_VOLTAGE)
+
+        self._sample_times.append(time.monotonic())
+        return values["speed"], values["rpm"], voltage, values["coolant_temp"]
+
+    def query_pid(self, field: str) -> Optional[float]:
+        """One round-trip for a single signal (per-PID scheduler path)."""
+        if not self._link_ready():
+            return None
+
+        if self.transport:
+            with self._link_lock:
+                if field == "voltage":
+                    return self._transport_call(self.transport.voltage, None)
+                return self._transport_call(self._transport_pid, None, FIELD_PIDS[field])
+
+        import obd
+        if field == "voltage":
+            cmd = obd.commands.ELM_VOLTAGE
+        else:
+            cmd = obd.commands[1][FIELD_PIDS[field]]
+        with self._link_lock:
+            return self._query_value(cmd)
+
     def fetch_data(self) -> TelemetryData:
-        if not self.connection or self.connection.status() != obd.OBDStatus.CAR_CONNECTED:
+        sample = self._read_sample()
+        if sample is None:
             return None
-        
-        def get_value(cmd):
-            response = self.connection.query(cmd)
-            if not response.is_null() and hasattr(response.value, 'magnitude'):
-                return float(response.value.magnitude)
-            return 0.0
 
+        speed, rpm, voltage, coolant_temp = sample
         return TelemetryData(
             vin=self.vin,
             timestamp=int(time.time()),
-            speed=get_value(obd.commands.SPEED),
-            rpm=get_value(obd.commands.RPM),
-            voltage=get_value(obd.commands.ELM_VOLTAGE),
-            coolant_temp=get_value(obd.commands.COOLANT_TEMP)
+            speed=speed,
+            rpm=rpm,
+            voltage=voltage,
+            coolant_temp=coolant_temp
         )
+
+    def fetch_into(self, buffer: TelemetryBuffer) -> Optional[TelemetryRecord]:
+        sample = self._read_sample()
+        if sample is None:
+            return None
+
+        speed, rpm, voltage, coolant_temp = sample
+        return buffer.append(int(time.time()), speed, rpm, voltage, coolant_temp)
@@ -1,31 +1,67 @@
-import time
+import csv
 import random
 import logging
+from bisect import bisect_right
+from typing import List, Optional
 from ..interfaces import OBDProvider
-from ..domain import TelemetryData
+from ..domain import TelemetryData, TelemetryBuffer, TelemetryRecord
+from ..clock import SystemClock
 
 class SimulatedOBDProvider(OBDProvider):
     """
     Simulates vehicle telemetry data with scenario-based timelines (v1.5).
     Supports testing of Vmin calculations and Smart Guard sentinel mode.
+    An injectable clock (see clock.VirtualClock) and file-based traces
+    allow faster-than-real-time replays.
     """
-    def __init__(self, vin: str, scenario: str = "NORMAL_START"):
+    TRACE_COLUMNS = ("t", "speed", "rpm", "voltage", "coolant_temp")
+    SAMPLE_FIELDS = TRACE_COLUMNS[1:]  # Order of _scenario_values()
+
+    def __init__(self, vin: str, scenario: str = "NORMAL_START", clock=None, trace: List[tuple] = None):
         self.vin = vin
         self.scenario = scenario
-        self.start_time = time.time()
+        self.clock = clock or SystemClock()
+        self.start_time = self.clock.time()
         self.current_temp = 20.0
+
+        # TRACE scenario: (t, speed, rpm, voltage, coolant_temp) rows, step-hold between rows
+        self.trace = trace or []
+        self._trace_times = [row[0] for row in self.trace]
         logging.info(f"🎮 [SIMULATOR] Initialized with scenario: {self.scenario}")
 
+    @classmethod
+    def from_trace(cls, vin: str, path: str, clock=None) -> "SimulatedOBDProvider":
+        """
+        Loads a scenario trace from CSV with columns t,speed,rpm,voltage,coolant_temp
+        (t = seconds since start). Each row holds until the next one.
+        """
+        with open(path, newline="") as f:
+            rows = [
+                tuple(float(row[c]) for c in cls.TRACE_COLUMNS)
+                for row in csv.DictReader(line for line in f if not line.startswith("#"))
+            ]
+        rows.sort(key=lambda row: row[0])
+        return cls(vin, scenario="TRACE", clock=clock, trace=rows)
+
+    @property
+    def trace_duration(self) -> float:
+        return self._trace_times[-1] if self._trace_times else 0.0
+
     def connect(self) -> bool:
         """Simulates a successful connection to an ELM327 adapter."""
         logging.info("🎮 [SIMULATOR] Connected to virtual OBD-II adapter.")
         return True
 
-    def fetch_data(self) -> TelemetryData:
+    def _scenario_values(self):
         """
-        Generates telemetry based on the active scenario and elapsed time.
+        Generates (speed, rpm, voltage, coolant_temp) based on the active scenario and elapsed time.
         """
-        elapsed = time.time() - self.start_time
+        elapsed = self.clock.time() - self.start_time
+
+        if self.scenario == "TRACE":
+            i = max(bisect_right(self._trace_times, elapsed) - 1, 0)
+            _, speed, rpm, voltage, coolant_temp = self.trace[i]
+            return speed, rpm, voltage, coolant_temp
         
         # Alapértelmezett értékek (Parkoló autó)
         voltage = 12.6
@@ -59,21 +95,31 @@ class SimulatedOBDProvider(OBDProvider):
             elif 2 <= elapsed <= 4: voltage, rpm = 9.5, 250 # Egészséges indítás
             else: voltage, rpm, speed = 14.4, 1200, 50
 
+        return float(speed), float(rpm), voltage, round(self.current_temp, 1)
+
+    def fetch_data(self) -> TelemetryData:
+        speed, rpm, voltage, coolant_temp = self._scenario_values()
         return TelemetryData(
             vin=self.vin,
-            timestamp=int(time.time()),
-            speed=float(speed),
-            rpm=float(rpm),
+            timestamp=int(self.clock.time()),
+            speed=speed,
+            rpm=rpm,
             voltage=voltage,
-            coolant_temp=round(self.current_temp, 1)
+            coolant_temp=coolant_temp
         )
 
+    def fetch_into(self, buffer: TelemetryBuffer) -> Optional[TelemetryRecord]:
+        speed, rpm, voltage, coolant_temp = self._scenario_values()
+        return buffer.append(int(self.clock.time()), speed, rpm, voltage, coolant_temp)
+
+    def query_pid(self, field: str) -> Optional[float]:
+        return self._scenario_values()[self.SAMPLE_FIELDS.index(field)]
+
     def fetch_raw_voltage(self) -> float:
         """
         High-speed voltage access for 10Hz cranking capture.
         """
-        data = self.fetch_data()
-        return data.voltage
+        return self._scenario_values()[2]
 
     def get_voltage(self) -> float:
         """Legacy support for older app logic."""
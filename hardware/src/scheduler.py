@@ -0,0 +1,164 @@
+import heapq
+from collections import deque
+from typing import Dict, Optional
+
+# Vehicle states driving the polling plan
+CRANKING = "CRANKING"
+STEADY = "STEADY"
+PARKED = "PARKED"
+SENTINEL = "SENTINEL"
+
+# Signal order of a (speed, rpm, voltage, coolant_temp) sample
+SAMPLE_FIELDS = ("speed", "rpm", "voltage", "coolant_temp")
+
+# State -> {signal: poll period in seconds}. Signals missing from a state are not polled.
+DEFAULT_RATES: Dict[str, Dict[str, float]] = {
+    # Voltage dominates the link; RPM only to see the crank end
+    CRANKING: {"voltage": 0.05, "rpm": 0.25},
+    STEADY: {"rpm": 1.0, "speed": 1.0, "voltage": 2.0, "coolant_temp": 30.0},
+    # Fast RPM so a crank start is caught early; voltage for vampire drain
+    PARKED: {"rpm": 0.2, "voltage": 1.0, "coolant_temp": 60.0},
+    # Unused while the app's SentinelScheduler owns the link (AT RV pulses only)
+    SENTINEL: {"voltage": 1800.0, "rpm": 1800.0},
+}
+
+# Tie-break when several signals are due at the same instant (lower = first).
+# Voltage goes before RPM, so the state decision taken on the RPM poll sees a fresh voltage.
+PRIORITY = {"voltage": 0, "rpm": 1, "speed": 2, "coolant_temp": 3}
+
+# The vehicle state is only re-evaluated on this signal: mixing a fresh voltage
+# with an RPM held from before a crank start would look like a vampire drain.
+DECISION_FIELD = "rpm"
+
+
+class PidScheduler:
+    """
+    Earliest-deadline-first polling plan for the single ELM327 link.
+    Every signal has its own period per vehicle state; next_field() tells
+    the caller which one query to issue next. Time is passed in explicitly,
+    so the same plan runs on the system clock and on a VirtualClock.
+    """
+
+    def __init__(self, rates: Dict[str, Dict[str, float]] = None, state: str = PARKED):
+        self.rates = rates or DEFAULT_RATES
+        self.state = None
+        self._heap = []
+        self.polls: Dict[str, int] = {}
+        self.skipped = 0  # Deadlines dropped because the link could not keep up
+        self.set_state(state, 0.0)
+
+    def set_state(self, state: str, now: float) -> bool:
+        """Switches the polling plan; every signal of the new state is due immediately."""
+        if state == self.state:
+            return False
+        self.state = state
+        self._heap = [
+            (now, PRIORITY.get(field, len(PRIORITY)), field)
+            for field in self.rates[state]
+        ]
+        heapq.heapify(self._heap)
+        return True
+
+    def delay(self, now: float) -> float:
+        """Seconds until the next signal is due (0 if one is overdue)."""
+        if not self._heap:
+            return float("inf")
+        return max(self._heap[0][0] - now, 0.0)
+
+    def next_field(self, now: float) -> Optional[str]:
+        """Pops the most urgent due signal and books its next deadline (None if nothing is due)."""
+        if not self._heap or self._heap[0][0] > now:
+            return None
+
+        deadline, priority, field = self._heap[0]
+        period = self.rates[self.state][field]
+        next_deadline = deadline + period
+        if next_deadline <= now:
+            # Behind schedule: do not burst to catch up, resume from now
+            self.skipped += int((now - deadline) // period)
+            next_deadline = now + period
+        heapq.heapreplace(self._heap, (next_deadline, priority, field))
+
+        self.polls[field] = self.polls.get(field, 0) + 1
+        return field
+
+
+class SentinelScheduler:
+    """
+    Smart Guard wake planner for a parked car. Every wake is a single
+    AT RV read; the discharge slope fitted over the last few reads sets
+    the next wake to half the predicted time to the alert threshold.
+    A healthy battery gets long sleeps, a draining one converges on the
+    crossing (never closer than min_wake). A read off the fitted trend
+    (ignition, charger or a load switched on) restarts the history and
+    asks for a quick follow-up wake.
+    """
+    MIN_WAKE = 60.0
+    MAX_WAKE = 1800.0
+    HISTORY = 6
+    SAFETY = 0.5              # Fraction of the predicted time to threshold
+    MAX_DRAIN = 0.5 / 3600    # V/s assumed before a slope is known (lights left on)
+    CHANGE_V = 0.3            # Off-trend jump in volts
+
+    def __init__(self, threshold: float, min_wake: float = MIN_WAKE, max_wake: float = MAX_WAKE,
+                 history: int = HISTORY):
+        self.threshold = threshold
+        self.min_wake = min_wake
+        self.max_wake = max_wake
+        self._history = deque(maxlen=history)  # (monotonic time, volts)
+        self._follow_up = False
+        self.changes = 0
+
+    def reset(self):
+        self._history.clear()
+        self._follow_up = False
+
+    def slope(self) -> Optional[float]:
+        """Least-squares voltage slope in V/s over the history (None below two reads)."""
+        n = len(self._history)
+        if n < 2:
+            return None
+        mean_t = sum(t for t, _ in self._history) / n
+        mean_v = sum(v for _, v in self._history) / n
+        var = sum((t - mean_t) ** 2 for t, _ in self._history)
+        if var == 0:
+            return None
+        return sum((t - mean_t) * (v - mean_v) for t, v in self._history) / var
+
+    def predict(self, now: float) -> Optional[float]:
+        if not self._history:
+            return None
+        t, v = self._history[-1]
+        return v + (self.slope() or 0.0) * (now - t)
+
+    def changed(self, now: float, volts: float) -> bool:
+        """True if the read is off the fitted trend (worth a full OBD sample)."""
+        predicted = self.predict(now)
+        return predicted is not None and abs(volts - predicted) > self.CHANGE_V
+
+    def observe(self, now: float, volts: float) -> bool:
+        """Adds one read; returns True (and restarts the history) if it was off-trend."""
+        changed = self.changed(now, volts)
+        if changed:
+            self._history.clear()
+            self.changes += 1
+        self._history.append((now, volts))
+        self._follow_up = changed
+        return changed
+
+    def next_wake(self, volts: float) -> float:
+        """Seconds until the next AT RV read."""
+        headroom = volts - self.threshold
+        if headroom <= 0:
+            return self.max_wake  # Alert is out; only a recovery is left to see
+        if self._follow_up:
+            return self.min_wake
+
+        slope = self.slope()
+        if slope is None:
+            drain = self.MAX_DRAIN
+        elif slope < 0:
+            drain = -slope
+        else:
+            return self.max_wake  # Holding or recovering
+        return min(max(self.SAFETY * headroom / drain, self.min_wake), self.max_wake)
@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import zlib
+import struct
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+RECORD_HEADER = struct.Struct("<II")    # payload length, crc32
+MESSAGE_HEADER = struct.Struct("<BBH")  # qos, is_binary, topic length
+
+
+def pack_message(topic: str, payload, qos: int = 1) -> bytes:
+    """(topic, payload, qos) -> spool record. Payload may be str (JSON) or bytes (SDF1 frame)."""
+    is_binary = isinstance(payload, (bytes, bytearray))
+    body = bytes(payload) if is_binary else payload.encode("utf-8")
+    topic_raw = topic.encode("utf-8")
+    return MESSAGE_HEADER.pack(qos, is_binary, len(topic_raw)) + topic_raw + body
+
+
+def unpack_message(record: bytes) -> Tuple[str, object, int]:
+    qos, is_binary, topic_len = MESSAGE_HEADER.unpack_from(record)
+    start = MESSAGE_HEADER.size
+    topic = record[start:start + topic_len].decode("utf-8")
+    body = record[start + topic_len:]
+    return topic, (body if is_binary else body.decode("utf-8")), qos
+
+
+class _Lane:
+    """One priority lane: an ordered run of append-only segment files plus a read cursor."""
+    def __init__(self, name: str, directory: str):
+        self.name = name
+        self.directory = directory
+        self.segments: Dict[int, List[int]] = {}  # seq -> [size_bytes, record_count]
+        self.read_seq = 0
+        self.read_offset = 0
+        self.read_records = 0   # Records already consumed from read_seq
+        self.depth = 0
+        self.writer = None
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(size for size, _ in self.segments.values())
+
+    def path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:010d}.seg")
+
+    @property
+    def cursor_path(self) -> str:
+        return os.path.join(self.directory, "cursor.json")
+
+
+class SegmentQueue:
+    """
+    Disk-backed store-and-forward queue for the edge gateway.
+
+    - Append-only segment files per priority lane (first lane = highest priority).
+    - Records are length + CRC framed; a torn write after a crash or power
+      loss is detected and truncated on startup.
+    - The read cursor is persisted atomically (os.replace), so delivery is
+      at-least-once across reboots.
+    - Total size is bounded: the oldest segments of the lowest-priority lane
+      are evicted first.
+    """
+    SEGMENT_BYTES = 1 * 1024 * 1024
+    MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, directory: str, lanes=("alerts", "events", "telemetry"),
+                 max_bytes: int = MAX_BYTES, segment_bytes: int = SEGMENT_BYTES, sync: bool = False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.sync = sync
+
+        self.evicted_records = 0
+        self.last_drain_count = 0
+        self.last_drain_rate = 0.0
+
+        self.lanes: Dict[str, _Lane] = {}
+        for name in lanes:
+            lane = _Lane(name, os.path.join(directory, name))
+            os.makedirs(lane.directory, exist_ok=True)
+            self._recover(lane)
+            self.lanes[name] = lane
+
+    # --- Recovery ---
+
+    def _scan_segment(self, path: str) -> Tuple[int, int]:
+        """Returns (valid_bytes, record_count); truncates a torn tail in place."""
+        valid = count = 0
+        with open(path, "rb") as f:
+            data = f.read()
+        while valid + RECORD_HEADER.size <= len(data):
+            length, crc = RECORD_HEADER.unpack_from(data, valid)
+            start = valid + RECORD_HEADER.size
+            if start + length > len(data) or zlib.crc32(data[start:start + length]) != crc:
+                break
+            valid = start + length
+            count += 1
+        if valid != len(data):
+            logging.warning(f"⚠️ Spool: truncating torn segment {path} ({len(data) - valid} bytes)")
+            with open(path, "r+b") as f:
+                f.truncate(valid)
+        return valid, count
+
+    def _recover(self, lane: _Lane):
+        cursor = {"segment": 0, "offset": 0, "records": 0}
+        if os.path.exists(lane.cursor_path):
+            try:
+                with open(lane.cursor_path) as f:
+                    cursor = json.load(f)
+            except (OSError, ValueError):
+                logging.warning(f"⚠️ Spool: unreadable cursor in {lane.directory}, replaying lane.")
+
+        seqs = sorted(int(n[:-4]) for n in os.listdir(lane.directory) if n.endswith(".seg"))
+        for seq in seqs:
+            if seq < cursor["segment"]:
+                os.remove(lane.path(seq))  # Fully drained before the restart
+                continue
+            lane.segments[seq] = list(self._scan_segment(lane.path(seq)))
+
+        if cursor["segment"] in lane.segments:
+            lane.read_seq = cursor["segment"]
+            lane.read_offset = min(cursor["offset"], lane.segments[lane.read_seq][0])
+            lane.read_records = cursor["records"]
+        else:
+            lane.read_seq = min(lane.segments) if lane.segments else 0
+            lane.read_offset = lane.read_records = 0
+
+        lane.depth = sum(count for _, count in lane.segments.values()) - lane.read_records
+
+    # --- Write side ---
+
+    def _open_writer(self, lane: _Lane):
+        seq = max(lane.segments) if lane.segments else lane.read_seq
+        if seq in lane.segments and lane.segments[seq][0] >= self.segment_bytes:
+            seq += 1
+        lane.segments.setdefault(seq, [0, 0])
+        lane.writer = open(lane.path(seq), "ab")
+        return seq
+
+    def append(self, lane_name: str, record: bytes):
+        lane = self.lanes[lane_name]
+        seq = self._open_writer(lane) if lane.writer is None else max(lane.segments)
+
+        lane.writer.write(RECORD_HEADER.pack(len(record), zlib.crc32(record)) + record)
+        lane.writer.flush()
+        if self.sync:
+            os.fsync(lane.writer.fileno())
+
+        lane.segments[seq][0] += RECORD_HEADER.size + len(record)
+        lane.segments[seq][1] += 1
+        lane.depth += 1
+
+        if lane.segments[seq][0] >= self.segment_bytes:
+            os.fsync(lane.writer.fileno())
+            lane.writer.close()
+            lane.writer = None
+
+        self._enforce_bound()
+
+    def _enforce_bound(self):
+        while self.size_bytes > self.max_bytes:
+            if not self._evict_oldest():
+                break
+
+    def _evict_oldest(self) -> bool:
+        for lane in reversed(list(self.lanes.values())):
+            if not lane.segments:
+                continue
+            seq = min(lane.segments)
+            if seq == max(lane.segments) and lane.writer is not None:
+                continue  # Never evict the segment being written
+            _, count = lane.segments.pop(seq)
+            dropped = count - (lane.read_records if seq == lane.read_seq else 0)
+            os.remove(lane.path(seq))
+            lane.depth -= dropped
+            self.evicted_records += dropped
+            if seq == lane.read_seq:
+                lane.read_seq = min(lane.segments) if lane.segments else seq + 1
+                lane.read_offset = lane.read_records = 0
+                self._save_cursor(lane)
+            logging.warning(f"⚠️ Spool full: evicted {dropped} oldest '{lane.name}' records")
+            return True
+        return False
+
+    # --- Read side ---
+
+    def _save_cursor(self, lane: _Lane):
+        tmp = lane.cursor_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segment": lane.read_seq, "offset": lane.read_offset, "records": lane.read_records}, f)
+            if self.sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, lane.cursor_path)
+
+    def _read_batch(self, lane: _Lane, limit: int) -> List[Tuple[bytes, int, int, int]]:
+        """Reads up to `limit` records as (record, seq, offset_after, records_after) without consuming them."""
+        batch = []
+        seq, offset, records = lane.read_seq, lane.read_offset, lane.read_records
+        while len(batch) < limit and seq in lane.segments:
+            size = lane.segments[seq][0]
+            if offset >= size:
+                if seq == max(lane.segments):
+                    break
+                seq, offset, records = seq + 1, 0, 0
+                continue
+            with open(lane.path(seq), "rb") as f:
+                f.seek(offset)
+                data = f.read(size - offset)
+            pos = 0
+            while pos < len(data) and len(batch) < limit:
+                length, _ = RECORD_HEADER.unpack_from(data, pos)
+                start = pos + RECORD_HEADER.size
+                pos = start + length
+                records += 1
+                batch.append((data[start:pos], seq, offset + pos, records))
+            offset += pos
+        return batch
+
+    def _advance(self, lane: _Lane, seq: int, offset: int, records: int):
+        # Segments before the new read position are fully drained
+        for old in [s for s in lane.segments if s < seq]:
+            lane.segments.pop(old)
+            os.remove(lane.path(old))
+        lane.read_seq, lane.read_offset, lane.read_records = seq, offset, records
+
+    def drain(self, send: Callable[[bytes], bool], max_batch: int = 500, max_seconds: float = None) -> int:
+        """
+        Sends queued records (highest-priority lane first) until `send` fails,
+        `max_batch` records went out or `max_seconds` passed. Returns the
+        number of records sent.
+        """
+        started = time.monotonic()
+        sent = 0
+        for lane in self.lanes.values():
+            if sent >= max_batch:
+                break
+            delivered = None
+            failed = False
+            for record, seq, offset, records in self._read_batch(lane, max_batch - sent):
+                if max_seconds is not None and time.monotonic() - started >= max_seconds:
+                    failed = True  # Time budget used up: the rest waits for the next slice
+                    break
+                if not send(record):
+                    failed = True
+                    break
+                delivered = (seq, offset, records)
+                sent += 1
+                lane.depth -= 1
+            if delivered:
+                self._advance(lane, *delivered)
+                self._save_cursor(lane)
+            if failed:
+                break
+
+        elapsed = time.monotonic() - started
+        if sent:
+            self.last_drain_count = sent
+            self.last_drain_rate = sent / elapsed if elapsed > 0 else float(sent)
+        return sent
+
+    # --- Sizing metrics ---
+
+    @property
+    def depth(self) -> int:
+        return sum(lane.depth for lane in self.lanes.values())
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(lane.size_bytes for lane in self.lanes.values())
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "size_bytes": self.size_bytes,
+            "lanes": {name: lane.depth for name, lane in self.lanes.items()},
+            "evicted_records": self.evicted_records,
+            "last_drain_count": self.last_drain_count,
+            "last_drain_rate": round(self.last_drain_rate, 1),
+        }
+
+    def close(self):
+        for lane in self.lanes.values():
+            if lane.writer is not None:
+                lane.writer.close()
+                lane.writer = None
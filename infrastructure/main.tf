@@ -126,6 +126,55 @@ resource "aws_iot_topic_rule" "obd_telemetry_rule" {
   }
 }
 
+# Binary SDF1 telemetry frames (batched edge uploads) are stored as-is;
+# the silver processor detects them by their magic bytes.
+resource "aws_iot_topic_rule" "obd_frames_rule" {
+  name        = "SmartDriveOBDFramesIngest"
+  description = "Saving batched binary OBD-II frames to the Bronze layer"
+  enabled     = true
+  sql         = "SELECT * FROM 'vehicle/+/frames'"
+  sql_version = "2016-03-23"
+
+  s3 {
+    role_arn    = aws_iam_role.iot_ingest_role.arn
+    bucket_name = aws_s3_bucket.bronze.id
+    key         = "raw/$${topic(2)}/$${timestamp()}.sdf"
+  }
+
+  error_action {
+    sqs {
+      role_arn    = aws_iam_role.iot_ingest_role.arn
+      queue_url   = aws_sqs_queue.alert_dlq.url
+      use_base64  = true
+    }
+  }
+}
+
+# On-device crank analysis results (plateau V_min) - kept out of raw/, so the
+# telemetry ETL does not read them as samples; the processor turns them into
+# crank_events rows (see bronze_trigger below).
+resource "aws_iot_topic_rule" "obd_events_rule" {
+  name        = "SmartDriveCrankEventsIngest"
+  description = "Saving edge crank-event records to the Bronze layer"
+  enabled     = true
+  sql         = "SELECT *, topic(2) as vin FROM 'vehicle/+/events'"
+  sql_version = "2016-03-23"
+
+  s3 {
+    role_arn    = aws_iam_role.iot_ingest_role.arn
+    bucket_name = aws_s3_bucket.bronze.id
+    key         = "events/$${topic(2)}/$${timestamp()}.json"
+  }
+
+  error_action {
+    sqs {
+      role_arn    = aws_iam_role.iot_ingest_role.arn
+      queue_url   = aws_sqs_queue.alert_dlq.url
+      use_base64  = false
+    }
+  }
+}
+
 # --- 6. SILVER PROCESSING LAMBDA ---
 resource "aws_lambda_function" "silver_processor" {
   filename         = data.archive_file.processor_zip.output_path
@@ -138,7 +187,7 @@ resource "aws_lambda_function" "silver_processor" {
   
   runtime          = "python3.9"
   timeout          = 60       
-  memory_size      = 512      
+  memory_size      = 1024     # CPU scales with memory: halves the cold-start import time
   
   # AWS SDK for Pandas Layer (Frankfurt / Py3.9)
   layers = [
@@ -152,23 +201,64 @@ resource "aws_lambda_function" "silver_processor" {
   }
 }
 
-# --- 7. S3 EVENT TRIGGER ---
-resource "aws_lambda_permission" "allow_s3_bronze" {
-  statement_id  = "AllowExecutionFromS3"
-  action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.silver_processor.function_name
-  principal     = "s3.amazonaws.com"
-  source_arn    = aws_s3_bucket.bronze.arn
+# --- 7. S3 EVENT TRIGGER (SQS micro-batch) ---
+# Bronze objects are queued and handed to the processor in batches, so one
+# invocation writes one Parquet file per vin/date partition instead of one per message.
+resource "aws_sqs_queue" "bronze_events" {
+  name                       = "smartdrive-bronze-events"
+  visibility_timeout_seconds = 360 # 6x the processor timeout
+  message_retention_seconds  = 345600
+
+  # Partial batch failures: a message that keeps failing (missing/unreadable object) ends up here
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.bronze_events_dlq.arn
+    maxReceiveCount     = 5
+  })
+}
+
+resource "aws_sqs_queue" "bronze_events_dlq" {
+  name                      = "smartdrive-bronze-events-dlq"
+  message_retention_seconds = 1209600 # 14 days
+}
+
+resource "aws_sqs_queue_policy" "bronze_events_policy" {
+  queue_url = aws_sqs_queue.bronze_events.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect    = "Allow"
+      Principal = { Service = "s3.amazonaws.com" }
+      Action    = "sqs:SendMessage"
+      Resource  = aws_sqs_queue.bronze_events.arn
+      Condition = { ArnEquals = { "aws:SourceArn" = aws_s3_bucket.bronze.arn } }
+    }]
+  })
 }
 
 resource "aws_s3_bucket_notification" "bronze_trigger" {
   bucket = aws_s3_bucket.bronze.id
 
-  lambda_function {
-    lambda_function_arn = aws_lambda_function.silver_processor.arn
-    events              = ["s3:ObjectCreated:*"]
+  queue {
+    queue_arn     = aws_sqs_queue.bronze_events.arn
+    events        = ["s3:ObjectCreated:*"]
+    filter_prefix = "raw/"
+  }
+
+  # Edge crank-event records: no raw samples are uploaded while cranking
+  queue {
+    queue_arn     = aws_sqs_queue.bronze_events.arn
+    events        = ["s3:ObjectCreated:*"]
+    filter_prefix = "events/"
   }
-  depends_on = [aws_lambda_permission.allow_s3_bronze]
+  depends_on = [aws_sqs_queue_policy.bronze_events_policy]
+}
+
+resource "aws_lambda_event_source_mapping" "bronze_batches" {
+  event_source_arn                   = aws_sqs_queue.bronze_events.arn
+  function_name                      = aws_lambda_function.silver_processor.arn
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 30
+  function_response_types            = ["ReportBatchItemFailures"] # index.py returns batchItemFailures
 }
 
 # --- 8. DATA SOURCES FOR ACCOUNT ID AND REGION ---
@@ -189,7 +279,13 @@ resource "aws_iot_policy" "smartdrive_policy" {
       {
         Action   = ["iot:Publish"]
         Effect   = "Allow"
-        Resource = "arn:aws:iot:${data.aws_region.current.id}:${data.aws_caller_identity.current.account_id}:topic/vehicle/$${iot:Connection.Thing.ThingName}/telemetry"
+        Resource = [
+          "arn:aws:iot:${data.aws_region.current.id}:${data.aws_caller_identity.current.account_id}:topic/vehicle/$${iot:Connection.Thing.ThingName}/telemetry",
+          "arn:aws:iot:${data.aws_region.current.id}:${data.aws_caller_identity.current.account_id}:topic/vehicle/$${iot:Connection.Thing.ThingName}/frames",
+          "arn:aws:iot:${data.aws_region.current.id}:${data.aws_caller_identity.current.account_id}:topic/vehicle/$${iot:Connection.Thing.ThingName}/events",
+          "arn:aws:iot:${data.aws_region.current.id}:${data.aws_caller_identity.current.account_id}:topic/vehicle/$${iot:Connection.Thing.ThingName}/metrics",
+          "arn:aws:iot:${data.aws_region.current.id}:${data.aws_caller_identity.current.account_id}:topic/vehicle/$${iot:Connection.Thing.ThingName}/alerts"
+        ]
       }
     ]
   })
@@ -225,11 +321,21 @@ resource "aws_iam_role_policy" "lambda_policy" {
         Effect   = "Allow"
         Resource = "${aws_s3_bucket.bronze.arn}/*"
       },
-      { # Write access to the Silver layer
-        Action   = ["s3:PutObject"]
+      { # Write access to the Silver layer (Get/Delete: partition compaction)
+        Action   = ["s3:PutObject", "s3:GetObject", "s3:DeleteObject"]
         Effect   = "Allow"
         Resource = "${aws_s3_bucket.silver.arn}/*"
       },
+      {
+        Action   = ["s3:ListBucket"]
+        Effect   = "Allow"
+        Resource = aws_s3_bucket.silver.arn
+      },
+      { # Batched Bronze notifications
+        Action   = ["sqs:ReceiveMessage", "sqs:DeleteMessage", "sqs:GetQueueAttributes"]
+        Effect   = "Allow"
+        Resource = aws_sqs_queue.bronze_events.arn
+      },
       { # CloudWatch logging for observability
         Action   = ["logs:CreateLogGroup", "logs:CreateLogStream", "logs:PutLogEvents"]
         Effect   = "Allow"
@@ -402,3 +508,47 @@ resource "aws_s3_bucket_notification" "silver_trigger" {
   
   depends_on = [aws_lambda_permission.allow_s3_silver]
 }
+
+# --- 21. SILVER PARTITION COMPACTION (daily) ---
+resource "aws_lambda_function" "silver_compactor" {
+  filename         = data.archive_file.processor_zip.output_path
+  function_name    = "smartdrive-silver-compactor"
+  role             = aws_iam_role.lambda_exec_role.arn
+  handler          = "compaction.lambda_handler"
+  source_code_hash = data.archive_file.processor_zip.output_base64sha256
+
+  runtime     = "python3.9"
+  timeout     = 900
+  memory_size = 1024
+
+  # The partition journal assumes a single compactor at a time
+  reserved_concurrent_executions = 1
+
+  layers = [
+    "arn:aws:lambda:eu-central-1:336392948345:layer:AWSSDKPandas-Python39:12"
+  ]
+
+  environment {
+    variables = {
+      SILVER_BUCKET_NAME = aws_s3_bucket.silver.bucket
+    }
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "silver_compaction_schedule" {
+  name                = "smartdrive-silver-compaction"
+  schedule_expression = "cron(30 3 * * ? *)"
+}
+
+resource "aws_cloudwatch_event_target" "silver_compaction" {
+  rule = aws_cloudwatch_event_rule.silver_compaction_schedule.name
+  arn  = aws_lambda_function.silver_compactor.arn
+}
+
+resource "aws_lambda_permission" "allow_compaction_schedule" {
+  statement_id  = "AllowExecutionFromEventBridge"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.silver_compactor.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.silver_compaction_schedule.arn
+}
@@ -0,0 +1,155 @@
+import io
+import json
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+from frame_codec import decode_frame
+from segmentation import CRANK_EVENT_SCHEMA
+
+# Bronze JSON: v1.3 (pids lista) és a régi lapos formátum egy közös, rögzített sémában.
+# A sémán kívüli mezőket (lat, lon, ...) a parser eldobja, Python objektum nélkül.
+PID_TYPE = pa.struct([
+    ('pid_code', pa.string()),
+    ('value', pa.float64()),
+    ('timestamp', pa.timestamp('us')),
+])
+BRONZE_SCHEMA = pa.schema([
+    ('vin', pa.string()),
+    ('timestamp', pa.timestamp('us')),  # ISO 8601 -> natív időbélyeg (eltolással: UTC)
+    ('pids', pa.list_(PID_TYPE)),
+    ('pid_code', pa.string()),          # Lapos, hosszú sor
+    ('value', pa.float64()),
+    ('rpm', pa.float64()),              # Lapos, széles sor (v1.3 előtt)
+    ('voltage', pa.float64()),
+])
+
+# A Silver nyers tábla (hosszú formátum), amit az ETLService kap
+LONG_SCHEMA = pa.schema([
+    ('pid_code', pa.string()),
+    ('value', pa.float64()),
+    ('timestamp', pa.timestamp('us')),
+    ('vin', pa.string()),
+])
+
+LEGACY_PIDS = {'rpm': 'RPM', 'voltage': 'BATTERY_VOLTAGE'}
+
+# Edge crank-event rekord (vehicle/+/events -> Bronze events/): a helyben számolt plateau V_min
+EDGE_EVENT_SCHEMA = pa.schema([
+    ('vin', pa.string()),
+    ('start_time', pa.timestamp('us')),
+    ('plateau_voltage', pa.float64()),
+    ('inrush_min', pa.float64()),
+    ('sample_count', pa.int64()),
+])
+
+def _constant(value: str, n: int) -> pa.Array:
+    return pa.nulls(n, pa.string()).fill_null(value)
+
+def _long(pid_code, value, timestamp, vin) -> pa.Table:
+    return pa.Table.from_arrays([pid_code, value, timestamp, vin], schema=LONG_SCHEMA)
+
+def _read_records(blob: bytes) -> pa.Table:
+    if blob.lstrip()[:1] == b'[':
+        # Régi JSON tömb: ritka, kicsi fájlok. NDJSON-ná alakítva ugyanaz a parser
+        # olvassa (ISO időbélyeg szövegek -> timestamp, mint a többi formátumnál)
+        blob = "\n".join(json.dumps(record) for record in json.loads(blob)).encode('utf-8')
+        if not blob:
+            return BRONZE_SCHEMA.empty_table()
+
+    options = pa_json.ParseOptions(explicit_schema=BRONZE_SCHEMA, unexpected_field_behavior='ignore')
+    try:
+        # Egy objektum vagy NDJSON köteg (soronként egy üzenet), párhuzamos blokkokban
+        return pa_json.read_json(io.BytesIO(blob), parse_options=options)
+    except pa.ArrowInvalid:
+        # Többsoros (pretty-printed) objektum: soronkénti blokkhatár nélkül
+        options.newlines_in_values = True
+        return pa_json.read_json(io.BytesIO(blob), parse_options=options)
+
+def read_bronze_json(blob: bytes) -> pa.Table:
+    """
+    Bronze JSON (egy objektum vagy NDJSON) -> hosszú (pid_code, value, timestamp, vin)
+    Arrow tábla. A pids lista kilapítása és az időbélyegek oszloponként történnek.
+    """
+    raw = _read_records(blob).combine_chunks()
+    parts = []
+
+    # 1. v1.3: pids lista -> sorok; a vin és a hiányzó időbélyeg a szülő üzenetből
+    pids = raw.column('pids').chunk(0) if raw.num_rows else pa.array([], pa.list_(PID_TYPE))
+    items = pc.list_flatten(pids)
+    if len(items):
+        parent = pc.list_parent_indices(pids)
+        timestamp = pc.coalesce(items.field('timestamp'), raw.column('timestamp').take(parent))
+        parts.append(_long(items.field('pid_code'), items.field('value'), timestamp,
+                           raw.column('vin').take(parent)))
+
+    # 2. Lapos sorok (nincs pids): pid_code/value, vagy rpm/voltage oszlopok
+    flat = raw.filter(pc.is_null(raw.column('pids'))) if raw.num_rows else raw
+    if flat.num_rows:
+        has_code = pc.is_valid(flat.column('pid_code'))
+        long_rows = flat.filter(has_code)
+        if long_rows.num_rows:
+            parts.append(_long(long_rows.column('pid_code'), long_rows.column('value'),
+                               long_rows.column('timestamp'), long_rows.column('vin')))
+        wide = flat.filter(pc.invert(has_code))
+        for field, pid_code in LEGACY_PIDS.items():
+            rows = wide.filter(pc.is_valid(wide.column(field)))
+            if rows.num_rows:
+                parts.append(_long(_constant(pid_code, rows.num_rows), rows.column(field),
+                                   rows.column('timestamp'), rows.column('vin')))
+
+    if not parts:
+        return LONG_SCHEMA.empty_table()
+    return pa.concat_tables(parts)
+
+def read_frame(blob: bytes) -> pa.Table:
+    """SDF1 frame -> ugyanaz a hosszú Arrow tábla, mint a JSON útvonalon."""
+    vin, timestamps, columns = decode_frame(blob)
+    # Az időbélyegek a JSON-nal azonos (naiv) falióra-időt kódolják
+    ts = pc.multiply(pa.array(timestamps, pa.int64()), 1000).cast(pa.timestamp('us'))
+    parts = []
+    for pid_code, values in columns.items():
+        value = pa.array(values, pa.float64())  # None: hiányzó minta
+        part = _long(_constant(pid_code, len(value)), value, ts, _constant(vin, len(value)))
+        parts.append(part.filter(pc.is_valid(value)))
+    table = pa.concat_tables(parts) if parts else LONG_SCHEMA.empty_table()
+    return table.take(pc.sort_indices(table, sort_keys=[('timestamp', 'ascending')]))
+
+def read_edge_crank_events(blob: bytes) -> pa.Table:
+    """
+    Edge crank-event rekord(ok) -> crank-events tábla sorai. A plateau V_min
+    a refined_vmin, az inrush minimum a vmin_raw; a nyers ablak nem jön fel,
+    így end_time / vmin_time üres. Az azonosító a szegmentálóéval egyező
+    formátumú (VIN + kezdés ms): újrafeldolgozáskor ugyanaz.
+    """
+    if blob.lstrip()[:1] == b'[':
+        blob = "\n".join(json.dumps(record) for record in json.loads(blob)).encode('utf-8')
+    options = pa_json.ParseOptions(explicit_schema=EDGE_EVENT_SCHEMA, unexpected_field_behavior='ignore')
+    raw = pa_json.read_json(io.BytesIO(blob), parse_options=options) if blob.strip() else EDGE_EVENT_SCHEMA.empty_table()
+    raw = raw.filter(pc.and_(pc.is_valid(raw.column('vin')), pc.is_valid(raw.column('start_time'))))
+    if not raw.num_rows:
+        return CRANK_EVENT_SCHEMA.empty_table()
+
+    n = raw.num_rows
+    start = raw.column('start_time')
+    start_ms = pc.divide(start.cast(pa.int64()), 1000).cast(pa.string())
+    return pa.Table.from_arrays([
+        raw.column('vin'),
+        pc.binary_join_element_wise(raw.column('vin'), start_ms, '-'),
+        start,
+        pa.nulls(n, pa.timestamp('us')),
+        pa.nulls(n, pa.timestamp('us')),
+        raw.column('inrush_min'),
+        raw.column('plateau_voltage'),
+        raw.column('sample_count'),
+        _constant('edge', n),
+        pc.strftime(start, format='%Y-%m-%d'),
+    ], schema=CRANK_EVENT_SCHEMA)
+
+def to_dataframe(table: pa.Table):
+    """
+    Arrow -> pandas az ETLService-nek: oszloponkénti konverzió, a szövegek
+    Arrow-alapú string oszlopok maradnak (nincs mintánkénti Python str objektum).
+    """
+    import pandas as pd  # Az ETL útvonal Arrow-on marad, a pandas csak itt kell
+
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
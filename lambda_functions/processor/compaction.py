@@ -0,0 +1,142 @@
+import io
+import os
+import json
+import math
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config import ProcessorConfig
+from crank_index import CrankEventIndex, partition_of
+from rollups import merge_rollups, rollup_prefix
+from infrastructure.object_store import IObjectStore, StoredObject, is_data_file
+from repository import object_store
+
+JOURNAL = "_compaction.json"
+SORT_KEYS = ("timestamp", "start_time", "bucket_start")  # Nyers telemetria / crank_events / rollupok
+
+def _concat(tables: List[pa.Table]) -> pa.Table:
+    # Régebbi fájlokban eltérhet a típus (int vs double), vagy hiányozhat oszlop
+    try:
+        return pa.concat_tables(tables, promote_options="permissive")
+    except TypeError:
+        return pa.concat_tables(tables, promote=True)  # pyarrow < 14
+
+class PartitionCompactor:
+    """
+    A Silver vin=/date= partícióiban összevonja az apró Parquet fájlokat
+    méretre célzott, időrendbe rendezett fájlokká.
+
+    Atomikusság: a partícióban egy _compaction.json napló rögzíti a be- és
+    kimeneti fájlokat. 'writing' állapotban a kimenetek még nem érvényesek
+    (megszakadáskor törlődnek), 'committed' után a bemenetek törölhetők
+    (megszakadáskor a törlés folytatódik). Így adat sem veszhet el, sem
+    maradhat tartósan duplán. Egyszerre egy compactor futhat.
+    """
+
+    def __init__(self, store: IObjectStore, config: ProcessorConfig):
+        self.store = store
+        self.config = config
+        self.rewritten: List[str] = []  # Átírt partíciók (a crank index ezeket újraépíti)
+
+    def partitions(self, prefix: str) -> Dict[str, List[StoredObject]]:
+        """Partíció útvonal -> benne lévő objektumok (adatfájlok és napló)."""
+        grouped = defaultdict(list)
+        for obj in self.store.list(prefix):
+            partition, _, name = obj.key.rpartition('/')
+            if is_data_file(obj.key) or name == JOURNAL:
+                grouped[partition].append(obj)
+        return dict(grouped)
+
+    def compact(self, prefix: str) -> dict:
+        summary = {"partitions": 0, "files_in": 0, "files_out": 0}
+        for partition, objects in sorted(self.partitions(prefix).items()):
+            files_in, files_out = self.compact_partition(partition, objects)
+            if files_in:
+                summary["partitions"] += 1
+                summary["files_in"] += files_in
+                summary["files_out"] += files_out
+        print(f"Compaction {prefix}: {summary['files_in']} -> {summary['files_out']} files "
+              f"in {summary['partitions']} partitions")
+        return summary
+
+    def recover(self, partition: str):
+        """Befejezi vagy visszagörgeti egy megszakadt futás naplóját."""
+        journal_key = f"{partition}/{JOURNAL}"
+        journal = json.loads(self.store.get(journal_key))
+        if journal["state"] == "committed":
+            self.store.delete(journal["inputs"])   # Előre: a kimenetek már teljesek
+        else:
+            self.store.delete(journal["outputs"])  # Vissza: a bemenetek érintetlenek
+        self.store.delete([journal_key])
+        print(f"Compaction recovered ({journal['state']}): {partition}")
+
+    def compact_partition(self, partition: str, objects: List[StoredObject] = None) -> Tuple[int, int]:
+        if objects is None:
+            objects = self.partitions(f"{partition}/").get(partition, [])
+
+        journal_key = f"{partition}/{JOURNAL}"
+        if any(obj.key == journal_key for obj in objects):
+            self.recover(partition)
+            objects = self.partitions(f"{partition}/").get(partition, [])
+
+        small = [obj for obj in objects
+                 if is_data_file(obj.key) and obj.size < self.config.compaction_small_file_bytes]
+        if len(small) < self.config.compaction_min_files:
+            return 0, 0
+
+        table = _concat([pq.read_table(io.BytesIO(self.store.get(obj.key))) for obj in small])
+        if 'bucket_start' in table.column_names:
+            # Rollup: az azonos (pid, rekesz) részaggregátumok egy sorrá (késő adat)
+            table = merge_rollups(table, self.config)
+        sort_key = next((k for k in SORT_KEYS if k in table.column_names), None)
+        if sort_key:
+            table = table.sort_by([(sort_key, "ascending")])
+
+        # Méretbecslés a bemenetekből (összevonva jobban tömörít, így inkább kisebb lesz)
+        n_out = max(1, math.ceil(sum(obj.size for obj in small) / self.config.compaction_target_bytes))
+        rows_per_file = max(1, math.ceil(table.num_rows / n_out))
+        n_out = max(1, math.ceil(table.num_rows / rows_per_file))  # Nincs üres kimenet
+        run_id = uuid.uuid4().hex[:12]
+        inputs = [obj.key for obj in small]
+        outputs = [f"{partition}/compacted-{run_id}-{i:04d}.parquet" for i in range(n_out)]
+
+        self._journal(journal_key, run_id, "writing", inputs, outputs)
+        for i, key in enumerate(outputs):
+            buffer = io.BytesIO()
+            pq.write_table(table.slice(i * rows_per_file, rows_per_file), buffer,
+                           compression=self.config.parquet_compression)
+            self.store.put(key, buffer.getvalue())
+        self._journal(journal_key, run_id, "committed", inputs, outputs)
+
+        self.store.delete(inputs)
+        self.store.delete([journal_key])
+        self.rewritten.append(partition)
+        return len(inputs), len(outputs)
+
+    def _journal(self, key: str, run_id: str, state: str, inputs: List[str], outputs: List[str]):
+        record = {"id": run_id, "state": state, "inputs": inputs, "outputs": outputs}
+        self.store.put(key, json.dumps(record).encode('utf-8'))
+
+def lambda_handler(event, context):
+    """
+    Ütemezett futás (EventBridge): a nyers és a crank_events tábla partíciói,
+    utána az átírt partíciók crank indexe. {"rebuild_index": true, "vin": ...}
+    eseménnyel az index teljes újraépítése (ugyanaz az egyetlen példány fut).
+    """
+    config = ProcessorConfig()
+    store = object_store(os.environ['SILVER_BUCKET_NAME'])
+    index = CrankEventIndex(store, config)
+    if event.get('rebuild_index'):
+        return {"index_partitions": index.rebuild(event.get('vin'))}
+
+    compactor = PartitionCompactor(store, config)
+    prefixes = event.get('prefixes') or [config.silver_prefix, config.crank_events_prefix] + \
+        [rollup_prefix(config, name) for name in config.rollup_resolutions]
+    summary = {prefix: compactor.compact(f"{prefix}/") for prefix in prefixes}
+    # A régi fájlkulcsok eltűntek: a manifest a tényleges fájlokból, a delták összevonva
+    indexed = (f"{config.silver_prefix}/", f"{config.crank_events_prefix}/")
+    for vin, date in sorted({partition_of(p) for p in compactor.rewritten if p.startswith(indexed)}):
+        index.rebuild_partition(vin, date)
+    return summary
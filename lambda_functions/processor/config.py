@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from typing import Tuple
+from domain import plateau
 
 @dataclass
 class ProcessorConfig:
@@ -7,7 +9,32 @@ class ProcessorConfig:
     convexity_threshold: float = 1e-6
     max_voltage_drop_diff: float = 0.5
     time_unit_divisor: int = 1_000_000_000  # Nanosec -> Sec
+
+    # Cranking plateau (v1.4) - ugyanazok az alapértékek, mint az edge oldalon
+    plateau_blanking_s: float = plateau.BLANKING_S
+    plateau_window_s: float = plateau.PLATEAU_WINDOW_S
+    plateau_v_floor: float = plateau.V_FLOOR
+    plateau_v_ceiling: float = plateau.V_CEILING
+
+    # Indítás-szegmentálás a Silver ETL-ben (egy fájl, több VIN / több indítás)
+    crank_rpm_limit: float = 600.0        # 0 < RPM < limit: önindító forgat (edge CRANKING_RPM_LIMIT)
+    crank_drop_v: float = 1.5             # Ennyivel a nyugalmi szint alatt: feszültségletörés
+    crank_v_max: float = 11.0             # ...és e szint alatt (motorleállás 14.2 -> 12.6 V nem indítás)
+    crank_baseline_samples: int = 10      # Nyugalmi szint = az előző N minta maximuma
+    crank_max_gap_s: float = 2.0          # Nagyobb szünet két indítási minta között: új esemény
     
     # Storage beállítások
     parquet_compression: str = "snappy"
     silver_prefix: str = "processed_telemetry"
+    crank_events_prefix: str = "crank_events"
+    edge_events_prefix: str = "events"        # Bronze: edge crank-event rekordok (vehicle/+/events)
+    crank_index_prefix: str = "crank_index"   # VIN/dátum manifest: fájlok időtartománya + indítások
+    rollup_prefix: str = "rollups"            # rollups_1s / rollups_1m / rollups_1h
+    rollup_resolutions: Tuple[str, ...] = ("1s", "1m", "1h")
+    rollup_hist_step_v: float = 0.01          # Feszültség-hisztogram felbontása (percentilisek)
+    fetch_concurrency: int = 16           # Párhuzamos Bronze letöltések egy kötegen belül (szálkészlet)
+
+    # Partíció-tömörítés (compaction.py): sok apró Parquet -> kevés, méretre célzott fájl
+    compaction_target_bytes: int = 128 * 1024 * 1024
+    compaction_small_file_bytes: int = 32 * 1024 * 1024   # Ennél kisebb fájlok az összevonás jelöltjei
+    compaction_min_files: int = 2
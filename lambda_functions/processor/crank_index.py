@@ -0,0 +1,198 @@
+import io
+import json
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from config import ProcessorConfig
+from infrastructure.object_store import IObjectStore, is_data_file
+
+MANIFEST = "manifest.json"
+DELTA_PREFIX = "delta-"
+# A crank-events tábla oszlopai, amik az indexbe kerülnek (vin/date a partícióból)
+EVENT_FIELDS = ("event_id", "start_time", "end_time", "vmin_time",
+                "vmin_raw", "refined_vmin", "sample_count", "trigger")
+
+def partition_of(path: str) -> Tuple[str, str]:
+    """'<prefix>/vin=X/date=Y[/fájl]' -> (X, Y)."""
+    fields = dict(part.split('=', 1) for part in path.split('/') if '=' in part)
+    return fields['vin'], fields['date']
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat(timespec='microseconds') if value is not None else None
+
+def _event_records(events: pa.Table) -> List[dict]:
+    fields = [f for f in EVENT_FIELDS if f in events.column_names]
+    records = events.select(fields).to_pylist()
+    for record in records:
+        for field in ("start_time", "end_time", "vmin_time"):
+            if field in record:
+                record[field] = _iso(record[field])
+    return records
+
+def _file_entry(key: str, timestamps: Optional[pa.ChunkedArray], rows: int, event_starts: List[str]) -> dict:
+    """Egy nyers telemetria fájl: időtartomány + a bele eső indítások száma."""
+    lo = hi = None
+    if timestamps is not None and rows:
+        bounds = pc.min_max(timestamps).as_py()
+        lo, hi = _iso(bounds['min']), _iso(bounds['max'])
+    # Azonos formátumú (naiv, mikroszekundumos) ISO szövegek: lexikografikusan is időrendben
+    count = sum(1 for start in event_starts if lo is not None and lo <= start <= hi)
+    return {"key": key, "rows": rows, "min_timestamp": lo, "max_timestamp": hi, "crank_events": count}
+
+class CrankEventIndex:
+    """
+    Könnyű index a Silver réteg fölött, VIN/dátum partíciónként:
+    <crank_index_prefix>/vin=X/date=Y/ alatt JSON manifest, ami listázza a
+    nyers telemetria fájlokat (min/max időbélyeg, sorok, indítások száma)
+    és tartalmazza az indítási eseményeket is. Egy VIN indításaihoz így
+    néhány kis JSON olvasása elég, a teljes telemetria helyett.
+
+    Írás: minden Silver kötegírás partíciónként egy új delta-<uuid>.json
+    fájlt tesz le (csak hozzáfűzés, párhuzamos Lambdák sem írják felül
+    egymást). Olvasáskor a manifest.json és a deltái fájlkulcs, illetve
+    event_id szerint összefésülődnek. A rebuild_partition() a tényleges
+    Parquet fájlokból újraépíti a manifestet és összevonja a deltákat
+    (compaction után, vagy teljes újraépítéskor).
+    """
+
+    def __init__(self, store: IObjectStore, config: ProcessorConfig):
+        self.store = store
+        self.config = config
+
+    def _prefix(self, vin: str, date: Optional[str] = None) -> str:
+        prefix = f"{self.config.crank_index_prefix}/vin={vin}/"
+        return f"{prefix}date={date}/" if date else prefix
+
+    def _put(self, key: str, manifest: dict):
+        self.store.put(key, json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+
+    # --- Írás ---
+
+    def record_batch(self, raw_files: Iterable[Tuple[str, str, str, pa.Table]], crank_events: pa.Table) -> List[str]:
+        """
+        Egy ETL köteg kiírt nyers fájljai (save_table_to_parquet kimenete) és
+        crank eseményei -> partíciónként egy delta. Visszaadja a delta kulcsokat.
+        """
+        events = defaultdict(list)
+        if crank_events.num_rows:
+            for record, vin, date in zip(_event_records(crank_events),
+                                         crank_events.column('vin').to_pylist(),
+                                         crank_events.column('date').to_pylist()):
+                events[(vin, date)].append(record)
+
+        files = defaultdict(list)
+        for vin, date, key, part in raw_files:
+            starts = [e["start_time"] for e in events.get((vin, date), [])]
+            timestamps = part.column('timestamp') if 'timestamp' in part.column_names else None
+            files[(vin, date)].append(_file_entry(key, timestamps, part.num_rows, starts))
+
+        written = []
+        for vin, date in sorted(set(files) | set(events)):
+            key = f"{self._prefix(vin, date)}{DELTA_PREFIX}{uuid.uuid4().hex}.json"
+            self._put(key, {"vin": vin, "date": date,
+                            "files": files.get((vin, date), []),
+                            "crank_events": events.get((vin, date), [])})
+            written.append(key)
+        return written
+
+    # --- Olvasás ---
+
+    @staticmethod
+    def _merge(vin: str, date: str, documents: Iterable[dict]) -> dict:
+        files, events = {}, {}
+        for document in documents:
+            files.update((f["key"], f) for f in document.get("files", []))
+            events.update((e["event_id"], e) for e in document.get("crank_events", []))
+        return {
+            "vin": vin,
+            "date": date,
+            "files": sorted(files.values(), key=lambda f: (f["min_timestamp"] or "", f["key"])),
+            "crank_events": sorted(events.values(), key=lambda e: e["start_time"] or ""),
+        }
+
+    def _document_keys(self, vin: str, date: Optional[str] = None) -> Dict[str, List[str]]:
+        grouped = defaultdict(list)
+        for obj in self.store.list(self._prefix(vin, date)):
+            name = obj.key.rsplit('/', 1)[-1]
+            if name == MANIFEST or (name.startswith(DELTA_PREFIX) and name.endswith('.json')):
+                grouped[partition_of(obj.key)[1]].append(obj.key)
+        return grouped
+
+    def _load_day(self, vin: str, day: str, keys: List[str]) -> dict:
+        return self._merge(vin, day, (json.loads(self.store.get(key)) for key in sorted(keys)))
+
+    def load(self, vin: str, date: Optional[str] = None) -> Dict[str, dict]:
+        """Dátum -> összefésült manifest egy VIN-re (egy listázás + a kis JSON-ok)."""
+        return {day: self._load_day(vin, day, keys) for day, keys in sorted(self._document_keys(vin, date).items())}
+
+    def crank_events(self, vin: str, date: Optional[str] = None) -> List[dict]:
+        """Egy VIN összes indítása (időrendben), a telemetria letöltése nélkül."""
+        return [dict(event, vin=vin, date=day)
+                for day, manifest in self.load(vin, date).items()
+                for event in manifest["crank_events"]]
+
+    def files_between(self, vin: str, start: datetime, end: datetime) -> List[str]:
+        """Azok a nyers fájlok, amelyek időtartománya metszi a [start, end] ablakot."""
+        lo, hi = _iso(start), _iso(end)
+        first_day, last_day = start.date().isoformat(), end.date().isoformat()
+        # Csak az ablakot érintő napok manifestjei töltődnek le
+        return [f["key"]
+                for day, keys in sorted(self._document_keys(vin).items()) if first_day <= day <= last_day
+                for f in self._load_day(vin, day, keys)["files"]
+                if f["min_timestamp"] is not None and f["min_timestamp"] <= hi and f["max_timestamp"] >= lo]
+
+    # --- Újraépítés ---
+
+    def _read(self, key: str) -> pa.Table:
+        return pq.read_table(io.BytesIO(self.store.get(key)))
+
+    def _scan_file(self, key: str, starts: List[str]) -> dict:
+        # Nyers fájlból csak az időbélyeg oszlop dekódolódik
+        parquet = pq.ParquetFile(io.BytesIO(self.store.get(key)))
+        if 'timestamp' not in parquet.schema_arrow.names:
+            return _file_entry(key, None, parquet.metadata.num_rows, starts)
+        timestamps = parquet.read(columns=['timestamp']).column('timestamp')
+        return _file_entry(key, timestamps, parquet.metadata.num_rows, starts)
+
+    def rebuild_partition(self, vin: str, date: str) -> dict:
+        """
+        A partíció manifestje a tényleges Parquet fájlokból. A listázás előtt
+        meglévő delták törlődnek; a közben írt újak megmaradnak (átfedés esetén
+        az összefésülés kulcs szerint deduplikál).
+        """
+        index_prefix = self._prefix(vin, date)
+        stale = [obj.key for obj in self.store.list(index_prefix) if obj.key.rsplit('/', 1)[-1] != MANIFEST]
+
+        partition = f"vin={vin}/date={date}/"
+        event_tables = [self._read(obj.key) for obj in self.store.list(f"{self.config.crank_events_prefix}/{partition}")
+                        if is_data_file(obj.key)]
+        records = [r for t in event_tables for r in _event_records(t)]
+        starts = [r["start_time"] for r in records]
+
+        files = [self._scan_file(obj.key, starts)
+                 for obj in self.store.list(f"{self.config.silver_prefix}/{partition}") if is_data_file(obj.key)]
+
+        manifest = self._merge(vin, date, [{"files": files, "crank_events": records}])
+        if files or records:
+            self._put(index_prefix + MANIFEST, manifest)
+        else:
+            stale.append(index_prefix + MANIFEST)  # Nincs adat: az index is törlődik
+        self.store.delete(stale)
+        return manifest
+
+    def rebuild(self, vin: Optional[str] = None) -> int:
+        """Teljes újraépítés (vagy egy VIN-é) nulláról; a partíciók számát adja vissza."""
+        scope = f"vin={vin}/" if vin else ""
+        partitions = set()
+        for prefix in (self.config.silver_prefix, self.config.crank_events_prefix, self.config.crank_index_prefix):
+            for obj in self.store.list(f"{prefix}/{scope}"):
+                if '/vin=' in obj.key and '/date=' in obj.key:
+                    partitions.add(partition_of(obj.key))
+        for vin_, date in sorted(partitions):
+            self.rebuild_partition(vin_, date)
+        print(f"Crank index rebuilt: {len(partitions)} partitions")
+        return len(partitions)
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import List, Tuple, Optional
+import numpy as np
 from config import ProcessorConfig
 
 class ISignalProcessor(ABC):
@@ -11,3 +12,25 @@ class ISignalProcessor(ABC):
     def process(self, points: List[Tuple[float, float]], config: ProcessorConfig) -> Optional[float]:
         """Processes raw voltage points to return a validated health indicator[cite: 142]."""
         pass
+
+    def estimator(self, config: ProcessorConfig):
+        """
+        Optional streaming form: a fresh per-event estimator with add(t, v)
+        and finish() (see plateau.PlateauEstimator). None if not supported.
+        """
+        return None
+
+    def process_batch(self, times: np.ndarray, volts: np.ndarray, offsets: np.ndarray,
+                      config: ProcessorConfig) -> np.ndarray:
+        """
+        Many events at once: flat time / voltage arrays, event i spanning
+        offsets[i]:offsets[i + 1]. Returns one indicator per event (NaN = None).
+        Strategies without a vectorised path fall back to process() per event.
+        """
+        out = np.full(len(offsets) - 1, np.nan)
+        for i in range(len(out)):
+            segment = slice(offsets[i], offsets[i + 1])
+            value = self.process(list(zip(times[segment].tolist(), volts[segment].tolist())), config)
+            if value is not None:
+                out[i] = value
+        return out
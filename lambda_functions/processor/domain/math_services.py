@@ -1,6 +1,8 @@
+from typing import Iterable, Tuple, Optional
 import numpy as np
-from typing import List, Tuple, Optional
 from .interfaces import ISignalProcessor
+from .plateau import PlateauEstimator
+from .plateau_batch import analyze_crank_batch
 from config import ProcessorConfig
 
 class PlateauAveragingProcessor(ISignalProcessor):
@@ -9,43 +11,45 @@ class PlateauAveragingProcessor(ISignalProcessor):
     Filters out inductive inrush spikes and compression ripples[cite: 41, 57].
     """
     
-    def process(self, points: List[Tuple[float, float]], config: ProcessorConfig) -> Optional[float]:
-        if not points or len(points) < 2:
-            return None
-            
-        t_raw, v_raw = zip(*points)
-        t_start = t_raw[0]
-        
-        # 1. Inrush Blanking: Discard first 100ms (Phase 1) 
-        # Prevents false positives from inductive cabling reactance[cite: 37, 40].
-        plateau_start_time = t_start + 0.100 
-        
-        # 2. Plateau Window: Next 500ms (Phase 2) [cite: 153]
-        # This phase correlates directly with battery internal resistance[cite: 47, 51].
-        plateau_end_time = plateau_start_time + 0.500
-        
-        plateau_values = [
-            v for t, v in points 
-            if plateau_start_time <= t <= plateau_end_time
-        ]
-        
-        if len(plateau_values) < 2:
-            return None
-            
-        # 3. Averaging: Calculate mean DC component to filter AC ripple[cite: 57, 153].
-        v_plateau = np.mean(plateau_values)
-        
-        # 4. Safety Margin Check: Ensuring ECU survivability[cite: 123, 214].
-        # ECU floor is typically 6.0V; our red line is 8.5V[cite: 122, 138].
-        if not (6.0 <= v_plateau <= 13.5):
-            return None
-            
-        return float(v_plateau)
+    def estimator(self, config: ProcessorConfig) -> PlateauEstimator:
+        return PlateauEstimator(
+            blanking_s=config.plateau_blanking_s,
+            window_s=config.plateau_window_s,
+            v_floor=config.plateau_v_floor,
+            v_ceiling=config.plateau_v_ceiling
+        )
+
+    def process(self, points: Iterable[Tuple[float, float]], config: ProcessorConfig) -> Optional[float]:
+        # Inrush blanking (100ms) -> plateau window (500ms) -> mean -> 6.0-13.5V gate[cite: 37, 153].
+        # The edge gateway runs the very same implementation (domain/plateau.py).
+        # Points are streamed through the estimator; nothing after the window is read.
+        result = self.estimator(config).consume(points)
+        return result.plateau_voltage if result else None
+
+    def process_batch(self, times: np.ndarray, volts: np.ndarray, offsets: np.ndarray,
+                      config: ProcessorConfig) -> np.ndarray:
+        # Same phases and gate, as segmented NumPy reductions over all events
+        return analyze_crank_batch(
+            times, volts, offsets,
+            blanking_s=config.plateau_blanking_s,
+            window_s=config.plateau_window_s,
+            v_floor=config.plateau_v_floor,
+            v_ceiling=config.plateau_v_ceiling
+        ).plateau_voltage
 
 class CrankingAnalysisContext:
     """Strategy Context: Orchestrates the execution of signal analysis[cite: 144]."""
     def __init__(self, strategy: ISignalProcessor):
         self._strategy = strategy
 
-    def analyze(self, points: List[Tuple[float, float]], config: ProcessorConfig) -> Optional[float]:
+    def analyze(self, points: Iterable[Tuple[float, float]], config: ProcessorConfig) -> Optional[float]:
         return self._strategy.process(points, config)
+
+    def estimator(self, config: ProcessorConfig):
+        """Per-event streaming estimator of the strategy (None if it has no streaming form)."""
+        return self._strategy.estimator(config)
+
+    def analyze_batch(self, times: np.ndarray, volts: np.ndarray, offsets: np.ndarray,
+                      config: ProcessorConfig) -> np.ndarray:
+        """Fleet reprocessing entry point: one plateau per event, NaN where analyze() gives None."""
+        return self._strategy.process_batch(times, volts, offsets, config)
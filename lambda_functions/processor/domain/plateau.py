@@ -0,0 +1,142 @@
+"""
+Cranking plateau algorithm (v1.4), shared by the silver Lambda
+(PlateauAveragingProcessor) and the edge gateway (on-device crank events).
+Kept dependency-free so the Raspberry Pi can import it without numpy.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+BLANKING_S = 0.100       # Phase 1: inductive inrush, discarded
+PLATEAU_WINDOW_S = 0.500  # Phase 2: sustained cranking plateau
+V_FLOOR = 6.0            # ECU brownout floor
+V_CEILING = 13.5         # Above this the starter was not engaged
+MIN_PLATEAU_POINTS = 2
+
+
+@dataclass(frozen=True)
+class CrankAnalysis:
+    """Result of one cranking window."""
+    start_time: float               # Timestamp of the first sample
+    plateau_voltage: Optional[float]  # Validated V_min plateau (None if rejected)
+    inrush_min: Optional[float]     # Lowest voltage in the blanking window
+    sample_count: int               # Samples inside the plateau window
+
+
+class PlateauEstimator:
+    """
+    Streaming form of the plateau algorithm: consumes (timestamp, voltage)
+    samples one at a time with constant state (inrush minimum, compensated
+    plateau sum, Welford mean / variance). The result is emitted by the
+    first sample past the plateau window, so a live capture can stop there.
+    """
+
+    def __init__(self,
+                 blanking_s: float = BLANKING_S,
+                 window_s: float = PLATEAU_WINDOW_S,
+                 v_floor: float = V_FLOOR,
+                 v_ceiling: float = V_CEILING,
+                 min_points: int = MIN_PLATEAU_POINTS):
+        self.blanking_s = blanking_s
+        self.window_s = window_s
+        self.v_floor = v_floor
+        self.v_ceiling = v_ceiling
+        self.min_points = min_points
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self.start_time = None
+        self.closes_at = None       # Plateau window end (None before the first sample)
+        self.inrush_min = None
+        self.count = 0              # Samples inside the plateau window
+        self._sum = 0.0             # Neumaier-compensated plateau sum
+        self._compensation = 0.0
+        self._mean = 0.0            # Welford running mean / M2 (variance only)
+        self._m2 = 0.0
+        self.closed = False
+        self.result = None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return (self._sum + self._compensation) / self.count if self.count else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance of the plateau (compression ripple)."""
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    def add(self, t: float, v: float) -> Optional[CrankAnalysis]:
+        """Feeds one sample; returns the analysis once, when the window closes."""
+        if self.closed:
+            return None
+        self.samples += 1
+        if self.start_time is None:
+            self.start_time = t
+            self._plateau_start = t + self.blanking_s
+            self.closes_at = self._plateau_start + self.window_s
+
+        if t < self._plateau_start:
+            if self.inrush_min is None or v < self.inrush_min:
+                self.inrush_min = v
+        elif t <= self.closes_at:
+            self._accumulate(v)
+        else:
+            return self.finish()
+        return None
+
+    def _accumulate(self, v: float):
+        total = self._sum + v
+        if abs(self._sum) >= abs(v):
+            self._compensation += (self._sum - total) + v
+        else:
+            self._compensation += (v - total) + self._sum
+        self._sum = total
+
+        self.count += 1
+        delta = v - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (v - self._mean)
+
+    def finish(self) -> Optional[CrankAnalysis]:
+        """Closes the window (end of stream). None when fewer than two samples arrived."""
+        if self.closed:
+            return self.result
+        self.closed = True
+        if self.samples < 2:
+            return None
+
+        plateau = None
+        if self.count >= self.min_points:
+            # Mean DC component filters the compression ripple
+            v_plateau = self.mean
+            if self.v_floor <= v_plateau <= self.v_ceiling:
+                plateau = v_plateau
+
+        self.result = CrankAnalysis(
+            start_time=self.start_time,
+            plateau_voltage=plateau,
+            inrush_min=self.inrush_min,
+            sample_count=self.count
+        )
+        return self.result
+
+    def consume(self, points: Iterable[Tuple[float, float]]) -> Optional[CrankAnalysis]:
+        """Feeds an iterable until the window closes; later points are not read."""
+        for t, v in points:
+            if self.add(t, v) is not None:
+                break
+        return self.finish()
+
+
+def analyze_crank(points: Iterable[Tuple[float, float]],
+                  blanking_s: float = BLANKING_S,
+                  window_s: float = PLATEAU_WINDOW_S,
+                  v_floor: float = V_FLOOR,
+                  v_ceiling: float = V_CEILING,
+                  min_points: int = MIN_PLATEAU_POINTS) -> Optional[CrankAnalysis]:
+    """
+    points: (timestamp_seconds, voltage) pairs in chronological order.
+    Returns None when there are fewer than two samples.
+    """
+    return PlateauEstimator(blanking_s, window_s, v_floor, v_ceiling, min_points).consume(points)
@@ -0,0 +1,92 @@
+"""
+Vectorised cranking plateau analysis for fleet reprocessing: the algorithm
+of plateau.analyze_crank applied to many events at once with segmented
+NumPy reductions. Lambda-side only; the edge gateway stays on plateau.py.
+"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from .plateau import BLANKING_S, PLATEAU_WINDOW_S, V_FLOOR, V_CEILING, MIN_PLATEAU_POINTS
+
+# Means this close to a gate limit are re-summed with math.fsum, so the
+# accept/reject decision is bit-identical to the scalar path
+_GATE_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class CrankBatchAnalysis:
+    """Per-event columns of CrankAnalysis; NaN where the scalar path has None."""
+    analysed: np.ndarray         # False where analyze_crank() returns None (< 2 samples)
+    start_time: np.ndarray
+    plateau_voltage: np.ndarray
+    inrush_min: np.ndarray
+    sample_count: np.ndarray
+
+
+def analyze_crank_batch(times, volts, offsets,
+                        blanking_s: float = BLANKING_S,
+                        window_s: float = PLATEAU_WINDOW_S,
+                        v_floor: float = V_FLOOR,
+                        v_ceiling: float = V_CEILING,
+                        min_points: int = MIN_PLATEAU_POINTS) -> CrankBatchAnalysis:
+    """
+    times, volts: flat arrays with the events stored back to back, each in
+    chronological order. offsets: n_events + 1 boundaries, event i being
+    times[offsets[i]:offsets[i + 1]] (the layout of an Arrow list column).
+    """
+    times = np.asarray(times, dtype=np.float64)
+    volts = np.asarray(volts, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if (offsets.ndim != 1 or len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(times)
+            or len(volts) != len(times) or np.any(np.diff(offsets) < 0)):
+        raise ValueError("offsets must rise from 0 to len(times), with volts the same length as times")
+
+    n = len(offsets) - 1
+    starts = offsets[:-1]
+    counts = np.diff(offsets)
+    analysed = counts >= 2
+    nonempty = counts > 0
+    event = np.repeat(np.arange(n), counts)  # Event index of every sample
+
+    # Phase boundaries per event, broadcast back to the samples
+    start_time = np.full(n, np.nan)
+    start_time[nonempty] = times[starts[nonempty]]
+    plateau_start = start_time + blanking_s
+    plateau_end = plateau_start + window_s
+    sample_plateau_start = plateau_start[event]
+    inrush = times < sample_plateau_start
+    in_plateau = (times >= sample_plateau_start) & (times <= plateau_end[event])
+
+    # Segmented mean and gate
+    sample_count = np.bincount(event[in_plateau], minlength=n)
+    sums = np.bincount(event, weights=np.where(in_plateau, volts, 0.0), minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / sample_count
+    enough = analysed & (sample_count >= min_points)
+    valid = enough & (mean >= v_floor) & (mean <= v_ceiling)
+
+    near_gate = enough & ((np.abs(mean - v_floor) <= _GATE_EPS) | (np.abs(mean - v_ceiling) <= _GATE_EPS))
+    for i in np.flatnonzero(near_gate):
+        segment = slice(starts[i], offsets[i + 1])
+        mean[i] = math.fsum(volts[segment][in_plateau[segment]]) / sample_count[i]
+        valid[i] = v_floor <= mean[i] <= v_ceiling
+
+    # Segmented minimum over the blanking window (+inf outside it)
+    inrush_min = np.full(n, np.nan)
+    if nonempty.any():
+        mins = np.minimum.reduceat(np.where(inrush, volts, np.inf), starts[nonempty])
+        inrush_min[nonempty] = np.where(np.isinf(mins), np.nan, mins)
+
+    start_time[~analysed] = np.nan
+    inrush_min[~analysed] = np.nan
+    sample_count[~analysed] = 0
+    return CrankBatchAnalysis(
+        analysed=analysed,
+        start_time=start_time,
+        plateau_voltage=np.where(valid, mean, np.nan),
+        inrush_min=inrush_min,
+        sample_count=sample_count
+    )
@@ -39,3 +39,26 @@ class ParabolicInterpolator:
             return None
             
         return float(v_vertex)
+
+    @staticmethod
+    def find_vertices(t_raw: np.ndarray, v: np.ndarray, config: ProcessorConfig) -> np.ndarray:
+        """
+        find_vertex() soronként, vektorizálva: (N, 3) idő- és feszültségpontok.
+        Elutasított (nem konvex / túl mély) sorok helyén NaN.
+        """
+        t = t_raw - t_raw[:, 1:2]
+        v0, v1, v2 = v[:, 0], v[:, 1], v[:, 2]
+        t0, t1, t2 = t[:, 0], t[:, 1], t[:, 2]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            denom = (t0 - t1) * (t0 - t2) * (t1 - t2)
+            A = (t2 * (v1 - v0) + t1 * (v0 - v2) + t0 * (v2 - v1)) / denom
+            B = (t2**2 * (v0 - v1) + t1**2 * (v2 - v0) + t0**2 * (v1 - v2)) / denom
+
+            t_vertex_rel = -B / (2 * A)
+            C = v0 - A * t0**2 - B * t0
+            v_vertex = A * t_vertex_rel**2 + B * t_vertex_rel + C
+
+        valid = (denom != 0) & (A > config.convexity_threshold) & \
+                (v_vertex >= v.min(axis=1) - config.max_voltage_drop_diff)
+        return np.where(valid, v_vertex, np.nan)
@@ -0,0 +1,141 @@
+"""
+SmartDrive compact telemetry frame (SDF1).
+Shared by the edge publisher (encoder) and the silver processor (decoder),
+so it must stay dependency-free (stdlib only).
+
+Layout (little-endian):
+    magic      4s      b"SDF1"
+    flags      u8      bit0: body is zlib-compressed
+    body:
+      vin        u8 length + utf-8
+      base_ms    i64     first sample timestamp (epoch ms)
+      n_samples  u16
+      n_pids     u8
+      pid dict   n_pids x (u8 length + utf-8 pid_code)
+      deltas     n_samples-1 x varint (ms since previous sample)
+      columns    n_pids x n_samples x f32 (NaN = PID missing in that sample)
+"""
+
+import struct
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"SDF1"
+FLAG_ZLIB = 0x01
+MAX_SAMPLES = 0xFFFF
+
+
+class FrameDecodeError(ValueError):
+    """Corrupt or truncated SDF1 frame (bad zlib stream, short body)."""
+
+
+def is_frame(blob: bytes) -> bool:
+    return blob[:len(MAGIC)] == MAGIC
+
+
+def _write_varint(out: bytearray, value: int):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_frame(vin: str, rows: List[Tuple[int, Dict[str, float]]], compress: bool = True) -> bytes:
+    """
+    Encodes (timestamp_ms, {pid_code: value}) rows into one SDF1 frame.
+    Rows must be sorted by timestamp.
+    """
+    if not rows or len(rows) > MAX_SAMPLES:
+        raise ValueError(f"Frame must hold 1..{MAX_SAMPLES} samples, got {len(rows)}")
+
+    pid_codes = []
+    for _, values in rows:
+        for code in values:
+            if code not in pid_codes:
+                pid_codes.append(code)
+
+    body = bytearray()
+    vin_raw = vin.encode("utf-8")
+    body += struct.pack("<B", len(vin_raw)) + vin_raw
+    body += struct.pack("<qHB", rows[0][0], len(rows), len(pid_codes))
+    for code in pid_codes:
+        code_raw = code.encode("utf-8")
+        body += struct.pack("<B", len(code_raw)) + code_raw
+
+    previous = rows[0][0]
+    for ts, _ in rows[1:]:
+        _write_varint(body, ts - previous)
+        previous = ts
+
+    nan = float("nan")
+    for code in pid_codes:
+        column = [values.get(code, nan) for _, values in rows]
+        body += struct.pack(f"<{len(column)}f", *column)
+
+    flags = FLAG_ZLIB if compress else 0
+    if compress:
+        body = zlib.compress(bytes(body))
+    return MAGIC + struct.pack("<B", flags) + bytes(body)
+
+
+def decode_frame(blob: bytes) -> Tuple[str, List[int], Dict[str, List[Optional[float]]]]:
+    """
+    Decodes an SDF1 frame into (vin, timestamps_ms, {pid_code: column}).
+    Missing values come back as None.
+    """
+    if not is_frame(blob):
+        raise ValueError("Not an SDF1 telemetry frame")
+    try:
+        return _decode_body(blob)
+    except (zlib.error, struct.error, IndexError) as e:
+        raise FrameDecodeError(f"Corrupt SDF1 frame: {e}") from e
+
+
+def _decode_body(blob: bytes) -> Tuple[str, List[int], Dict[str, List[Optional[float]]]]:
+    flags = blob[len(MAGIC)]
+    body = blob[len(MAGIC) + 1:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    pos = 0
+    vin_len = body[pos]
+    vin = body[pos + 1:pos + 1 + vin_len].decode("utf-8")
+    pos += 1 + vin_len
+
+    base_ms, n_samples, n_pids = struct.unpack_from("<qHB", body, pos)
+    pos += struct.calcsize("<qHB")
+
+    pid_codes = []
+    for _ in range(n_pids):
+        code_len = body[pos]
+        pid_codes.append(body[pos + 1:pos + 1 + code_len].decode("utf-8"))
+        pos += 1 + code_len
+
+    timestamps = [base_ms]
+    for _ in range(n_samples - 1):
+        delta, pos = _read_varint(body, pos)
+        timestamps.append(timestamps[-1] + delta)
+
+    columns = {}
+    for code in pid_codes:
+        column = struct.unpack_from(f"<{n_samples}f", body, pos)
+        pos += 4 * n_samples
+        # float32 -> shortest decimal that round-trips (12.600000381 -> 12.6)
+        columns[code] = [None if v != v else float(f"{v:.7g}") for v in column]
+
+    return vin, timestamps, columns
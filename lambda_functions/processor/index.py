@@ -1,27 +1,85 @@
+import os
 import json
+from urllib.parse import unquote_plus
 from config import ProcessorConfig
 from domain.math_services import CrankingAnalysisContext, PlateauAveragingProcessor
-# from infrastructure.repository import SilverRepository (Feltételezett repo kód)
+
+# Modul szintű állapot: egyszer épül fel, a meleg hívások újrahasználják.
+# A nehéz függőségek (pyarrow, boto3) csak az első Bronze kötegnél töltődnek be;
+# az awswrangler egyáltalán nem, és a gyakori útvonal pandas API-t sem használ.
+CONFIG = ProcessorConfig()
+
+# Stratégia kiválasztása (Lead-Acid / AGM alapértelmezett)
+# v1.4: Plateau Averaging is the current industry standard for SOH[cite: 63, 209].
+ANALYZER = CrankingAnalysisContext(PlateauAveragingProcessor())
+
+_etl = None
+
+def etl_service():
+    global _etl
+    if _etl is None:
+        from crank_index import CrankEventIndex
+        from repository import S3Repository
+        from service import ETLService
+        repo = S3Repository(os.environ['SILVER_BUCKET_NAME'], max_pool_connections=CONFIG.fetch_concurrency)
+        _etl = ETLService(repo, CONFIG, CrankEventIndex(repo.silver, CONFIG))
+    return _etl
+
+def _s3_objects(record: dict) -> list:
+    """(bucket, key) párok egy S3 értesítésből (közvetlen, vagy SQS body-ba csomagolt)."""
+    if 's3' in record:
+        notifications = [record]
+    else:
+        try:
+            notifications = json.loads(record.get('body', '{}')).get('Records', [])
+        except (json.JSONDecodeError, AttributeError):
+            return []
+    return [
+        (n['s3']['bucket']['name'], unquote_plus(n['s3']['object']['key']))
+        for n in notifications if 's3' in n
+    ]
 
 def lambda_handler(event, context):
-    config = ProcessorConfig()
-    
-    # Stratégia kiválasztása (Lead-Acid / AGM alapértelmezett)
-    # v1.4: Plateau Averaging is the current industry standard for SOH[cite: 63, 209].
-    strategy = PlateauAveragingProcessor()
-    analyzer = CrankingAnalysisContext(strategy)
-    
+    # SQS ReportBatchItemFailures: csak a hibás üzenetek térnek vissza a sorba
+    failures = []
+    bronze_messages = []  # (messageId, [(bucket, key)])
     for record in event.get('Records', []):
-        # 1. Adat kinyerése
-        payload = json.loads(record['body'])
-        points = payload.get('voltage_samples', []) # (timestamp, voltage) list
-        
-        # 2. Jelfeldolgozás (Domain Layer)
-        v_min_refined = analyzer.analyze(points, config)
-        
+        message_id = record.get('messageId')
+
+        # Bronze fájl értesítés (S3 -> SQS köteg): gyűjtjük, egy menetben írjuk ki
+        objects = _s3_objects(record)
+        if objects:
+            bronze_messages.append((message_id, objects))
+            continue
+
+        try:
+            # 1. Adat kinyerése
+            payload = json.loads(record['body'])
+            points = payload.get('voltage_samples', []) # (timestamp, voltage) list
+
+            # 2. Jelfeldolgozás (Domain Layer)
+            v_min_refined = ANALYZER.analyze(points, CONFIG)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"ERROR: Invalid record {message_id}: {e}")
+            failures.append(message_id)
+            continue
+
         if v_min_refined:
             print(f"Validated Plateau Voltage: {v_min_refined}V [cite: 48]")
             # 3. Mentés a Silver Layer-be (Infrastructure Layer)
             # repo.save_to_silver(vin, v_min_refined, payload)
-            
-    return {"status": "processed"}
+
+    bronze_objects = [obj for _, objects in bronze_messages for obj in objects]
+    if bronze_objects:
+        failed = set(etl_service().process_batch(bronze_objects))
+        failures += [message_id for message_id, objects in bronze_messages if failed.intersection(objects)]
+
+    if None in failures:
+        # Közvetlen (nem SQS) trigger: nincs részleges visszajelzés, az egész hívás újrapróbálódik
+        raise RuntimeError(f"{len(failures)} record(s) failed")
+
+    return {
+        "status": "processed",
+        "bronze_objects": len(bronze_objects),
+        "batchItemFailures": [{"itemIdentifier": m} for m in dict.fromkeys(failures)],
+    }
@@ -0,0 +1,109 @@
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Iterable, List
+
+def is_data_file(key: str) -> bool:
+    # '_' és '.' kezdetű fájlokat az Athena / Hive olvasók sem látják
+    name = key.rsplit('/', 1)[-1]
+    return name.endswith('.parquet') and not name.startswith(('_', '.'))
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+
+class IObjectStore(ABC):
+    """
+    A Silver bucket műveletei, amikre a karbantartó jobok (compaction) építenek.
+    Kulcsok '/'-el tagolva, a bucket gyökeréhez képest.
+    """
+
+    @abstractmethod
+    def list(self, prefix: str) -> List[StoredObject]:
+        pass
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        pass
+
+    @abstractmethod
+    def put(self, key: str, data: bytes):
+        pass
+
+    @abstractmethod
+    def delete(self, keys: Iterable[str]):
+        pass
+
+    def exists(self, key: str) -> bool:
+        return any(obj.key == key for obj in self.list(key))
+
+class S3ObjectStore(IObjectStore):
+    DELETE_BATCH = 1000  # DeleteObjects limit
+
+    def __init__(self, bucket: str, client=None):
+        if client is None:
+            import boto3
+            client = boto3.client('s3')
+        self.client = client
+        self.bucket = bucket
+
+    def list(self, prefix: str) -> List[StoredObject]:
+        paginator = self.client.get_paginator('list_objects_v2')
+        return [
+            StoredObject(item['Key'], item['Size'])
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix)
+            for item in page.get('Contents', [])
+        ]
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def put(self, key: str, data: bytes):
+        # Egyetlen PUT: az objektum vagy teljesen megjelenik, vagy egyáltalán nem
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def delete(self, keys: Iterable[str]):
+        keys = list(keys)
+        for i in range(0, len(keys), self.DELETE_BATCH):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': k} for k in keys[i:i + self.DELETE_BATCH]], 'Quiet': True}
+            )
+
+class LocalObjectStore(IObjectStore):
+    """Helyi fájlrendszer, mint S3 helyettesítő (tesztek, offline újrafeldolgozás)."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def list(self, prefix: str) -> List[StoredObject]:
+        objects = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if key.startswith(prefix) and not name.endswith('.tmp'):
+                    objects.append(StoredObject(key, os.path.getsize(path)))
+        return sorted(objects, key=lambda obj: obj.key)
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), 'rb') as f:
+            return f.read()
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)  # Atomikus, mint egy S3 PUT
+
+    def delete(self, keys: Iterable[str]):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
@@ -1,63 +1,135 @@
-import boto3
-import pandas as pd
-import awswrangler as wr
+import io
+import os
 import json
-from typing import Optional
+import uuid
+from typing import List, Tuple
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from frame_codec import is_frame
+from bronze_reader import LONG_SCHEMA, read_bronze_json, read_edge_crank_events, read_frame, to_dataframe
+from segmentation import CRANK_EVENT_SCHEMA
+from infrastructure.object_store import IObjectStore, LocalObjectStore, S3ObjectStore
+
+PARTITION_COLS = ('vin', 'date')
+
+# Modul szintű, melegindítások között újrahasznált S3 kliens
+_S3_CLIENT = None
+
+def shared_s3_client(max_pool_connections: int = 10):
+    global _S3_CLIENT
+    if _S3_CLIENT is None:
+        import boto3  # ~0.2 s: csak az első S3 műveletnél
+        from botocore.config import Config
+        # A kliens szálbiztos; a kapcsolatkészlet legyen akkora, mint a letöltő szálkészlet
+        _S3_CLIENT = boto3.client('s3', config=Config(max_pool_connections=max_pool_connections))
+    return _S3_CLIENT
+
+def local_root() -> str:
+    """SMARTDRIVE_LOCAL_S3_ROOT: helyi könyvtár S3 helyett (<root>/<bucket>/<key>)."""
+    return os.environ.get('SMARTDRIVE_LOCAL_S3_ROOT', '')
+
+def object_store(bucket: str, s3_client=None) -> IObjectStore:
+    if local_root():
+        return LocalObjectStore(os.path.join(local_root(), bucket))
+    return S3ObjectStore(bucket, s3_client or shared_s3_client())
 
 class S3Repository:
-    def __init__(self, silver_bucket: str):
-        self.s3_client = boto3.client('s3')
+    def __init__(self, silver_bucket: str, s3_client=None, max_pool_connections: int = 10):
+        # Helyi módban nincs S3 kliens: a teljes ETL hálózat nélkül futtatható
+        self.s3_client = s3_client or (None if local_root() else shared_s3_client(max_pool_connections))
         self.silver_bucket = silver_bucket
+        self.silver = object_store(silver_bucket, self.s3_client)
 
-    def fetch_json_as_df(self, bucket: str, key: str) -> pd.DataFrame:
+    def _read_object(self, bucket: str, key: str) -> bytes:
+        if self.s3_client is None:
+            return object_store(bucket).get(key)
+        return self.s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+
+    def fetch_table(self, bucket: str, key: str) -> pa.Table:
         """
-        Letölti a JSON-t és 'kilapítja' (flatten) a pids listát táblázattá.
+        Letölti a Bronze objektumot és hosszú (pid_code, value, timestamp, vin)
+        Arrow táblává alakítja: SDF1 frame, v1.3 JSON (pids lista), NDJSON köteg
+        vagy a régi lapos formátum.
         """
-        response = self.s3_client.get_object(Bucket=bucket, Key=key)
-        file_content = response['Body'].read().decode('utf-8')
-        
+        raw_content = self._read_object(bucket, key)
+
+        # DETEKTÁLÁS: Bináris, kötegelt SDF1 frame (AWSCloudPublisher framing mód)
+        if is_frame(raw_content):
+            try:
+                return read_frame(raw_content)
+            except ValueError as e:  # FrameDecodeError is: sérült zlib / csonka frame
+                print(f"ERROR: Invalid telemetry frame in {key}: {e}")
+                return LONG_SCHEMA.empty_table()
+
+        try:
+            return read_bronze_json(raw_content)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, json.JSONDecodeError) as e:
+            print(f"ERROR: Invalid JSON in {key}: {e}")
+            return LONG_SCHEMA.empty_table()
+
+    def fetch_edge_events(self, bucket: str, key: str) -> pa.Table:
+        """Edge crank-event rekord(ok) a Bronze events/ alól -> crank-events tábla sorai."""
         try:
-            data = json.loads(file_content)
-        except json.JSONDecodeError:
-            print(f"ERROR: Invalid JSON in {key}")
-            return pd.DataFrame()
-
-        # DETEKTÁLÁS: Ez egy SmartDrive v1.3 nested JSON (pids lista)?
-        if isinstance(data, dict) and 'pids' in data and isinstance(data['pids'], list):
-            # A 'pids' lista elemeit sorokká alakítjuk
-            # A 'meta' paraméterrel örökítjük a 'vin'-t minden sorra a fejrészből
-            df = pd.json_normalize(
-                data, 
-                record_path=['pids'], 
-                meta=['vin'] 
-            )
-        else:
-            # Fallback: Ha lapos a JSON (pl. régi verzió), vagy más formátum
-            df = pd.DataFrame([data]) if isinstance(data, dict) else pd.DataFrame(data)
-
-        # IDŐBÉLYEG KONVERZIÓ
-        # A normalize stringként hagyja a dátumot, ezt át kell váltanunk datetime-ra
-        # a service.py matek moduljához.
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-        return df
-
-    def save_dataframe_to_parquet(self, df: pd.DataFrame, prefix: str, compression: str = "snappy"):
+            return read_edge_crank_events(self._read_object(bucket, key))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, json.JSONDecodeError) as e:
+            print(f"ERROR: Invalid crank event in {key}: {e}")
+            return CRANK_EVENT_SCHEMA.empty_table()
+
+    def fetch_json_as_df(self, bucket: str, key: str):
+        return to_dataframe(self.fetch_table(bucket, key))
+
+    @staticmethod
+    def _partitions(table: pa.Table) -> List[Tuple[str, str, pa.Table]]:
         """
-        Elmenti a DataFrame-et Parquet formátumban a Silver bucketbe.
+        (vin, date, szelet) partíciónként; a szeletek másolás nélküli nézetek.
+        Hiányzó vin / date kulcsú sorok nem kerülhetnek Hive partícióba: eldobva.
         """
-        path = f"s3://{self.silver_bucket}/{prefix}/"
-        
-        # Ha üres a DF, ne írjunk
+        valid = pc.and_(pc.is_valid(table.column('vin')), pc.is_valid(table.column('date')))
+        dropped = pc.sum(pc.invert(valid).cast(pa.int64())).as_py()  # Üres táblán None
+        if dropped:
+            print(f"WARNING: Dropping {dropped} rows without vin/date")
+            table = table.filter(valid)
+        if not table.num_rows:
+            return []
+        table = table.sort_by([(col, 'ascending') for col in PARTITION_COLS])
+        changed = np.zeros(max(table.num_rows - 1, 0), dtype=bool)
+        for col in PARTITION_COLS:
+            column = table.column(col)
+            changed |= pc.not_equal(column.slice(1), column.slice(0, table.num_rows - 1)) \
+                .to_numpy(zero_copy_only=False)
+        bounds = np.r_[0, np.flatnonzero(changed) + 1, table.num_rows]
+
+        data_cols = [c for c in table.column_names if c not in PARTITION_COLS]
+        return [
+            (table.column('vin')[start].as_py(), table.column('date')[start].as_py(),
+             table.slice(start, end - start).select(data_cols))
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def save_table_to_parquet(self, table: pa.Table, prefix: str,
+                              compression: str = "snappy") -> List[Tuple[str, str, str, pa.Table]]:
+        """
+        Hive-particionált (vin=/date=) Parquet a Silver bucketbe: hívásonként
+        partíciónként egy új fájl (append). Csak pyarrow, awswrangler nélkül.
+        Visszaad: (vin, date, kulcs, szelet) a kiírt fájlokra (crank index).
+        """
+        # Ha üres a tábla, ne írjunk
+        if not table.num_rows:
+            return []
+
+        written = []
+        for vin, date, part in self._partitions(table):
+            buffer = io.BytesIO()
+            pq.write_table(part, buffer, compression=compression, coerce_timestamps='us')
+            key = f"{prefix}/vin={vin}/date={date}/{uuid.uuid4().hex}.{compression}.parquet"
+            self.silver.put(key, buffer.getvalue())
+            written.append((vin, date, key, part))
+        return written
+
+    def save_dataframe_to_parquet(self, df, prefix: str, compression: str = "snappy"):
+        """Elmenti a DataFrame-et Parquet formátumban a Silver bucketbe."""
         if df.empty:
-            return
-
-        wr.s3.to_parquet(
-            df=df,
-            path=path,
-            dataset=True,
-            partition_cols=['vin', 'date'],
-            mode="append",
-            compression=compression
-        )
+            return []
+        return self.save_table_to_parquet(pa.Table.from_pandas(df, preserve_index=False), prefix, compression)
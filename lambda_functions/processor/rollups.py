@@ -0,0 +1,185 @@
+import io
+from typing import Dict, List
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from config import ProcessorConfig
+from infrastructure.object_store import IObjectStore, is_data_file
+
+VOLTAGE_PID = "BATTERY_VOLTAGE"
+PERCENTILES = (5, 50, 95)
+KEY_COLUMNS = ('vin', 'date', 'pid_code', 'bucket_start')
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600}
+
+# Egy sor = egy (vin, pid, időrekesz) aggregátum. Minden oszlop összevonható:
+# count/sum összeadódik, min/max, last a nagyobb last_time-ú, a feszültség
+# percentilisei a ritka hisztogramból (hist_bins * rollup_hist_step_v) számolódnak újra.
+ROLLUP_SCHEMA = pa.schema([
+    ('vin', pa.string()),
+    ('pid_code', pa.string()),
+    ('bucket_start', pa.timestamp('us')),
+    ('count', pa.int64()),
+    ('min', pa.float64()),
+    ('max', pa.float64()),
+    ('sum', pa.float64()),
+    ('mean', pa.float64()),
+    ('last', pa.float64()),
+    ('last_time', pa.timestamp('us')),
+    ('p05', pa.float64()),
+    ('p50', pa.float64()),
+    ('p95', pa.float64()),
+    ('hist_bins', pa.list_(pa.int32())),
+    ('hist_counts', pa.list_(pa.int64())),
+    ('date', pa.string()),
+])
+
+def resolution_seconds(name: str) -> int:
+    """'1s' / '1m' / '1h' -> másodperc. A rekeszek nem lóghatnak át a napon (date partíció)."""
+    seconds = int(name[:-1]) * UNIT_SECONDS[name[-1]]
+    if 86400 % seconds:
+        raise ValueError(f"Rollup resolution must divide a day: {name}")
+    return seconds
+
+def rollup_prefix(config: ProcessorConfig, name: str) -> str:
+    return f"{config.rollup_prefix}_{name}"
+
+def _us(column) -> np.ndarray:
+    return pc.cast(column, pa.timestamp('us')).cast(pa.int64()).to_numpy(zero_copy_only=False)
+
+def _group_starts(table: pa.Table, keys: List[str]) -> np.ndarray:
+    """Rendezett táblában az azonos kulcsú sorfutamok kezdőindexei."""
+    n = table.num_rows
+    changed = np.zeros(max(n - 1, 0), dtype=bool)
+    for col in keys:
+        column = table.column(col)
+        changed |= pc.not_equal(column.slice(1), column.slice(0, n - 1)).to_numpy(zero_copy_only=False)
+    return np.r_[0, np.flatnonzero(changed) + 1]
+
+def _merge_histograms(table: pa.Table, group_of_row: np.ndarray, n_groups: int):
+    """
+    Soronkénti ritka hisztogramok összege csoportonként.
+    Visszaad: (offsets, bins, counts) csoport, azon belül bin szerint rendezve.
+    """
+    bins_col = table.column('hist_bins').combine_chunks()
+    counts_col = table.column('hist_counts').combine_chunks()
+    lengths = pc.fill_null(pc.list_value_length(bins_col), 0).to_numpy(zero_copy_only=False)
+    bins = pc.list_flatten(bins_col).to_numpy(zero_copy_only=False).astype('int64')
+    counts = pc.list_flatten(counts_col).to_numpy(zero_copy_only=False)
+    group = np.repeat(group_of_row, lengths)
+    if not len(bins):
+        return np.zeros(n_groups + 1, dtype='int64'), bins.astype('int32'), counts.astype('int64')
+
+    # (csoport, bin) egyetlen int64 kulcsba; np.unique rendez és csoportosít
+    base = bins.min()
+    span = int(bins.max() - base + 1)
+    keys, inverse = np.unique(group * span + (bins - base), return_inverse=True)
+    summed = np.bincount(inverse, weights=counts).astype('int64')
+    offsets = np.searchsorted(keys // span, np.arange(n_groups + 1), side='left')
+    return offsets, (keys % span + base).astype('int32'), summed
+
+def _percentiles(offsets: np.ndarray, bins: np.ndarray, counts: np.ndarray, step: float) -> Dict[int, np.ndarray]:
+    """Legközelebbi rang szerinti percentilis a hisztogramból (üres hisztogram: NaN)."""
+    n_groups = len(offsets) - 1
+    if not len(bins):
+        return {p: np.full(n_groups, np.nan) for p in PERCENTILES}
+    cumulative = np.cumsum(counts)
+    before = np.r_[0, cumulative][offsets[:-1]]          # Csoport előtti kumulált darabszám
+    total = np.r_[0, cumulative][offsets[1:]] - before
+    result = {}
+    for p in PERCENTILES:
+        rank = np.maximum(np.ceil(total * p / 100.0), 1)
+        idx = np.minimum(np.searchsorted(cumulative, before + rank, side='left'), len(bins) - 1)
+        result[p] = np.where(total > 0, bins[idx] * step, np.nan)
+    return result
+
+def merge_rollups(table: pa.Table, config: ProcessorConfig) -> pa.Table:
+    """
+    Azonos (vin, date, pid_code, bucket_start) sorok összevonása; a hiányzó
+    kulcsoszlopokat (Hive partíció: vin, date) kihagyja. Késve érkezett adat
+    részaggregátumai így pontosan ugyanazt adják, mint egy teljes újraszámolás.
+    """
+    if not table.num_rows:
+        return table
+    keys = [k for k in KEY_COLUMNS if k in table.column_names]
+    table = table.sort_by([(k, 'ascending') for k in keys] + [('last_time', 'ascending')])
+    starts = _group_starts(table, keys)
+    ends = np.r_[starts[1:], table.num_rows]
+    group_of_row = np.repeat(np.arange(len(starts)), ends - starts)
+
+    numeric = {c: table.column(c).to_numpy() for c in ('count', 'min', 'max', 'sum', 'last')}
+    count = np.add.reduceat(numeric['count'], starts)
+    total = np.add.reduceat(numeric['sum'], starts)
+    offsets, bins, counts = _merge_histograms(table, group_of_row, len(starts))
+    pct = _percentiles(offsets, bins, counts, config.rollup_hist_step_v)
+
+    last_row = pa.array(ends - 1)
+    columns = {k: table.column(k).take(pa.array(starts)) for k in keys}
+    columns.update({
+        'count': pa.array(count),
+        'min': pa.array(np.minimum.reduceat(numeric['min'], starts)),
+        'max': pa.array(np.maximum.reduceat(numeric['max'], starts)),
+        'sum': pa.array(total),
+        'mean': pa.array(total / count),
+        'last': pa.array(numeric['last'][ends - 1]),
+        'last_time': table.column('last_time').take(last_row),
+        'p05': pa.array(pct[5], from_pandas=True),  # NaN -> null: nem feszültség PID
+        'p50': pa.array(pct[50], from_pandas=True),
+        'p95': pa.array(pct[95], from_pandas=True),
+        'hist_bins': pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), pa.array(bins, pa.int32())),
+        'hist_counts': pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), pa.array(counts, pa.int64())),
+    })
+    names = [f.name for f in ROLLUP_SCHEMA if f.name in columns]
+    return pa.Table.from_arrays([columns[n] for n in names],
+                                schema=pa.schema([ROLLUP_SCHEMA.field(n) for n in names]))
+
+def build_rollup(table: pa.Table, seconds: int, config: ProcessorConfig) -> pa.Table:
+    """
+    Nyers, hosszú (pid_code, value, timestamp, vin) sorok -> rekeszenkénti
+    aggregátum. Minden minta egy elemi részaggregátum, amit merge_rollups()
+    von össze: ugyanaz a kód fut kötegíráskor, compactionkor és olvasáskor.
+    """
+    # VIN nélküli sor nem kerülhet partícióba (lásd S3Repository._partitions)
+    valid = table.filter(pc.and_(pc.is_valid(table.column('value')), pc.is_valid(table.column('vin'))))
+    if not valid.num_rows:
+        return ROLLUP_SCHEMA.empty_table()
+
+    ts = _us(valid.column('timestamp'))
+    width = seconds * 1_000_000
+    bucket = pa.array(ts - ts % width, pa.timestamp('us'))
+    values = valid.column('value').to_numpy(zero_copy_only=False).astype('float64')
+
+    # Csak a feszültség kap hisztogramot (percentilisek); a többi PID üres listát
+    is_voltage = pc.fill_null(pc.equal(valid.column('pid_code'), VOLTAGE_PID), False).to_numpy(zero_copy_only=False)
+    bins = np.round(values[is_voltage] / config.rollup_hist_step_v).astype('int32')
+    offsets = np.r_[0, np.cumsum(is_voltage)].astype('int32')
+    n = valid.num_rows
+
+    elementary = pa.Table.from_arrays([
+        valid.column('vin'),
+        valid.column('pid_code'),
+        bucket,
+        pa.array(np.ones(n, dtype='int64')),
+        pa.array(values), pa.array(values), pa.array(values), pa.array(values),
+        pc.cast(valid.column('timestamp'), pa.timestamp('us')),
+        pa.ListArray.from_arrays(pa.array(offsets), pa.array(bins, pa.int32())),
+        pa.ListArray.from_arrays(pa.array(offsets), pa.array(np.ones(len(bins), dtype='int64'))),
+        pc.strftime(bucket, format='%Y-%m-%d'),
+    ], names=['vin', 'pid_code', 'bucket_start', 'count', 'min', 'max', 'sum', 'last',
+              'last_time', 'hist_bins', 'hist_counts', 'date'])
+    return merge_rollups(elementary, config)
+
+def read_rollup(store: IObjectStore, config: ProcessorConfig, resolution: str, vin: str,
+                first_day: str, last_day: str) -> pa.Table:
+    """
+    Egy VIN rollupja [first_day, last_day] között, összevonva: helyes akkor is,
+    ha a partícióban még több (nem compactolt) részfájl van ugyanarra a rekeszre.
+    """
+    tables = []
+    for obj in store.list(f"{rollup_prefix(config, resolution)}/vin={vin}/"):
+        day = obj.key.split('/date=', 1)[1].split('/', 1)[0]
+        if is_data_file(obj.key) and first_day <= day <= last_day:
+            tables.append(pq.read_table(io.BytesIO(store.get(obj.key))))
+    if not tables:
+        return ROLLUP_SCHEMA.empty_table().select([n for n in ROLLUP_SCHEMA.names if n not in ('vin', 'date')])
+    return merge_rollups(pa.concat_tables(tables), config)
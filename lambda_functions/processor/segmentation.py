@@ -0,0 +1,164 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from config import ProcessorConfig
+from domain_math import ParabolicInterpolator
+
+# A crank-events tábla (egy sor = egy indítás)
+CRANK_EVENT_SCHEMA = pa.schema([
+    ('vin', pa.string()),
+    ('event_id', pa.string()),
+    ('start_time', pa.timestamp('us')),
+    ('end_time', pa.timestamp('us')),
+    ('vmin_time', pa.timestamp('us')),
+    ('vmin_raw', pa.float64()),
+    ('refined_vmin', pa.float64()),
+    ('sample_count', pa.int64()),
+    ('trigger', pa.string()),
+    ('date', pa.string()),
+])
+CRANK_EVENT_COLUMNS = CRANK_EVENT_SCHEMA.names
+
+
+def _pid_rows(table: pa.Table, pid_code: str, vin_rank: np.ndarray):
+    """(vin rang, ns időbélyeg, érték) egy PID-re, (vin, idő) szerint rendezve."""
+    mask = pc.and_(pc.equal(table.column('pid_code'), pid_code), pc.is_valid(table.column('value')))
+    rows = np.flatnonzero(mask.to_numpy(zero_copy_only=False))
+    ns = pc.cast(table.column('timestamp'), pa.timestamp('ns')).cast(pa.int64()).to_numpy()[rows]
+    vin = vin_rank[rows]
+    order = np.lexsort((ns, vin))  # Stabil: azonos időbélyegnél a beérkezési sorrend marad
+    value = table.column('value').to_numpy()[rows].astype('float64')
+    return vin[order], ns[order], value[order]
+
+
+def _last_known(v_vin, v_ns, r_vin, r_ns, r_value) -> np.ndarray:
+    """merge_asof(direction='backward', by='vin'): az utolsó RPM minden feszültségmintához."""
+    result = np.full(len(v_ns), np.nan)
+    if not len(r_ns):
+        return result
+    # Mindkét oldal (vin, idő) szerint rendezett: VIN-csoportonként külön searchsorted.
+    # (Összetett int64 kulcs túlcsordulhat: RTC nélküli, 1970-es időbélyeg + sok VIN.)
+    vins = np.unique(v_vin)
+    v_bounds = zip(np.searchsorted(v_vin, vins, side='left'), np.searchsorted(v_vin, vins, side='right'))
+    r_bounds = zip(np.searchsorted(r_vin, vins, side='left'), np.searchsorted(r_vin, vins, side='right'))
+    for (v_lo, v_hi), (r_lo, r_hi) in zip(v_bounds, r_bounds):
+        if r_lo == r_hi:
+            continue
+        idx = np.searchsorted(r_ns[r_lo:r_hi], v_ns[v_lo:v_hi], side='right') - 1
+        found = idx >= 0
+        result[v_lo:v_hi][found] = r_value[r_lo:r_hi][idx[found]]
+    return result
+
+
+def _baseline(values: np.ndarray, group_start: np.ndarray, n: int) -> np.ndarray:
+    """Nyugalmi szint: az előző n minta maximuma ugyanarról a VIN-ről (NaN az első mintánál)."""
+    positions = np.arange(len(values))
+    baseline = np.full(len(values), -np.inf)
+    for k in range(1, n + 1):
+        prev = positions - k
+        valid = prev >= group_start
+        baseline[valid] = np.fmax(baseline[valid], values[prev[valid]])
+    baseline[np.isneginf(baseline)] = np.nan
+    return baseline
+
+
+def segment_crank_table(table: pa.Table, config: ProcessorConfig) -> pa.Table:
+    """
+    Egy Bronze köteg összes indítási eseményét szegmentálja, VIN-enként.
+
+    Indítási minta: 0 < RPM < crank_rpm_limit (az utolsó ismert RPM alapján),
+    vagy a feszültség legalább crank_drop_v-vel a nyugalmi szint és crank_v_max
+    alatt van, járó motor (RPM >= limit) nélkül.
+    Az egymást követő indítási minták egy eseményt alkotnak, amíg a VIN nem
+    vált és a szünet nem nagyobb crank_max_gap_s-nél.
+    Eseményenként a minimum és két szomszédja parabolikus interpolációt kap.
+    Csak Arrow + numpy: a pandas importja a hideg indítás nagy része lenne.
+    """
+    if 'pid_code' not in table.column_names or not table.num_rows:
+        return CRANK_EVENT_SCHEMA.empty_table()
+    # VIN nélküli sor nem rendelhető járműhöz (és a rang-kódolást is elrontaná)
+    table = table.filter(pc.is_valid(table.column('vin')))
+    if not table.num_rows:
+        return CRANK_EVENT_SCHEMA.empty_table()
+
+    # 1. VIN -> rendezési rang (a kimenet VIN, azon belül idő szerint rendezett)
+    encoded = pc.dictionary_encode(table.column('vin').combine_chunks())
+    vin_names = np.array(encoded.dictionary.to_pylist(), dtype=object)
+    by_name = np.argsort(vin_names, kind='stable')
+    rank = np.empty(len(vin_names), dtype='int64')
+    rank[by_name] = np.arange(len(vin_names))
+    vin_rank = rank[encoded.indices.to_numpy(zero_copy_only=False)]
+    vin_names = vin_names[by_name]
+
+    v_vin, ns, values = _pid_rows(table, 'BATTERY_VOLTAGE', vin_rank)
+    if len(values) < config.min_points_for_interpolation:
+        return CRANK_EVENT_SCHEMA.empty_table()
+    rpm = _last_known(v_vin, ns, *_pid_rows(table, 'RPM', vin_rank))
+
+    t = ns / config.time_unit_divisor
+    same_vin = np.r_[False, v_vin[1:] == v_vin[:-1]]
+    group_start = np.maximum.accumulate(np.where(same_vin, 0, np.arange(len(v_vin))))
+
+    # 2. Indítási minták: RPM átmenet vagy feszültségletörés
+    with np.errstate(invalid='ignore'):
+        rpm_crank = (rpm > 0) & (rpm < config.crank_rpm_limit)
+        running = rpm >= config.crank_rpm_limit
+        baseline = _baseline(values, group_start, config.crank_baseline_samples)
+        # NaN baseline (első minta) -> False
+        drop = (values <= baseline - config.crank_drop_v) & (values < config.crank_v_max) & ~running
+    crank = rpm_crank | drop
+    if not crank.any():
+        return CRANK_EVENT_SCHEMA.empty_table()
+
+    # 3. Eseményhatárok: új VIN, szünet vagy nem-indítási minta előtte
+    gap = np.diff(t, prepend=-np.inf) > config.crank_max_gap_s
+    continues = np.r_[False, crank[:-1]] & same_vin & ~gap
+    rows = np.flatnonzero(crank)
+    starts = np.flatnonzero(~continues[rows])  # Események első sora a rows tömbben
+    sample_count = np.diff(np.r_[starts, len(rows)])
+
+    first = rows[starts]
+    last = rows[starts + sample_count - 1]
+    # Esemény-minimum: a legkisebb érték első előfordulása (mint az idxmin)
+    event_of = np.repeat(np.arange(len(starts)), sample_count)
+    order = np.lexsort((values[rows], event_of))
+    min_row = rows[order[starts]]
+    by_rpm = np.logical_or.reduceat(rpm_crank[rows], starts)
+
+    # 4. Interpoláció: minimum + bal/jobb szomszéd ugyanarról a VIN-ről
+    n = len(values)
+    ok = (min_row > 0) & (min_row < n - 1)
+    ok[ok] &= same_vin[min_row[ok]] & same_vin[min_row[ok] + 1]
+
+    refined = np.full(len(min_row), np.nan)
+    if ok.any():
+        idx = min_row[ok][:, None] + np.array([-1, 0, 1])
+        refined[ok] = ParabolicInterpolator.find_vertices(t[idx], values[idx], config)
+
+    vin = vin_names[v_vin[first]].tolist()
+    # Determinisztikus azonosító: újrafeldolgozáskor ugyanaz (VIN + kezdés ms)
+    start_ms = np.round(t[first] * 1000).astype('int64').tolist()
+    start_time = pa.array(ns[first] // 1000, pa.timestamp('us'))
+
+    return pa.Table.from_arrays([
+        pa.array(vin, pa.string()),
+        pa.array([f"{v}-{ms}" for v, ms in zip(vin, start_ms)], pa.string()),
+        start_time,
+        pa.array(ns[last] // 1000, pa.timestamp('us')),
+        pa.array(ns[min_row] // 1000, pa.timestamp('us')),
+        pa.array(values[min_row]),
+        pa.array(refined, from_pandas=True),  # NaN -> null: nincs érvényes csúcs
+        pa.array(sample_count.astype('int64')),
+        pa.array(np.where(by_rpm, 'rpm', 'voltage_drop').tolist(), pa.string()),
+        pc.strftime(start_time, format='%Y-%m-%d'),
+    ], schema=CRANK_EVENT_SCHEMA)
+
+
+def segment_crank_events(df, config: ProcessorConfig):
+    """segment_crank_table() pandas DataFrame be- és kimenettel (elemzés, notebookok)."""
+    import pandas as pd
+
+    if 'pid_code' not in df.columns:
+        return pd.DataFrame(columns=CRANK_EVENT_COLUMNS)
+    table = pa.Table.from_pandas(df[['pid_code', 'value', 'timestamp', 'vin']], preserve_index=False)
+    return segment_crank_table(table, config).to_pandas()
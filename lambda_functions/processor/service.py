@@ -1,69 +1,120 @@
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, List, Optional, Tuple
 from config import ProcessorConfig
-from domain_math import ParabolicInterpolator
+from crank_index import CrankEventIndex
+from rollups import build_rollup, resolution_seconds, rollup_prefix
+from segmentation import CRANK_EVENT_COLUMNS, segment_crank_table
 from repository import S3Repository
 
 class ETLService:
-    def __init__(self, repo: S3Repository, config: ProcessorConfig):
+    def __init__(self, repo: S3Repository, config: ProcessorConfig, index: Optional[CrankEventIndex] = None):
         self.repo = repo
         self.config = config
+        self.index = index
 
-    def _enrich_battery_health(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Kiszámolja és hozzáadja a 'refined_vmin' oszlopot."""
-        if 'pid_code' not in df.columns: 
-            return df
-        
-        df_out = df.copy()
-        df_out['refined_vmin'] = None
-        
-        # Feszültség adatok kiválasztása
-        v_mask = df_out['pid_code'] == 'BATTERY_VOLTAGE'
-        v_data = df_out[v_mask].sort_values('timestamp')
-
-        if len(v_data) >= self.config.min_points_for_interpolation:
-            min_idx = v_data['value'].idxmin()
-            
-            try:
-                # A minimum érték indexének pozíciója a szűrt listában
-                loc_idx = v_data.index.get_loc(min_idx)
-                
-                # Ha van bal és jobb szomszéd
-                if 0 < loc_idx < len(v_data) - 1:
-                    subset = v_data.iloc[loc_idx-1 : loc_idx+2]
-                    
-                    # Adatok konvertálása a matek modul számára
-                    # .view('int64') a gyorsabb numpy hozzáférésért
-                    points = list(zip(
-                        subset['timestamp'].view('int64') / self.config.time_unit_divisor,
-                        subset['value']
-                    ))
-                    
-                    refined_val = ParabolicInterpolator.find_vertex(points, self.config)
-                    
-                    if refined_val:
-                        df_out['refined_vmin'] = refined_val
-                        
-            except (KeyError, ValueError):
-                pass 
-                
-        return df_out
+    def _enrich_battery_health(self, table: pa.Table) -> pa.Table:
+        """
+        Indítási események VIN-enként (egy fájlban több indítás / több VIN is lehet).
+        Eseményenként egy sor saját 'refined_vmin'-nel, a crank-events táblába.
+        """
+        return segment_crank_table(table, self.config)
 
     def process_file(self, bucket: str, key: str):
-        # 1. Betöltés
-        df = self.repo.fetch_json_as_df(bucket, key)
-        if df.empty: return
+        failed = self.process_batch([(bucket, key)])
+        if failed:
+            raise RuntimeError(f"Bronze object could not be fetched: s3://{bucket}/{key}")
+
+    @staticmethod
+    def _with_date(table: pa.Table) -> pa.Table:
+        """Dátum oszlop a particionáláshoz (objektumonként, amint megérkezett)."""
+        if 'date' in table.column_names:
+            return table
+        return table.append_column('date', pc.strftime(table.column('timestamp'), format='%Y-%m-%d'))
+
+    def _is_edge_event(self, key: str) -> bool:
+        return key.startswith(f"{self.config.edge_events_prefix}/")
+
+    def _fetch_all(self, objects: List[Tuple[str, str]]) -> Tuple[List[pa.Table], List[Tuple[str, str]]]:
+        """
+        Párhuzamos letöltés korlátos szálkészletből: a hívás ideje nagyrészt
+        S3 GET várakozás, a JSON/frame dekódolás (pyarrow) elengedi a GIL-t.
+        Az events/ alatti edge crank-event rekordok crank-events sorokká alakulnak.
+        Visszaad: (táblák a bemeneti sorrendben, sikertelen objektumok).
+        """
+        tables: List[pa.Table] = [None] * len(objects)
+        failed = []
+        workers = max(1, min(self.config.fetch_concurrency, len(objects)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.repo.fetch_edge_events if self._is_edge_event(key) else self.repo.fetch_table,
+                                   bucket, key): i
+                       for i, (bucket, key) in enumerate(objects)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    tables[i] = self._with_date(future.result())
+                except Exception as e:
+                    bucket, key = objects[i]
+                    print(f"ERROR: Failed to fetch s3://{bucket}/{key}: {e}")
+                    failed.append(objects[i])
+        # Bemeneti sorrend: azonos időbélyegeknél is determinisztikus kimenet
+        return [t for t in tables if t is not None and t.num_rows], failed
+
+    def process_batch(self, objects: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Több Bronze objektum egy menetben (SQS köteg): párhuzamos letöltés, a sorok
+        összefűzve, így partíciónként (vin, date) kötegenként egy Parquet fájl készül.
+        Végig Arrow táblán fut, pandas nélkül (hideg indítás).
+
+        A le nem tölthető objektumokat visszaadja (részleges kötegbeli hiba),
+        a többi ettől még kiíródik. Írási hiba kivételt dob: az egész köteg újrapróbálódik.
+
+        Az edge crank-event rekordok (Bronze events/) ugyanebbe a crank-events
+        táblába és indexbe kerülnek: indítás közben nyers minta nem megy fel.
+        """
+        # 1. Betöltés (ismételt S3 értesítés ugyanarra a kulcsra: egyszer)
+        objects = list(dict.fromkeys(objects))
+        fetched, failed = self._fetch_all(objects)
+        if not fetched: return failed
+        tables = [t for t in fetched if 'pid_code' in t.column_names]
+        edge_events = [t.select(CRANK_EVENT_COLUMNS) for t in fetched if 'pid_code' not in t.column_names]
+
+        crank_parts, raw_files, rows = edge_events, [], 0
+        if tables:
+            table = pa.concat_tables(tables)
+            rows = table.num_rows
+
+            # 2. Transzformáció (időrend a fájlon belül)
+            table = table.sort_by([('vin', 'ascending'), ('timestamp', 'ascending')])
 
-        # 2. Transzformáció (Dátum oszlop a particionáláshoz)
-        if 'timestamp' in df.columns and 'date' not in df.columns:
-            df['date'] = df['timestamp'].dt.date.astype(str)
+            # 3. Gazdagítás (Üzleti logika)
+            crank_parts = [self._enrich_battery_health(table)] + edge_events
 
-        # 3. Gazdagítás (Üzleti logika)
-        df_enriched = self._enrich_battery_health(df)
+            # 4. Mentés: nyers sorok + kompakt crank-events tábla mellettük
+            raw_files = self.repo.save_table_to_parquet(
+                table,
+                prefix=self.config.silver_prefix,
+                compression=self.config.parquet_compression
+            )
+            # 5. Rollupok (1 s / 1 min / 1 h): kötegenként összevonható részaggregátum-fájlok
+            for name in self.config.rollup_resolutions:
+                self.repo.save_table_to_parquet(
+                    build_rollup(table, resolution_seconds(name), self.config),
+                    prefix=rollup_prefix(self.config, name),
+                    compression=self.config.parquet_compression
+                )
 
-        # 4. Mentés
-        self.repo.save_dataframe_to_parquet(
-            df_enriched, 
-            prefix=self.config.silver_prefix, 
+        crank_events = pa.concat_tables(crank_parts)
+        self.repo.save_table_to_parquet(
+            crank_events,
+            prefix=self.config.crank_events_prefix,
             compression=self.config.parquet_compression
         )
-        print(f"ETL Success: {key} -> Parquet")
+        # 6. VIN/dátum index frissítése (az adatfájlok után: csak létező fájlra mutat)
+        if self.index is not None:
+            self.index.record_batch(raw_files, crank_events)
+        print(f"ETL Success: {len(fetched)} objects -> Parquet ({rows} rows, {crank_events.num_rows} crank events"
+              + (f", {sum(t.num_rows for t in edge_events)} from the edge" if edge_events else "") + ")"
+              + (f", {len(failed)} failed" if failed else ""))
+        return failed
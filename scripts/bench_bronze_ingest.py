@@ -0,0 +1,57 @@
+import os
+import sys
+import json
+import time
+import random
+import pandas as pd
+
+# A Lambda modulok a processor könyvtárból importálnak (config, domain)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+
+from bronze_reader import read_bronze_json, to_dataframe
+
+# Nagy utazásfájl: egy NDJSON köteg v1.3 üzenetekkel (~2 óra 10 Hz-en)
+MESSAGES = 72_000
+
+def make_trip(n: int, seed: int = 42) -> bytes:
+    rng = random.Random(seed)
+    t0 = pd.Timestamp("2026-01-10 07:00:00")
+    lines = []
+    for i in range(n):
+        ts = (t0 + pd.Timedelta(milliseconds=100 * i)).isoformat()
+        rpm, volts = rng.randint(700, 3000), round(rng.uniform(13.8, 14.4), 2)
+        lines.append(json.dumps({
+            "vin": "BENCHVIN00000001", "timestamp": ts, "rpm": rpm, "voltage": volts,
+            "pids": [
+                {"pid_code": "RPM", "value": rpm, "timestamp": ts},
+                {"pid_code": "BATTERY_VOLTAGE", "value": volts, "timestamp": ts}
+            ]
+        }))
+    return "\n".join(lines).encode("utf-8")
+
+def run_pandas(blob: bytes) -> pd.DataFrame:
+    """Previous path: json.loads per message + json_normalize + to_datetime on strings."""
+    records = [json.loads(line) for line in blob.decode("utf-8").splitlines()]
+    df = pd.json_normalize(records, record_path=['pids'], meta=['vin'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')  # isoformat() drops .000000
+    return df
+
+if __name__ == "__main__":
+    blob = make_trip(MESSAGES)
+    print(f"📥 Bronze ingestion benchmark: {MESSAGES:,} messages, {len(blob) / 1e6:.1f} MB")
+    print("-" * 70)
+
+    t = time.process_time()
+    reference = run_pandas(blob)
+    pandas_s = time.process_time() - t
+    print(f"{'json + normalize':<18} | {pandas_s:>7.2f} s CPU | {len(reference) / pandas_s:>12,.0f} rows/s")
+
+    t = time.process_time()
+    df = to_dataframe(read_bronze_json(blob))
+    arrow_s = time.process_time() - t
+    print(f"{'Arrow reader':<18} | {arrow_s:>7.2f} s CPU | {len(df) / arrow_s:>12,.0f} rows/s "
+          f"({pandas_s / arrow_s:.0f}x)")
+
+    same = (list(df['value']) == list(reference['value']) and
+            list(df['timestamp']) == list(reference['timestamp']))
+    print(f"Results: {len(df):,} rows, identical values and timestamps: {same}")
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import numpy as np
+
+# A Lambda modulok a processor könyvtárból importálnak (config, domain)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+
+from config import ProcessorConfig
+from domain.math_services import CrankingAnalysisContext, PlateauAveragingProcessor
+
+# Flotta-újrafeldolgozás: crank eseményenként ~1.5 s AT RV rögzítés ~25 Hz-en
+EVENTS = 100_000
+SAMPLES_PER_EVENT = (20, 60)
+
+def make_events(n: int, seed: int = 42):
+    """Synthetic cranks as flat arrays + offsets: inrush dip, rippling plateau, recovery."""
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(*SAMPLES_PER_EVENT, size=n)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    event = np.repeat(np.arange(n), counts)
+    position = np.arange(offsets[-1]) - offsets[event]
+
+    t0 = 1_700_000_000 + rng.uniform(0, 3e7, size=n)
+    times = t0[event] + position * 0.04 + rng.uniform(0, 0.005, size=len(event))
+    plateau = rng.uniform(7.5, 11.0, size=n)
+    volts = plateau[event] + 0.15 * np.sin(position * 1.7) + rng.normal(0, 0.05, size=len(event))
+    volts[position < 3] -= 1.5  # Inrush
+    return times, volts, offsets
+
+def run_loop(analyzer, times, volts, offsets, config):
+    """Current path: one Python list of (t, v) tuples per crank."""
+    out = np.full(len(offsets) - 1, np.nan)
+    for i in range(len(out)):
+        points = list(zip(times[offsets[i]:offsets[i + 1]].tolist(), volts[offsets[i]:offsets[i + 1]].tolist()))
+        value = analyzer.analyze(points, config)
+        if value is not None:
+            out[i] = value
+    return out
+
+if __name__ == "__main__":
+    config = ProcessorConfig()
+    analyzer = CrankingAnalysisContext(PlateauAveragingProcessor())
+    times, volts, offsets = make_events(EVENTS)
+    print(f"🔋 Cranking analysis benchmark: {EVENTS:,} events, {len(times):,} samples")
+    print("-" * 70)
+
+    t = time.perf_counter()
+    looped = run_loop(analyzer, times, volts, offsets, config)
+    loop_s = time.perf_counter() - t
+    print(f"{'Scalar loop':<18} | {loop_s:>7.2f} s | {EVENTS / loop_s:>12,.0f} events/s")
+
+    t = time.perf_counter()
+    batched = analyzer.analyze_batch(times, volts, offsets, config)
+    batch_s = time.perf_counter() - t
+    print(f"{'Vectorised batch':<18} | {batch_s:>7.2f} s | {EVENTS / batch_s:>12,.0f} events/s "
+          f"({loop_s / batch_s:.0f}x)")
+
+    same_gate = np.array_equal(np.isnan(looped), np.isnan(batched))
+    max_diff = np.nanmax(np.abs(looped - batched))
+    print(f"Results: gate decisions identical: {same_gate} | max plateau difference {max_diff:.1e} V")
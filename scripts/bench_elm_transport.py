@@ -0,0 +1,208 @@
+"""
+Round-trip latency benchmark: python-obd query pipeline vs. the lean
+ELM327 transport, both driven through RealOBDProvider against a simulated
+ELM327 serial adapter (CAN 11/500, honours ATE/ATH/ATS/ATL).
+Also reports time-to-first-sample for a cold scan vs. a warm start from
+the connection cache.
+
+Example:
+    python scripts/bench_elm_transport.py --iterations 2000 --baud 38400
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from unittest import mock
+
+# Biztosítjuk, hogy a projekt gyökere benne legyen a python útvonalban
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import obd
+from hardware.src.providers.real import RealOBDProvider
+from hardware.src.connection_cache import ConnectionCache
+
+# Mode 01 PID -> payload bytes (50 km/h, 2000 RPM, 90 °C)
+PID_VALUES = {0x0D: bytes([50]), 0x0C: bytes([0x1F, 0x40]), 0x05: bytes([130])}
+
+
+class SimulatedElmSerial:
+    """
+    Minimal pyserial stand-in for an ELM327 v1.5 on a CAN (11 bit, 500 kbaud) car.
+    `baud` > 0 adds the UART transfer time of every request and reply,
+    `ecu_latency` the time the ECU takes to answer an OBD request.
+    """
+    def __init__(self, baud: int = 0, ecu_latency: float = 0.0):
+        self.baud = baud
+        self.baudrate = baud or 38400
+        self.ecu_latency = ecu_latency
+        self.timeout = 10
+        self.portstr = "sim://elm327"
+        self.is_open = True
+        self.echo = self.headers = self.spaces = self.linefeeds = True
+        self._out = b""
+        self._last = b""
+
+    # --- pyserial surface used by python-obd and ElmTransport ---
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._out)
+
+    def read(self, size: int = 1) -> bytes:
+        data, self._out = self._out[:size], self._out[size:]
+        return data
+
+    def reset_input_buffer(self):
+        self._out = b""
+
+    flushInput = reset_input_buffer
+
+    def flush(self):
+        pass
+
+    flushOutput = reset_output_buffer = flush
+
+    def close(self):
+        self.is_open = False
+
+    def write(self, data: bytes) -> int:
+        command = data.strip().replace(b" ", b"").upper()
+        if data.startswith(b"\x7f"):
+            reply = ["?"]  # python-obd baud rate probe
+        else:
+            if not command:
+                command = self._last  # Bare CR repeats the previous request
+            self._last = command
+            reply = self._respond(command.decode())
+
+        newline = "\r\n" if self.linefeeds else "\r"
+        text = (data.strip().decode(errors="ignore") + newline if self.echo else "")
+        text += newline.join(reply) + newline + newline + ">"
+        self._out = text.encode()
+
+        if self.baud:
+            time.sleep((len(data) + len(self._out)) * 10 / self.baud)
+        return len(data)
+
+    # --- ELM327 behaviour ---
+
+    def _respond(self, command: str) -> list:
+        if command.startswith("AT"):
+            return self._at(command[2:])
+        if not command.startswith("01"):
+            return ["NO DATA"]
+
+        pids = command[2:]
+        if len(pids) % 2:
+            pids = pids[:-1]  # Response-count suffix
+        data = bytearray([0x41])
+        for i in range(0, len(pids), 2):
+            pid = int(pids[i:i + 2], 16)
+            if pid == 0x00:
+                mask = sum(1 << (32 - p) for p in PID_VALUES)
+                data += bytes([0x00]) + mask.to_bytes(4, "big")
+            elif pid in PID_VALUES:
+                data += bytes([pid]) + PID_VALUES[pid]
+        if len(data) == 1:
+            return ["NO DATA"]
+
+        if self.ecu_latency:
+            time.sleep(self.ecu_latency)
+        return self._can_frames(bytes(data))
+
+    def _at(self, command: str) -> list:
+        flags = {"E": "echo", "H": "headers", "S": "spaces", "L": "linefeeds"}
+        if command == "Z":
+            self.echo = self.headers = self.spaces = self.linefeeds = True
+            return ["ELM327 v1.5"]
+        if command == "RV":
+            return ["12.6V"]
+        if command == "DPN":
+            return ["A6"]
+        if len(command) == 2 and command[0] in flags and command[1] in "01":
+            setattr(self, flags[command[0]], command[1] == "1")
+        return ["OK"]
+
+    def _hex(self, data) -> str:
+        return (" " if self.spaces else "").join(f"{b:02X}" for b in data)
+
+    def _can_frames(self, data: bytes) -> list:
+        if len(data) <= 7:
+            frame = bytes([len(data)]) + data
+            return [("7E8 " if self.spaces else "7E8") + self._hex(frame) if self.headers else self._hex(data)]
+
+        chunks = [data[:6]] + [data[i:i + 7] for i in range(6, len(data), 7)]
+        if not self.headers:
+            return [f"{len(data):03X}"] + [f"{n}:" + (" " if self.spaces else "") + self._hex(c)
+                                           for n, c in enumerate(chunks)]
+        sep = " " if self.spaces else ""
+        first = bytes([0x10 | (len(data) >> 8), len(data) & 0xFF]) + chunks[0]
+        frames = ["7E8" + sep + self._hex(first)]
+        for n, chunk in enumerate(chunks[1:], start=1):
+            frames.append("7E8" + sep + self._hex(bytes([0x20 | (n & 0x0F)]) + chunk.ljust(7, b"\x00")))
+        return frames
+
+
+def connect(lean: bool, baud: int, ecu_latency: float, cache: ConnectionCache = None) -> RealOBDProvider:
+    adapter = SimulatedElmSerial(baud, ecu_latency)
+    provider = RealOBDProvider("BENCH-VIN", port="sim://elm327", lean_transport=lean, cache=cache)
+    with mock.patch("serial.serial_for_url", return_value=adapter):
+        if not provider.connect():
+            raise SystemExit("❌ Simulated adapter did not connect")
+    return provider
+
+
+def time_to_first_sample(args):
+    """connect() + first fetch_data(), as after an ignition-on."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ConnectionCache(os.path.join(tmp, "obd_connection.json"))
+        for label in ("cold scan", "warm start"):
+            t0 = time.perf_counter()
+            provider = connect(True, args.baud, args.ecu_ms / 1000, cache)
+            provider.fetch_data()
+            print(f"{'Time to first sample (' + label + ')':<34} | {(time.perf_counter() - t0) * 1000:>9.1f} ms")
+
+
+def measure(label: str, fn, iterations: int, baseline: float = None) -> float:
+    fn()  # Warm-up
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call = (time.perf_counter() - t0) / iterations
+    speedup = f" | x{baseline / per_call:.1f}" if baseline else ""
+    print(f"{label:<34} | {per_call * 1e6:>9.1f} µs/round-trip | {1 / per_call:>9.0f} Hz{speedup}")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ELM327 transport latency benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--baud", type=int, default=0, help="simulated UART rate (0 = host overhead only)")
+    parser.add_argument("--ecu-ms", type=float, default=0.0, help="simulated ECU answer time")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    legacy = connect(False, args.baud, args.ecu_ms / 1000)
+    lean = connect(True, args.baud, args.ecu_ms / 1000)
+    assert lean.transport is not None and legacy.transport is None
+    assert lean.fetch_data().rpm == legacy.fetch_data().rpm == 2000.0
+
+    print(f"📊 ELM327 round-trip benchmark | {args.iterations} iterations | "
+          f"baud={args.baud or 'off'} | ecu={args.ecu_ms} ms")
+    print("-" * 80)
+    for label, call in (
+        ("AT RV", lambda p: p.fetch_raw_voltage()),
+        ("Single PID (RPM)", lambda p: p.query_pid("rpm")),
+        ("Full sample (batch + AT RV)", lambda p: p.fetch_data()),
+    ):
+        base = measure(f"{label} [python-obd]", lambda: call(legacy), args.iterations)
+        measure(f"{label} [lean]", lambda: call(lean), args.iterations, base)
+    print("-" * 80)
+    time_to_first_sample(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import statistics
+import subprocess
+
+PROCESSOR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor")
+BRONZE_BUCKET = "smartdrive-telemetry-bronze"
+SILVER_BUCKET = "smartdrive-telemetry-silver"
+RUNS = 5
+
+# Friss interpreter = hideg indítás: import, majd az első és a második (meleg) hívás
+PROBE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+import index
+t1 = time.perf_counter()
+event = json.loads(sys.argv[1])
+index.lambda_handler(event, None)
+t2 = time.perf_counter()
+index.lambda_handler(event, None)
+t3 = time.perf_counter()
+heavy = [m for m in ("pandas", "awswrangler", "boto3") if m in sys.modules]
+print(json.dumps({"import": t1 - t0, "first": t2 - t1, "warm": t3 - t2, "loaded": heavy}))
+"""
+
+# Az előző függőségkészlet importja (pandas + awswrangler + boto3), összehasonlításnak
+BASELINE = r"""
+import time, json
+t0 = time.perf_counter()
+import pandas, awswrangler, boto3
+print(json.dumps({"import": time.perf_counter() - t0}))
+"""
+
+def write_bronze(root: str, n_files: int = 20) -> dict:
+    """Bronze NDJSON fájlok a helyi S3 helyettesítőbe + az SQS köteg esemény."""
+    records = []
+    for i in range(n_files):
+        key = f"raw/BENCHVIN{i % 4:08d}/{1768028400000 + i}.json"
+        lines = []
+        for s in range(50):
+            ts = f"2026-01-10T07:{i:02d}:{s:02d}.000000"
+            volts = 9.6 if s == 10 else 12.6
+            lines.append(json.dumps({"vin": f"BENCHVIN{i % 4:08d}", "timestamp": ts, "pids": [
+                {"pid_code": "RPM", "value": 250 if s == 10 else 0, "timestamp": ts},
+                {"pid_code": "BATTERY_VOLTAGE", "value": volts, "timestamp": ts}]}))
+        path = os.path.join(root, BRONZE_BUCKET, *key.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("\n".join(lines))
+        notification = {"Records": [{"s3": {"bucket": {"name": BRONZE_BUCKET}, "object": {"key": key}}}]}
+        records.append({"messageId": str(i), "body": json.dumps(notification)})
+    return {"Records": records}
+
+def run(code: str, *args, env=None) -> dict:
+    out = subprocess.run([sys.executable, "-c", code, *args], cwd=PROCESSOR_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    root = tempfile.mkdtemp()
+    try:
+        event = write_bronze(root)
+        env = dict(os.environ, SMARTDRIVE_LOCAL_S3_ROOT=root, SILVER_BUCKET_NAME=SILVER_BUCKET)
+        probes = [run(PROBE, json.dumps(event), env=env) for _ in range(RUNS)]
+        baseline = [run(BASELINE)["import"] for _ in range(RUNS)]
+    finally:
+        shutil.rmtree(root)
+
+    med = lambda key: statistics.median(p[key] for p in probes) * 1000
+    print(f"🧊 Silver processor cold start, median of {RUNS} fresh interpreters "
+          f"({len(event['Records'])} bronze objects per batch)")
+    print("-" * 70)
+    print(f"{'import index':<28} | {med('import'):>8.0f} ms")
+    print(f"{'first invocation':<28} | {med('first'):>8.0f} ms  (pyarrow loads here)")
+    print(f"{'warm invocation':<28} | {med('warm'):>8.0f} ms")
+    print(f"{'cold total':<28} | {med('import') + med('first'):>8.0f} ms")
+    print(f"{'prev. deps import only':<28} | {statistics.median(baseline) * 1000:>8.0f} ms  (pandas + awswrangler + boto3)")
+    # A pyarrow az első pa.array()-nál betölti a pandast, ha telepítve van (AWSSDKPandas layer);
+    # az ETL útvonal maga nem használ pandas API-t
+    print(f"Heavy modules in sys.modules after two batches: {probes[0]['loaded'] or 'none'}")
@@ -0,0 +1,49 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# Biztosítjuk, hogy a projekt gyökere benne legyen a python útvonalban
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hardware.src.domain import TelemetryData, TelemetryBuffer
+
+# 1 óra 10 Hz-en
+SAMPLES = 36_000
+VIN = "TEST-VIN-BENCH"
+
+def run_dataclass_path(n: int):
+    """Current path: one frozen TelemetryData per poll, kept for the trip."""
+    trip = []
+    for i in range(n):
+        trip.append(TelemetryData(VIN, 1_700_000_000 + i, 50.0, 2000.0 + i % 7, 14.1, 85.0))
+    return trip
+
+def run_buffer_path(n: int):
+    """New path: samples written straight into preallocated columns."""
+    buffer = TelemetryBuffer(VIN, capacity=n)
+    for i in range(n):
+        buffer.append(1_700_000_000 + i, 50.0, 2000.0 + i % 7, 14.1, 85.0)
+    return buffer
+
+def measure(label: str, fn):
+    gc.collect()
+    tracemalloc.start()
+    start_blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+    t0 = time.perf_counter()
+    result = fn(SAMPLES)
+    elapsed = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    live_blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename")) - start_blocks
+    tracemalloc.stop()
+
+    print(f"{label:<22} | {elapsed * 1000:>8.1f} ms | {current / 1024:>9.1f} KiB live | "
+          f"{peak / 1024:>9.1f} KiB peak | {live_blocks:>8} live blocks")
+    return result
+
+if __name__ == "__main__":
+    print(f"📊 Telemetry storage benchmark: {SAMPLES} samples (1 h @ 10 Hz)")
+    print("-" * 90)
+    measure("TelemetryData list", run_dataclass_path)
+    measure("TelemetryBuffer", run_buffer_path)
@@ -0,0 +1,332 @@
+"""
+Fleet-scale load generator for the ingestion pipeline
+(IoT rule -> bronze S3 -> silver Lambda -> gold Lambda).
+
+Spins up thousands of SimulatedOBDProvider instances across a process
+pool and publishes through a pluggable sink:
+    fs:/tmp/bronze          local bronze directory (raw/{vin}/{ts}.json, like the IoT rule)
+    mqtt://localhost:1883   local MQTT broker (requires paho-mqtt)
+
+Every message carries its generation time (ms, UTC) as the sample timestamp.
+"Publish latency" is generation -> sink ack (fs: file written, mqtt: PUBACK).
+With --process (fs sink only) the silver ETL (ETLService on the local S3
+stand-in, SMARTDRIVE_LOCAL_S3_ROOT) runs over the bronze directory while the
+fleet publishes, and the end-to-end lag is measured at the silver output:
+silver Parquet write time minus the generation time of each message in it.
+
+Example:
+    python scripts/load_generator.py --vehicles 10000 --workers 8 --duration 60 --sink fs:/tmp/bronze --process
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+# Biztosítjuk, hogy a projekt gyökere benne legyen a python útvonalban
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+PROCESSOR_DIR = os.path.join(ROOT, "lambda_functions", "processor")
+
+from hardware.src.providers.simulated import SimulatedOBDProvider
+from lambda_functions.processor.frame_codec import encode_frame
+
+SCENARIO_MIX = {"NORMAL_START": 0.7, "CRANK_FAIL": 0.15, "VAMPIRE_DRAIN": 0.15}
+LAG_SAMPLES_PER_WORKER = 5000
+SQS_BATCH_SIZE = 10  # Bronze objects per ETL call, like the SQS trigger default
+ARRIVALS_DIR = "_arrivals"  # fs sink: one key log per process, like the S3 -> SQS notification
+
+
+class FilesystemBronzeSink:
+    """
+    Writes each message like the IoT S3 action does: raw/{vin}/{timestamp}.json.
+    Every written key is also appended to _arrivals/{pid}.log, so a consumer
+    picks up new objects without listing the bronze tree.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._seq = 0
+        os.makedirs(os.path.join(root, ARRIVALS_DIR), exist_ok=True)
+        self._arrivals = open(os.path.join(root, ARRIVALS_DIR, f"{os.getpid()}.log"), "a")
+
+    def publish(self, vin: str, payload: bytes, binary: bool):
+        directory = os.path.join(self.root, "raw", vin)
+        os.makedirs(directory, exist_ok=True)
+        self._seq += 1
+        name = f"{int(time.time() * 1000)}-{os.getpid()}-{self._seq}.{'sdf' if binary else 'json'}"
+        path = os.path.join(directory, name)
+        # Atomikus csere: a párhuzamosan futó ETL nem lát félig írt objektumot
+        with open(path + ".tmp", "wb") as f:
+            f.write(payload)
+        os.replace(path + ".tmp", path)
+        self._arrivals.write(f"raw/{vin}/{name}\n")
+        self._arrivals.flush()
+
+    def close(self):
+        self._arrivals.close()
+
+
+class MqttSink:
+    """Publishes to vehicle/{vin}/telemetry (or /frames) on a local broker with QoS 1."""
+    def __init__(self, host: str, port: int):
+        import paho.mqtt.client as mqtt  # Optional dependency, only needed for this sink
+        self.client = mqtt.Client(client_id=f"smartdrive-loadgen-{os.getpid()}")
+        self.client.connect(host, port)
+        self.client.loop_start()
+
+    def publish(self, vin: str, payload: bytes, binary: bool):
+        topic = f"vehicle/{vin}/{'frames' if binary else 'telemetry'}"
+        self.client.publish(topic, payload, qos=1).wait_for_publish()
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def make_sink(spec: str):
+    if spec.startswith("fs:"):
+        return FilesystemBronzeSink(spec[3:])
+    if spec.startswith("mqtt://"):
+        host, _, port = spec[len("mqtt://"):].partition(":")
+        return MqttSink(host, int(port or 1883))
+    raise ValueError(f"Unknown sink: {spec}")
+
+
+def build_payload(vin: str, data, fmt: str, generated: float) -> bytes:
+    """
+    Same v1.3 layout as SmartDriveApp._ingest_to_cloud (or one-sample SDF1 frame).
+    The sample timestamp is the generation time (ms, UTC): it survives into the
+    silver rows, where the end-to-end lag is measured.
+    """
+    ts_ms = round(generated * 1000)
+    if fmt == "sdf":
+        return encode_frame(vin, [(ts_ms, {"RPM": data.rpm, "BATTERY_VOLTAGE": data.voltage})])
+
+    ts_str = datetime.fromtimestamp(ts_ms / 1000, timezone.utc).isoformat(timespec="milliseconds")
+    return json.dumps({
+        "vin": vin,
+        "timestamp": ts_str,
+        "rpm": data.rpm,
+        "voltage": data.voltage,
+        "pids": [
+            {"pid_code": "RPM", "value": data.rpm, "timestamp": ts_str},
+            {"pid_code": "BATTERY_VOLTAGE", "value": data.voltage, "timestamp": ts_str}
+        ]
+    }).encode("utf-8")
+
+
+def run_worker(worker_id: int, first_vehicle: int, n_vehicles: int, duration: float,
+               interval: float, sink_spec: str, fmt: str, seed: int) -> dict:
+    """One process: n_vehicles simulated gateways publishing every `interval` seconds."""
+    logging.disable(logging.INFO)  # 10k "Initialized" lines would dominate the run
+    rng = random.Random(seed + worker_id)
+    scenarios, weights = zip(*SCENARIO_MIX.items())
+
+    providers = []
+    for i in range(first_vehicle, first_vehicle + n_vehicles):
+        provider = SimulatedOBDProvider(f"LOADGEN{i:09d}", scenario=rng.choices(scenarios, weights)[0])
+        # Szétszórt indítások, hogy ne egyszerre crankeljen az egész flotta
+        provider.start_time -= rng.uniform(0, 10)
+        providers.append(provider)
+
+    sink = make_sink(sink_spec)
+    messages = payload_bytes = overruns = 0
+    lags = []
+    start = time.monotonic()
+    next_tick = start
+
+    while time.monotonic() - start < duration:
+        for provider in providers:
+            generated = time.time()
+            payload = build_payload(provider.vin, provider.fetch_data(), fmt, generated)
+            sink.publish(provider.vin, payload, fmt == "sdf")
+            lag = time.time() - generated  # Publish latency: until the sink acked
+
+            messages += 1
+            payload_bytes += len(payload)
+            # Reservoir sample of publish latencies for the percentiles
+            if len(lags) < LAG_SAMPLES_PER_WORKER:
+                lags.append(lag)
+            else:
+                j = rng.randrange(messages)
+                if j < LAG_SAMPLES_PER_WORKER:
+                    lags[j] = lag
+
+        next_tick += interval
+        sleep = next_tick - time.monotonic()
+        if sleep > 0:
+            time.sleep(sleep)
+        else:
+            overruns += 1  # The fleet did not fit into one interval: generator/sink is the bottleneck
+
+    sink.close()
+    return {
+        "messages": messages,
+        "bytes": payload_bytes,
+        "overruns": overruns,
+        "elapsed": time.monotonic() - start,
+        "lags": lags,
+    }
+
+
+class SilverPipeline:
+    """
+    The silver ETL over the fs sink's bronze directory, in local S3 mode:
+    <parent>/<bronze>/raw/... is the bronze bucket, <parent>/<bronze>-silver the
+    silver one. New bronze objects come from the sinks' arrival logs (read
+    incrementally) and are processed in SQS-sized batches while the fleet
+    publishes; objects from earlier runs are skipped.
+    """
+    def __init__(self, bronze_root: str, batch_size: int = SQS_BATCH_SIZE):
+        parent, self.bucket = os.path.split(os.path.abspath(bronze_root))
+        os.environ["SMARTDRIVE_LOCAL_S3_ROOT"] = parent
+        sys.path.append(PROCESSOR_DIR)
+        # A processzor modulok laposan importálnak (mint a Lambda csomagban)
+        from config import ProcessorConfig
+        from repository import S3Repository
+        from service import ETLService
+
+        self.config = ProcessorConfig()
+        self.silver_root = os.path.join(parent, f"{self.bucket}-silver")
+        repo = S3Repository(f"{self.bucket}-silver")
+        save = repo.save_table_to_parquet
+
+        def recording_save(table, prefix, **kwargs):
+            written = save(table, prefix, **kwargs)
+            if prefix == self.config.silver_prefix:
+                self._written.extend(written)
+            return written
+
+        # A köteg által kiírt nyers Silver fájlok (vin, date, kulcs, szelet): listázás nélkül
+        repo.save_table_to_parquet = recording_save
+        self.etl = ETLService(repo, self.config)
+        self.batch_size = batch_size
+
+        self.arrivals = os.path.join(bronze_root, ARRIVALS_DIR)
+        os.makedirs(self.arrivals, exist_ok=True)
+        # Korábbi futások naplói: a meglévő tartalom kimarad
+        self._offsets = {name: os.path.getsize(os.path.join(self.arrivals, name))
+                         for name in os.listdir(self.arrivals)}
+        self._written = []
+        self.objects = self.failed = 0
+        self.lags = []
+
+    def _new_keys(self):
+        """Complete lines appended to the arrival logs since the last poll."""
+        keys = []
+        for name in sorted(os.listdir(self.arrivals)):
+            with open(os.path.join(self.arrivals, name), "rb") as f:
+                f.seek(self._offsets.get(name, 0))
+                data = f.read()
+            complete = data[:data.rfind(b"\n") + 1]  # A félig írt utolsó sor a következő körre marad
+            self._offsets[name] = self._offsets.get(name, 0) + len(complete)
+            keys += complete.decode("utf-8").split()
+        return keys
+
+    def poll(self) -> int:
+        """Processes the bronze objects that arrived since the last poll."""
+        new = self._new_keys()
+        for i in range(0, len(new), self.batch_size):
+            batch = new[i:i + self.batch_size]
+            self.failed += len(self.etl.process_batch([(self.bucket, key) for key in batch]))
+            self.objects += len(batch)
+            self._measure()
+        return len(new)
+
+    def _measure(self):
+        """Silver write time (file mtime) minus generation time, one value per message."""
+        import pyarrow.compute as pc
+        for _, _, key, part in self._written:
+            written = os.path.getmtime(os.path.join(self.silver_root, *key.split("/")))
+            # Üzenetenként egy feszültség minta: ennek az időbélyege a generálás ideje
+            generated = part.filter(pc.equal(part.column("pid_code"), "BATTERY_VOLTAGE")).column("timestamp")
+            self.lags.extend(written - us / 1e6 for us in generated.cast("int64").to_pylist())
+        self._written = []
+
+    def run(self, done: threading.Event):
+        """Polls until the generators are done and the arrival logs are drained."""
+        while True:
+            finished = done.is_set()
+            if not self.poll():
+                if finished:
+                    return
+                time.sleep(0.2)
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartDrive fleet load generator")
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--interval", type=float, default=5.0, help="per-vehicle publish interval (s)")
+    parser.add_argument("--sink", default="fs:/tmp/smartdrive-bronze")
+    parser.add_argument("--format", choices=("json", "sdf"), default="json")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--process", action="store_true",
+                        help="run the silver ETL over the fs sink and measure end-to-end lag")
+    args = parser.parse_args()
+    if args.process and not args.sink.startswith("fs:"):
+        parser.error("--process needs an fs: sink")
+
+    workers = max(1, min(args.workers, args.vehicles))
+    per_worker, extra = divmod(args.vehicles, workers)
+
+    print(f"🚚 {args.vehicles} vehicles | {workers} workers | {args.duration:.0f}s | "
+          f"every {args.interval}s | sink={args.sink} | format={args.format}")
+
+    results = []
+    pipeline = done = etl_thread = None
+    if args.process:
+        os.makedirs(args.sink[3:], exist_ok=True)
+        pipeline, done = SilverPipeline(args.sink[3:]), threading.Event()
+        etl_thread = threading.Thread(target=pipeline.run, args=(done,), name="silver-etl")
+        etl_thread.start()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        first = 0
+        for w in range(workers):
+            n = per_worker + (1 if w < extra else 0)
+            futures.append(pool.submit(run_worker, w, first, n, args.duration,
+                                       args.interval, args.sink, args.format, args.seed))
+            first += n
+        results = [f.result() for f in futures]
+    if pipeline:
+        done.set()
+        etl_thread.join()
+
+    messages = sum(r["messages"] for r in results)
+    total_bytes = sum(r["bytes"] for r in results)
+    elapsed = max(r["elapsed"] for r in results)
+    lags = [lag for r in results for lag in r["lags"]]
+    target_rate = args.vehicles / args.interval
+
+    print("-" * 70)
+    print(f"📨 Messages: {messages} | {messages / elapsed:,.0f} msg/s (target {target_rate:,.0f} msg/s)")
+    print(f"📦 Payload: {total_bytes / 1e6:.1f} MB | {total_bytes / max(messages, 1):.0f} B/msg | "
+          f"{total_bytes / elapsed / 1e6:.2f} MB/s")
+    print(f"⏱️  Publish latency: p50 {percentile(lags, 0.5) * 1000:.2f} ms | "
+          f"p95 {percentile(lags, 0.95) * 1000:.2f} ms | p99 {percentile(lags, 0.99) * 1000:.2f} ms")
+    print(f"⚠️  Tick overruns: {sum(r['overruns'] for r in results)}")
+    if pipeline:
+        lags = pipeline.lags
+        print(f"🥈 Silver: {pipeline.objects} objects ({pipeline.failed} failed) -> {len(lags)} messages")
+        print(f"⏱️  End-to-end lag (generated -> silver): p50 {percentile(lags, 0.5):.2f} s | "
+              f"p95 {percentile(lags, 0.95):.2f} s | p99 {percentile(lags, 0.99):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
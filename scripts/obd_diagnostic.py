@@ -7,6 +7,8 @@ import logging
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from hardware.src.providers.real import RealOBDProvider
+from hardware.src.domain import TelemetryBuffer
+from lambda_functions.processor.domain.plateau import PlateauEstimator
 
 # Konstansok szinkronizálva a v1.5-ös specifikációval
 V_VAMPIRE_THRESHOLD = 11.5  
@@ -26,10 +28,11 @@ def run_diagnostic():
     vin = "TEST-VIN-2025-REAL"
     target_port = "/dev/rfcomm0"
     provider = RealOBDProvider(vin=vin, port=target_port) 
+    buffer = TelemetryBuffer(vin)
 
     # --- Állapotváltozók a Vmin számításhoz ---
     cranking_start_time = None
-    cranking_samples = []
+    estimator = PlateauEstimator()  # Konstans memória, mintánként frissül
     vmin_plateau = None
 
     print("\n" + "="*70)
@@ -51,7 +54,7 @@ def run_diagnostic():
 
     try:
         while True:
-            data = provider.fetch_data()
+            data = provider.fetch_into(buffer)
             
             if data:
                 frame_count += 1
@@ -72,15 +75,13 @@ def run_diagnostic():
                 if 0 < data.rpm < CRANKING_RPM_LIMIT:
                     if cranking_start_time is None:
                         cranking_start_time = time.time()
-                        cranking_samples = []
+                        estimator.reset()
                         vmin_plateau = None
-                    
-                    elapsed = time.time() - cranking_start_time
-                    # 100ms blanking, majd 500ms gyűjtés (Phase 2)
-                    if 0.1 <= elapsed <= 0.6:
-                        cranking_samples.append(data.voltage)
-                    elif elapsed > 0.6 and cranking_samples and vmin_plateau is None:
-                        vmin_plateau = sum(cranking_samples) / len(cranking_samples)
+
+                    # 100ms blanking, majd 500ms gyűjtés (Phase 2) - a Lambdával közös algoritmus
+                    result = estimator.add(time.time(), data.voltage)
+                    if result is not None:
+                        vmin_plateau = result.plateau_voltage
                 
                 elif data.rpm >= CRANKING_RPM_LIMIT:
                     cranking_start_time = None # Reset indítás után
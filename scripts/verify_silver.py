@@ -1,60 +1,46 @@
-import boto3
-import pandas as pd
-import io
+import os
 import sys
 
+# A Lambda modulok a processor könyvtárból importálnak (config, crank_index)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+
+from config import ProcessorConfig
+from crank_index import CrankEventIndex
+from repository import object_store
+
 # Konfiguráció
 SILVER_BUCKET = "smartdrive-telemetry-silver"
 TEST_VIN = "TESTVIN123456789"
-# A dátumot a logjaid alapján állítom be (ma)
-PREFIX = f"processed_telemetry/vin={TEST_VIN}"
-
-def check_all_silver_files():
-    s3 = boto3.client('s3')
-    
-    print(f"🔍 Scanning ALL files in s3://{SILVER_BUCKET}/{PREFIX}...\n")
-    
-    response = s3.list_objects_v2(Bucket=SILVER_BUCKET, Prefix=PREFIX)
-    if 'Contents' not in response:
-        print("❌ No files found.")
+
+def check_all_silver_files(vin: str = TEST_VIN):
+    config = ProcessorConfig()
+    index = CrankEventIndex(object_store(SILVER_BUCKET), config)
+
+    print(f"🔍 Reading crank index s3://{SILVER_BUCKET}/{config.crank_index_prefix}/vin={vin}/...\n")
+
+    # Csak a VIN/dátum manifestek (néhány kis JSON), a telemetria fájlok letöltése nélkül
+    manifests = index.load(vin)
+    if not manifests:
+        print("❌ No index entries found. (Older data: run the compactor with {\"rebuild_index\": true})")
         return
 
     found_valid_crank = False
-    files = sorted(response['Contents'], key=lambda x: x['LastModified'])
-
-    print(f"📂 Found {len(files)} files. Checking for cranking data...\n")
-
-    for obj_meta in files:
-        key = obj_meta['Key']
-        
-        # Csak a ma délutáni fájlokat nézzük (optimalizálás)
-        # Ha sok fájl van, ez gyorsítja
-        
-        try:
-            # Letöltés memóriába
-            obj = s3.get_object(Bucket=SILVER_BUCKET, Key=key)
-            buffer = io.BytesIO(obj['Body'].read())
-            df = pd.read_parquet(buffer)
-            
-            # Keresünk olyan sort, ahol a refined_vmin NEM üres
-            if 'refined_vmin' in df.columns:
-                valid_rows = df[df['refined_vmin'].notnull()]
-                
-                if not valid_rows.empty:
-                    print(f"✅ FOUND CRANKING EVENT in file: {key.split('/')[-1]}")
-                    print("-" * 60)
-                    print(valid_rows[['timestamp', 'pid_code', 'value', 'refined_vmin']].to_string())
-                    print("-" * 60)
-                    print(f"🎯 Calculated V_min: {valid_rows.iloc[0]['refined_vmin']:.4f} V")
-                    found_valid_crank = True
-                    # Nem break-elünk, hátha több indítás is volt
-        
-        except Exception as e:
-            print(f"⚠️ Error reading {key}: {e}")
+    for date, manifest in manifests.items():
+        files = manifest["files"]
+        rows = sum(f["rows"] for f in files)
+        print(f"📂 {date}: {len(files)} telemetry files, {rows} rows, {len(manifest['crank_events'])} crank events")
+
+        # Egy sor = egy indítás (saját refined_vmin)
+        for event in manifest["crank_events"]:
+            if event.get("refined_vmin") is None:
+                continue
+            print(f"🎯 Calculated V_min: {event['refined_vmin']:.4f} V ({event['event_id']}, "
+                  f"{event['trigger']}, raw {event['vmin_raw']:.2f} V at {event['vmin_time']})")
+            found_valid_crank = True
 
     if not found_valid_crank:
-        print("\n❌ Scanned all files, but no valid cranking logic was triggered.")
+        print("\n❌ Index scanned, but no valid cranking logic was triggered.")
         print("Tip: Did the voltage drop below the previous measurement? (Convex parabola required)")
 
 if __name__ == "__main__":
-    check_all_silver_files()
+    check_all_silver_files(*sys.argv[1:2])
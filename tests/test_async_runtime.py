@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.app import SmartDriveApp
+from hardware.src.async_runtime import AsyncGatewayRuntime, OutboundQueue
+from hardware.src.domain import TelemetryData
+
+class FakeProvider:
+    """Steady engine (800 RPM, 14.1 V); every full sample is counted."""
+    def __init__(self):
+        self.polls = 0
+        self.metrics = None
+
+    def connect(self):
+        return True
+
+    def fetch_into(self, buffer):
+        self.polls += 1
+        return buffer.append(time.time(), 50.0, 800.0, 14.1, 85.0)
+
+    def fetch_raw_voltage(self):
+        return 14.1
+
+class BlockingPublisher:
+    """Every publish hangs until released (network backpressure)."""
+    framing = False
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def _call(self, name, *args):
+        self.release.wait()
+        self.calls.append((name,) + args)
+
+    def publish_telemetry(self, payload):
+        self._call("telemetry", payload)
+
+    def publish_event(self, vin, event_type, details, timestamp=None):
+        self._call("event", event_type)
+
+    def publish_metrics(self, snapshot):
+        self._call("metrics")
+
+    def flush(self):
+        self._call("flush")
+
+class TestAsyncRuntime(unittest.TestCase):
+    def setUp(self):
+        self.provider = FakeProvider()
+        self.publisher = BlockingPublisher()
+        self.app = SmartDriveApp("V1", provider=self.provider, publisher=self.publisher)
+        self.app.INTERVAL_STEADY = 0.02
+        self.app.current_interval = 0.02
+        self.runtime = AsyncGatewayRuntime(self.app, queue_size=4)
+
+    def tearDown(self):
+        self.publisher.release.set()
+
+    def _run(self, *steps):
+        """Runs the pipeline; each step is (action or None, seconds to wait after it)."""
+        async def scenario():
+            pipeline = asyncio.create_task(self.runtime.run_pipeline())
+            for action, seconds in steps:
+                if action:
+                    action()
+                await asyncio.sleep(seconds)
+            self.runtime.stop()
+            pipeline.cancel()
+            try:
+                await pipeline
+            except asyncio.CancelledError:
+                pass
+        asyncio.run(scenario())
+
+    def test_poll_rate_holds_while_publish_blocks(self):
+        self._run((None, 0.5))
+        # ~25 polls at 20 ms although the first publish never returned
+        self.assertGreater(self.provider.polls, 15)
+        self.assertEqual(self.publisher.calls, [])
+        self.assertGreater(self.runtime.dropped_samples, 0)
+
+    def test_full_outbound_queue_keeps_alerts(self):
+        def alert():
+            # Raised from the logic step, like the drain alert inside _process_sample
+            self.app._publish(self.publisher.publish_event, "V1", "VAMPIRE_DRAIN", "11.2V")
+
+        # The alert is queued while publish blocks, then more samples than the queue holds follow
+        self._run((None, 0.1), (alert, 0.3), (self.publisher.release.set, 0.2))
+        events = [c for c in self.publisher.calls if c[0] == "event"]
+        self.assertEqual(events, [("event", "VAMPIRE_DRAIN")])
+        self.assertGreater(self.runtime.dropped_samples, 4)  # Only samples were dropped
+
+    def test_sample_is_captured_when_processed(self):
+        self.app._ingest_to_cloud = MagicMock()
+        self.publisher.release.set()
+        self._run((None, 0.1))
+        data, interval = self.app._ingest_to_cloud.call_args[0]
+        self.assertIsInstance(data, TelemetryData)  # Frozen copy, not a ring buffer view
+        self.assertEqual((data.rpm, interval), (800.0, 0.02))
+
+class TestOutboundQueue(unittest.TestCase):
+    def test_only_samples_are_dropped_in_order(self):
+        async def scenario():
+            queue = OutboundQueue(maxsize=2)
+            dropped = [queue.put("s1", droppable=True), queue.put("flush"),
+                       queue.put("s2", droppable=True), queue.put("s3", droppable=True),
+                       queue.put("alert")]
+            return dropped, [await queue.get() for _ in range(len(queue))]
+
+        dropped, items = asyncio.run(scenario())
+        self.assertEqual(dropped, [False, False, False, True, False])
+        self.assertEqual(items, ["flush", "s2", "s3", "alert"])
+
+class TestSleepInterval(unittest.TestCase):
+    def test_interval_change_wakes_the_poll_early(self):
+        runtime = AsyncGatewayRuntime(SmartDriveApp("V1", provider=FakeProvider()))
+
+        async def scenario():
+            runtime._interval_changed = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            sleeper = asyncio.create_task(runtime._sleep_interval(5.0))  # STEADY sleep
+            await asyncio.sleep(0.05)
+            runtime._interval_changed.set()  # Logic switched to CRANKING
+            await sleeper
+            woke = loop.time() - started
+
+            started = loop.time()
+            await runtime._sleep_interval(0.05)  # No change: the full timeout
+            return woke, loop.time() - started
+
+        woke, slept = asyncio.run(scenario())
+        self.assertLess(woke, 1.0)
+        self.assertGreaterEqual(slept, 0.04)
+
+if __name__ == "__main__":
+    unittest.main()
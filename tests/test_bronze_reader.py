@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import unittest
+import pandas as pd
+import pyarrow as pa
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+from bronze_reader import LONG_SCHEMA, read_bronze_json, read_frame, to_dataframe
+from config import ProcessorConfig
+from frame_codec import encode_frame
+from segmentation import segment_crank_events
+
+def _message(vin, second, rpm, volts):
+    ts = f"2026-01-10T07:00:{second:02d}.250000"
+    return {
+        "vin": vin, "timestamp": ts, "rpm": rpm, "voltage": volts, "lat": 47.5,
+        "pids": [
+            {"pid_code": "RPM", "value": rpm, "timestamp": ts},
+            {"pid_code": "BATTERY_VOLTAGE", "value": volts},  # Missing: parent timestamp
+        ]
+    }
+
+class TestBronzeReader(unittest.TestCase):
+    def test_v13_object_matches_json_normalize(self):
+        message = _message("VIN-A", 1, 250, 9.6)
+        table = read_bronze_json(json.dumps(message).encode("utf-8"))
+        self.assertEqual(table.schema, LONG_SCHEMA)
+
+        expected = pd.json_normalize(message, record_path=["pids"], meta=["vin"])
+        expected["timestamp"] = pd.to_datetime(expected["timestamp"].fillna(message["timestamp"]))
+        df = to_dataframe(table)
+        self.assertEqual(list(df["pid_code"]), list(expected["pid_code"]))
+        self.assertEqual(list(df["value"]), list(expected["value"]))
+        self.assertEqual(list(df["timestamp"]), list(expected["timestamp"]))
+        self.assertEqual(list(df["vin"]), ["VIN-A", "VIN-A"])
+        self.assertNotEqual(df["pid_code"].dtype, object)  # Arrow-backed strings
+
+    def test_ndjson_batch_and_legacy_layouts(self):
+        lines = [
+            json.dumps(_message("VIN-A", 1, 0, 12.6)),
+            json.dumps(_message("VIN-B", 2, 800, 14.1)),
+            json.dumps({"vin": "VIN-C", "timestamp": "2026-01-10T07:00:03", "rpm": 0, "voltage": 12.4}),
+            json.dumps({"vin": "VIN-D", "timestamp": "2026-01-10T07:00:04", "pid_code": "RPM", "value": 700}),
+        ]
+        table = read_bronze_json("\n".join(lines).encode("utf-8"))
+
+        rows = sorted(zip(*(table.column(c).to_pylist() for c in ("vin", "pid_code", "value"))))
+        self.assertEqual(rows, [
+            ("VIN-A", "BATTERY_VOLTAGE", 12.6), ("VIN-A", "RPM", 0.0),
+            ("VIN-B", "BATTERY_VOLTAGE", 14.1), ("VIN-B", "RPM", 800.0),
+            ("VIN-C", "BATTERY_VOLTAGE", 12.4), ("VIN-C", "RPM", 0.0),
+            ("VIN-D", "RPM", 700.0),
+        ])
+
+    def test_reader_output_feeds_crank_segmentation(self):
+        lines = [json.dumps(_message(vin, s, rpm, v)) for vin in ("VIN-A", "VIN-B")
+                 for s, rpm, v in [(0, 0, 12.6), (1, 0, 12.6), (2, 250, 9.6), (3, 250, 10.1), (4, 900, 14.1)]]
+        df = to_dataframe(read_bronze_json("\n".join(lines).encode("utf-8")))
+        events = segment_crank_events(df, ProcessorConfig())
+        self.assertEqual(list(events["vin"]), ["VIN-A", "VIN-B"])
+        self.assertEqual(list(events["vmin_raw"]), [9.6, 9.6])
+
+    def test_pretty_printed_object(self):
+        blob = json.dumps(_message("VIN-A", 5, 0, 12.6), indent=2).encode("utf-8")
+        self.assertEqual(read_bronze_json(blob).num_rows, 2)
+
+    def test_legacy_json_array_with_iso_timestamps(self):
+        records = [_message("VIN-A", 1, 0, 12.6),
+                   {"vin": "VIN-B", "timestamp": "2026-01-10T07:00:02", "rpm": 800, "voltage": 14.1}]
+        table = read_bronze_json(json.dumps(records, indent=2).encode("utf-8"))
+
+        self.assertEqual(table.schema, LONG_SCHEMA)
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(sorted(table.column("timestamp").to_pylist())[0], pd.Timestamp("2026-01-10T07:00:01.250000"))
+        self.assertEqual(read_bronze_json(b"[]").num_rows, 0)
+
+    def test_invalid_json_raises_arrow_error(self):
+        with self.assertRaises(pa.ArrowInvalid):
+            read_bronze_json(b'{"vin": "VIN-A", "pids": [')
+
+    def test_frame_matches_json_layout(self):
+        base_ms = 1_768_028_400_000
+        frame = encode_frame("VIN-F", [(base_ms, {"RPM": 0.0, "BATTERY_VOLTAGE": 12.6}),
+                                       (base_ms + 100, {"BATTERY_VOLTAGE": 9.6})])
+        table = read_frame(frame)
+
+        self.assertEqual(table.schema, LONG_SCHEMA)
+        self.assertEqual(table.column("value").to_pylist(), [0.0, 12.6, 9.6])
+        self.assertEqual(table.column("timestamp").to_pylist()[-1],
+                         pd.Timestamp(base_ms + 100, unit="ms").to_pydatetime())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+from config import ProcessorConfig
+from compaction import JOURNAL, PartitionCompactor
+from infrastructure.object_store import LocalObjectStore
+
+PARTITION = "processed_telemetry/vin=VIN-A/date=2026-01-10"
+
+class CrashingStore(LocalObjectStore):
+    """Fails the n-th put / every delete, like a Lambda timing out mid-run."""
+    def __init__(self, root, fail_put_at=None, fail_delete=False):
+        super().__init__(root)
+        self.fail_put_at = fail_put_at
+        self.fail_delete = fail_delete
+        self.puts = 0
+
+    def put(self, key, data):
+        self.puts += 1
+        if self.puts == self.fail_put_at:
+            raise TimeoutError("Task timed out")
+        super().put(key, data)
+
+    def delete(self, keys):
+        if self.fail_delete:
+            raise TimeoutError("Task timed out")
+        super().delete(keys)
+
+class TestPartitionCompaction(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = LocalObjectStore(self.root)
+        self.config = ProcessorConfig()
+        # One tiny file per bronze message, written out of order
+        for i in reversed(range(20)):
+            self._write(PARTITION, i, [i * 1000 + k for k in range(3)])
+        self._write("processed_telemetry/vin=VIN-B/date=2026-01-10", 0, [1, 2])
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _write(self, partition, n, ms):
+        table = pa.table({
+            "pid_code": ["BATTERY_VOLTAGE"] * len(ms),
+            "value": [12.6] * len(ms),
+            "timestamp": pa.array(ms, pa.timestamp("ms")),
+        })
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer)
+        self.store.put(f"{partition}/part-{n:04d}.snappy.parquet", buffer.getvalue())
+
+    def _read(self, partition):
+        keys = [o.key for o in self.store.list(partition + "/")]
+        tables = [pq.read_table(io.BytesIO(self.store.get(k))) for k in keys if k.endswith(".parquet")]
+        return keys, pa.concat_tables(tables) if tables else None
+
+    def test_small_files_are_merged_sorted(self):
+        _, before = self._read(PARTITION)
+        summary = PartitionCompactor(self.store, self.config).compact("processed_telemetry/")
+
+        self.assertEqual(summary, {"partitions": 1, "files_in": 20, "files_out": 1})  # VIN-B: single file
+        keys, after = self._read(PARTITION)
+        self.assertEqual(len(keys), 1)
+        self.assertEqual(after.num_rows, before.num_rows)
+        ts = after.column("timestamp").to_pylist()
+        self.assertEqual(ts, sorted(before.column("timestamp").to_pylist()))
+
+    def test_output_files_are_size_targeted(self):
+        sizes = sum(o.size for o in self.store.list(PARTITION + "/"))
+        self.config.compaction_target_bytes = sizes // 4 + 1
+        PartitionCompactor(self.store, self.config).compact_partition(PARTITION)
+
+        keys, after = self._read(PARTITION)
+        self.assertEqual(len(keys), 4)
+        self.assertEqual(after.num_rows, 60)
+
+    def test_interrupted_write_rolls_back(self):
+        self.config.compaction_target_bytes = 1  # One output per row
+        crashing = CrashingStore(self.root, fail_put_at=3)  # Journal, output 0, crash
+        with self.assertRaises(TimeoutError):
+            PartitionCompactor(crashing, self.config).compact_partition(PARTITION)
+        self.assertTrue(self.store.exists(f"{PARTITION}/{JOURNAL}"))
+
+        self.config.compaction_target_bytes = 1 << 30
+        PartitionCompactor(self.store, self.config).compact_partition(PARTITION)
+        keys, after = self._read(PARTITION)
+        self.assertEqual(len(keys), 1)
+        self.assertEqual(after.num_rows, 60)  # Nothing lost, nothing doubled
+
+    def test_interrupted_cleanup_rolls_forward(self):
+        with self.assertRaises(TimeoutError):
+            PartitionCompactor(CrashingStore(self.root, fail_delete=True), self.config).compact_partition(PARTITION)
+        journal = json.loads(self.store.get(f"{PARTITION}/{JOURNAL}"))
+        self.assertEqual(journal["state"], "committed")
+
+        PartitionCompactor(self.store, self.config).recover(PARTITION)
+        keys, after = self._read(PARTITION)
+        self.assertEqual(keys, journal["outputs"])
+        self.assertEqual(after.num_rows, 60)
+
+if __name__ == '__main__':
+    unittest.main()
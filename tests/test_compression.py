@@ -0,0 +1,73 @@
+import math
+import random
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.app import SmartDriveApp
+from hardware.src.clock import VirtualClock
+from hardware.src.domain import TelemetryData
+from hardware.src.compression import SwingingDoorFilter, DeadbandFilter, TelemetryCompressor
+
+def interpolate(points, t):
+    for (t0, v0), (t1, v1) in zip(points, points[1:]):
+        if t0 <= t <= t1:
+            return v0 if t1 == t0 else v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+    raise ValueError(t)
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        # 1 h highway trip @ 5 s: charging voltage with slow drift and sensor noise
+        self.signal = [
+            (t * 5.0, 14.1 + 0.1 * math.sin(t / 50.0) + rng.uniform(-0.01, 0.01))
+            for t in range(720)
+        ]
+
+    def test_swinging_door_reconstructs_within_tolerance(self):
+        sdt = SwingingDoorFilter(tolerance=0.05, max_interval=1e9)
+        kept = []
+        for t, v in self.signal:
+            kept.extend(sdt.offer(t, v))
+        kept.extend(sdt.flush())
+
+        self.assertLess(len(kept), len(self.signal) / 10)
+        for t, v in self.signal:
+            self.assertLessEqual(abs(interpolate(kept, t) - v), 0.05 + 1e-9)
+
+    def test_deadband_suppresses_small_changes(self):
+        db = DeadbandFilter(tolerance=0.05)
+        self.assertEqual(db.offer(0.0, 14.10), [(0.0, 14.10)])
+        self.assertEqual(db.offer(5.0, 14.12), [])
+        self.assertEqual(db.offer(10.0, 14.20), [(10.0, 14.20)])
+
+    def test_untracked_pids_pass_through(self):
+        compressor = TelemetryCompressor(tolerances={"BATTERY_VOLTAGE": 0.05})
+        compressor.offer(0.0, {"BATTERY_VOLTAGE": 14.1, "SPEED": 90.0})
+        out = compressor.offer(5.0, {"BATTERY_VOLTAGE": 14.1, "SPEED": 90.0})
+        self.assertEqual(out, {"SPEED": [(5.0, 90.0)]})
+
+    def test_parked_samples_at_cranking_interval_are_compressed(self):
+        app = SmartDriveApp(vin="V1", provider=MagicMock(), compressor=TelemetryCompressor(mode="DEADBAND"))
+        app.current_interval = SmartDriveApp.INTERVAL_CRANKING  # Parked, 0 RPM: also polled at 0.1 s
+        sent = [app._compress(1_700_000_000 + 0.1 * i, {"RPM": 0.0, "BATTERY_VOLTAGE": 12.6}) for i in range(50)]
+        self.assertEqual(sum(1 for points in sent if points), 1)
+
+    def test_held_point_is_published_before_crank_and_sentinel(self):
+        for data in ([TelemetryData("V1", 1_700_000_100, 0.0, 250.0, 9.6, 5.0)],   # Crank starts
+                     [TelemetryData("V1", 1_700_000_100, 0.0, 0.0, 11.4, 5.0)]):   # Parked below threshold
+            publisher = MagicMock(framing=False)
+            provider = MagicMock(sample_rate=10.0)
+            provider.fetch_raw_voltage.return_value = 9.6
+            app = SmartDriveApp(vin="V1", provider=provider, publisher=publisher,
+                                compressor=TelemetryCompressor(mode="DEADBAND"), clock=VirtualClock(start=1_700_000_000))
+            for i in range(10):  # Steady idle: only the first sample goes out, the last one is held
+                app._ingest_to_cloud(TelemetryData("V1", 1_700_000_000 + 5 * i, 0.0, 800.0, 14.1, 80.0))
+            self.assertEqual(publisher.publish_telemetry.call_count, 1)
+
+            app._process_adaptive_logic(data[0])
+            flushed = publisher.publish_telemetry.call_args[0][0]["pids"]
+            self.assertEqual(publisher.publish_telemetry.call_count, 2)
+            self.assertEqual({p["pid_code"] for p in flushed}, {"RPM", "BATTERY_VOLTAGE"})
+            self.assertEqual({p["timestamp"] for p in flushed}, {SmartDriveApp._iso(1_700_000_045)})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from hardware.src.connection_cache import ConnectionCache
+from hardware.src.providers.real import RealOBDProvider
+
+def _port(*replies):
+    port = MagicMock()
+    port.in_waiting = 0
+    port.read.side_effect = list(replies)
+    return port
+
+OK = b"OK\r\r>"
+
+class TestConnectionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = ConnectionCache(os.path.join(self.tmp, "obd_connection.json"))
+        bitmap = (1 << 0x05) | (1 << 0x0C) | (1 << 0x0D)
+        self.cache.put("TEST-VIN-999", "/dev/rfcomm0", 38400, "6", bitmap)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_entry_survives_restart(self):
+        entry = ConnectionCache(self.cache.path).get("TEST-VIN-999")
+        self.assertEqual((entry["port"], entry["protocol"]), ("/dev/rfcomm0", "6"))
+
+    def test_warm_start_skips_python_obd_negotiation(self):
+        port = _port(*[OK] * 6, b"4100BE1FA813\r\r>")
+        provider = RealOBDProvider("TEST-VIN-999", cache=self.cache)
+        with patch("serial.serial_for_url", return_value=port), patch("obd.OBD") as obd_init:
+            self.assertTrue(provider.connect())
+
+        obd_init.assert_not_called()
+        self.assertIsNotNone(provider.transport)
+        self.assertEqual(provider._batch_request, b"010D0C051\r")
+
+    def test_silent_ecu_keeps_cache_and_bad_adapter_drops_it(self):
+        provider = RealOBDProvider("TEST-VIN-999", cache=self.cache)
+        with patch("serial.serial_for_url", return_value=_port(*[OK] * 6, b"NO DATA\r\r>")):
+            self.assertFalse(provider.connect())
+        self.assertIsNotNone(self.cache.get("TEST-VIN-999"))
+
+        with patch("serial.serial_for_url", return_value=_port(b"?\r\r>")), \
+                patch("obd.scan_serial", return_value=[]):
+            self.assertFalse(provider.connect())
+        self.assertIsNone(self.cache.get("TEST-VIN-999"))
+
+    def test_parallel_probe_returns_first_car(self):
+        provider = RealOBDProvider("TEST-VIN-999")
+        car = MagicMock()
+        with patch.object(provider, "_probe", side_effect=lambda p: car if p == "/dev/rfcomm1" else None):
+            self.assertIs(provider._probe_ports(["/dev/ttyS0", "/dev/rfcomm1", "/dev/ttyS1"]), car)
+
+if __name__ == "__main__":
+    unittest.main()
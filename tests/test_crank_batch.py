@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+from config import ProcessorConfig
+from domain.plateau import analyze_crank
+from domain.plateau_batch import analyze_crank_batch
+from domain.interfaces import ISignalProcessor
+from domain.math_services import CrankingAnalysisContext, PlateauAveragingProcessor
+
+def _flatten(events):
+    offsets = np.cumsum([0] + [len(e) for e in events])
+    times = np.array([t for e in events for t, _ in e], dtype=float)
+    volts = np.array([v for e in events for _, v in e], dtype=float)
+    return times, volts, offsets
+
+class TestCrankBatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.events = [
+            [],                                              # Empty
+            [(5.0, 9.0)],                                    # Too short
+            [(0.0, 7.0), (0.05, 7.5)],                       # Inrush only
+            [(0.0, 7.0), (0.1, 6.0), (0.2, 6.0)],            # Plateau exactly on the floor
+            [(0.0, 12.0), (0.1, 14.0), (0.2, 14.2)],         # Starter not engaged
+        ]
+        for _ in range(200):
+            n = int(rng.integers(2, 40))
+            t0 = 1_700_000_000 + rng.uniform(0, 1e6)
+            t = t0 + np.cumsum(rng.uniform(0.01, 0.06, n)) - 0.01
+            v = rng.uniform(5.0, 14.0) + rng.normal(0, 0.3, n)
+            self.events.append(list(zip(t.tolist(), v.tolist())))
+
+    def test_matches_scalar_path(self):
+        batch = analyze_crank_batch(*_flatten(self.events))
+
+        for i, points in enumerate(self.events):
+            expected = analyze_crank(points)
+            self.assertEqual(batch.analysed[i], expected is not None)
+            if expected is None:
+                continue
+            self.assertEqual(batch.start_time[i], expected.start_time)
+            self.assertEqual(batch.sample_count[i], expected.sample_count)
+            self.assertEqual(np.isnan(batch.inrush_min[i]), expected.inrush_min is None)
+            if expected.inrush_min is not None:
+                self.assertEqual(batch.inrush_min[i], expected.inrush_min)
+            self.assertEqual(np.isnan(batch.plateau_voltage[i]), expected.plateau_voltage is None)
+            if expected.plateau_voltage is not None:
+                self.assertAlmostEqual(batch.plateau_voltage[i], expected.plateau_voltage, places=12)
+
+    def test_context_batch_and_default_strategy_fallback(self):
+        times, volts, offsets = _flatten(self.events)
+        config = ProcessorConfig()
+        vectorised = CrankingAnalysisContext(PlateauAveragingProcessor()).analyze_batch(times, volts, offsets, config)
+
+        class ScalarOnly(PlateauAveragingProcessor):
+            process_batch = ISignalProcessor.process_batch  # Per-event loop over process()
+
+        looped = CrankingAnalysisContext(ScalarOnly()).analyze_batch(times, volts, offsets, config)
+        np.testing.assert_allclose(vectorised, looped, rtol=1e-12)
+        self.assertEqual(vectorised[3], 6.0)
+
+    def test_rejects_inconsistent_offsets(self):
+        with self.assertRaises(ValueError):
+            analyze_crank_batch([0.0, 0.1], [9.0, 9.1], [0, 3])
+
+if __name__ == '__main__':
+    unittest.main()
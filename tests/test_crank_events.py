@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.app import SmartDriveApp
+from lambda_functions.processor.domain.plateau import analyze_crank
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+from config import ProcessorConfig
+from domain.math_services import PlateauAveragingProcessor
+
+class TestCrankEvents(unittest.TestCase):
+    def _window(self):
+        # 10 Hz capture: inrush dip, then a rippling ~9.6V plateau
+        samples = [(0.0, 7.2), (0.05, 8.1)] + [(0.1 + i * 0.1, 9.6 + (0.1 if i % 2 else -0.1)) for i in range(6)]
+        return {"wall_start": 1_700_000_000.0, "monotonic_start": 0.0, "samples": samples, "coolant_temp": -5}
+
+    def test_edge_event_matches_lambda_plateau(self):
+        publisher = MagicMock()
+        app = SmartDriveApp("TESTVIN123", publisher=publisher, provider=MagicMock())
+        window = self._window()
+        app._ingest_crank_window(window)
+
+        event = publisher.publish_crank_event.call_args[0][0]
+        points = [(t + window["wall_start"], v) for t, v in window["samples"]]
+        expected = PlateauAveragingProcessor().process(points, ProcessorConfig())
+
+        self.assertEqual(event["plateau_voltage"], expected)
+        self.assertEqual(event["inrush_min"], 7.2)
+        self.assertEqual(event["coolant_temp"], -5)
+        publisher.publish_telemetry.assert_not_called()  # No raw samples uploaded
+
+    def test_capture_worker_analysis_is_shifted_to_wall_time(self):
+        publisher = MagicMock()
+        app = SmartDriveApp("TESTVIN123", publisher=publisher, provider=MagicMock())
+        window = self._window()
+        window["monotonic_start"] = 500.0  # The worker's monotonic clock, not Unix time
+        window["samples"] = [(t + 500.0, v) for t, v in window["samples"]]
+        window["analysis"] = analyze_crank(window["samples"])  # Computed while capturing
+        app._ingest_crank_window(window)
+
+        event = publisher.publish_crank_event.call_args[0][0]
+        self.assertEqual(event["start_time"], SmartDriveApp._iso(1_700_000_000.0))
+        self.assertEqual(event["plateau_voltage"], window["analysis"].plateau_voltage)
+        self.assertEqual(event["inrush_min"], 7.2)
+        self.assertEqual(app.last_crank.start_time, 1_700_000_000.0)
+
+    def test_short_window_is_not_published(self):
+        publisher = MagicMock()
+        app = SmartDriveApp("TESTVIN123", publisher=publisher, provider=MagicMock())
+        app._ingest_crank_window({"wall_start": 0.0, "monotonic_start": 0.0, "samples": [(0.0, 9.0)]})
+        publisher.publish_crank_event.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+from config import ProcessorConfig
+from compaction import PartitionCompactor
+from crank_index import CrankEventIndex, MANIFEST
+from repository import S3Repository
+from service import ETLService
+from infrastructure.object_store import LocalObjectStore
+from hardware.src.app import SmartDriveApp
+
+BRONZE, SILVER = "bronze", "silver"
+
+def _trip(vin, minute, vmin):
+    """Egy indítás: nyugalmi 12.6 V, két indítási minta, járó motor."""
+    lines = []
+    for second, rpm, volts in [(0, 0, 12.6), (1, 250, vmin), (2, 250, vmin + 0.5), (3, 900, 14.1)]:
+        ts = f"2026-01-10T07:{minute:02d}:{second:02d}"
+        lines.append(json.dumps({"vin": vin, "timestamp": ts, "pids": [
+            {"pid_code": "RPM", "value": rpm, "timestamp": ts},
+            {"pid_code": "BATTERY_VOLTAGE", "value": volts, "timestamp": ts}]}))
+    return "\n".join(lines).encode("utf-8")
+
+class TestCrankEventIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"SMARTDRIVE_LOCAL_S3_ROOT": self.root})
+        self.env.start()
+        self.config = ProcessorConfig()
+        self.bronze = LocalObjectStore(os.path.join(self.root, BRONZE))
+        self.silver = LocalObjectStore(os.path.join(self.root, SILVER))
+        self.index = CrankEventIndex(self.silver, self.config)
+        self.etl = ETLService(S3Repository(SILVER), self.config, self.index)
+
+        # Két külön köteg ugyanarra a VIN/dátumra, egy harmadik másik VIN-re
+        for n, (vin, minute, vmin) in enumerate([("VIN-A", 0, 9.6), ("VIN-A", 10, 9.2), ("VIN-B", 0, 9.9)]):
+            key = f"raw/{vin}/{n}.json"
+            self.bronze.put(key, _trip(vin, minute, vmin))
+            self.etl.process_batch([(BRONZE, key)])
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.root)
+
+    def _index_keys(self, vin):
+        return [o.key.rsplit("/", 1)[-1] for o in self.silver.list(f"crank_index/vin={vin}/")]
+
+    def test_writes_are_indexed_incrementally(self):
+        manifest = self.index.load("VIN-A")["2026-01-10"]
+        self.assertEqual(len(self._index_keys("VIN-A")), 2)  # Egy delta kötegenként
+
+        self.assertEqual([f["crank_events"] for f in manifest["files"]], [1, 1])
+        self.assertEqual([f["rows"] for f in manifest["files"]], [8, 8])
+        self.assertEqual(manifest["files"][1]["min_timestamp"], "2026-01-10T07:10:00.000000")
+        self.assertEqual([e["vmin_raw"] for e in self.index.crank_events("VIN-A")], [9.6, 9.2])
+        self.assertEqual(len(self.index.crank_events("VIN-B")), 1)
+
+    def test_edge_crank_event_reaches_crank_events_table(self):
+        # The gateway analyses the crank itself and only publishes the result
+        publisher = MagicMock()
+        app = SmartDriveApp("VIN-C", publisher=publisher, provider=MagicMock())
+        start = datetime(2026, 1, 10, 8, 0, 0).timestamp()
+        samples = [(0.0, 7.2), (0.05, 8.1)] + [(0.1 + i * 0.1, 9.6 + (0.1 if i % 2 else -0.1)) for i in range(6)]
+        app._ingest_crank_window({"wall_start": start, "monotonic_start": 0.0, "samples": samples, "coolant_temp": -5})
+        record = publisher.publish_crank_event.call_args[0][0]
+
+        # IoT rule: vehicle/+/events -> Bronze events/{vin}/{timestamp}.json
+        key = "events/VIN-C/1768032000000.json"
+        self.bronze.put(key, json.dumps(record).encode("utf-8"))
+        self.assertEqual(self.etl.process_batch([(BRONZE, key)]), [])
+
+        self.assertEqual(self.silver.list("processed_telemetry/vin=VIN-C/"), [])  # No raw samples
+        written = [pq.read_table(os.path.join(self.root, SILVER, *o.key.split("/")))
+                   for o in self.silver.list("crank_events/vin=VIN-C/")]
+        self.assertEqual(len(written), 1)
+        row = written[0].to_pylist()[0]
+        self.assertEqual((row["refined_vmin"], row["vmin_raw"], row["trigger"]),
+                         (record["plateau_voltage"], 7.2, "edge"))
+        self.assertEqual(row["start_time"], datetime.fromisoformat(record["start_time"]))
+
+        events = self.index.crank_events("VIN-C")
+        self.assertEqual([(e["event_id"], e["refined_vmin"]) for e in events],
+                         [(row["event_id"], record["plateau_voltage"])])
+        self.assertEqual(self.index.rebuild_partition("VIN-C", "2026-01-10")["crank_events"][0]["trigger"], "edge")
+
+    def test_files_between_uses_time_ranges(self):
+        files = self.index.files_between("VIN-A", datetime(2026, 1, 10, 7, 9), datetime(2026, 1, 10, 7, 11))
+        self.assertEqual(files, [self.index.load("VIN-A")["2026-01-10"]["files"][1]["key"]])
+        self.assertEqual(self.index.files_between("VIN-A", datetime(2026, 1, 11), datetime(2026, 1, 12)), [])
+
+    def test_rebuild_from_scratch_matches_incremental(self):
+        incremental = self.index.load("VIN-A")
+        for obj in self.silver.list("crank_index/"):
+            self.silver.delete([obj.key])
+
+        self.assertEqual(self.index.rebuild(), 2)
+        self.assertEqual(self._index_keys("VIN-A"), [MANIFEST])
+        self.assertEqual(self.index.load("VIN-A"), incremental)
+
+    def test_compaction_folds_index(self):
+        PartitionCompactor(self.silver, self.config).compact("processed_telemetry/")
+        self.index.rebuild_partition("VIN-A", "2026-01-10")
+
+        manifest = self.index.load("VIN-A")["2026-01-10"]
+        self.assertEqual(self._index_keys("VIN-A"), [MANIFEST])  # Delták összevonva
+        self.assertEqual(len(manifest["files"]), 1)
+        self.assertTrue(manifest["files"][0]["key"].split("/")[-1].startswith("compacted-"))
+        self.assertEqual(manifest["files"][0]["crank_events"], 2)
+        self.assertEqual(len(manifest["crank_events"]), 2)
+
+if __name__ == '__main__':
+    unittest.main()
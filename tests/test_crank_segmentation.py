@@ -0,0 +1,91 @@
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+from config import ProcessorConfig
+from domain_math import ParabolicInterpolator
+from segmentation import segment_crank_events
+
+T0 = pd.Timestamp("2026-01-10 07:00:00")
+
+def _rows(vin, samples, t0=T0):
+    """(seconds, rpm, volts) -> long Bronze rows, like fetch_json_as_df."""
+    rows = []
+    for s, rpm, volts in samples:
+        ts = t0 + pd.Timedelta(seconds=s)
+        if rpm is not None:
+            rows.append({"pid_code": "RPM", "value": rpm, "timestamp": ts, "vin": vin})
+        rows.append({"pid_code": "BATTERY_VOLTAGE", "value": volts, "timestamp": ts, "vin": vin})
+    return rows
+
+def _crank(start, depth):
+    # Parked -> cranking dip -> running
+    return [(start, 0, 12.6), (start + 1, 0, 12.6), (start + 1.1, 250, depth + 0.4),
+            (start + 1.2, 250, depth), (start + 1.3, 300, depth + 0.6), (start + 2, 900, 14.1)]
+
+class TestCrankSegmentation(unittest.TestCase):
+    def setUp(self):
+        self.config = ProcessorConfig()
+
+    def test_every_start_of_every_vin_gets_its_own_event(self):
+        rows = (_rows("VIN-A", _crank(0, 9.6) + _crank(600, 9.1)) +
+                _rows("VIN-B", _crank(30, 8.8)))
+        events = segment_crank_events(pd.DataFrame(rows).sample(frac=1, random_state=1), self.config)
+
+        self.assertEqual(list(events["vin"]), ["VIN-A", "VIN-A", "VIN-B"])
+        self.assertEqual(list(events["vmin_raw"]), [9.6, 9.1, 8.8])
+        self.assertEqual(list(events["sample_count"]), [3, 3, 3])
+        self.assertEqual(set(events["trigger"]), {"rpm"})
+        self.assertEqual(events["event_id"].nunique(), 3)
+
+        # Same vertex as the single-event path on the dip and its neighbours
+        for event, start in zip(events.itertuples(), (0, 600)):
+            t = [(T0 + pd.Timedelta(seconds=start + s)).value / 1e9 for s in (1.1, 1.2, 1.3)]
+            v = [event.vmin_raw + 0.4, event.vmin_raw, event.vmin_raw + 0.6]
+            self.assertEqual(event.refined_vmin, ParabolicInterpolator.find_vertex(list(zip(t, v)), self.config))
+            self.assertLess(event.refined_vmin, event.vmin_raw)
+
+    def test_voltage_drop_without_rpm(self):
+        samples = [(s * 0.5, None, 12.6) for s in range(10)] + \
+                  [(5.0, None, 10.0), (5.1, None, 9.4), (5.2, None, 9.9), (6.0, None, 12.4)]
+        events = segment_crank_events(pd.DataFrame(_rows("VIN-C", samples)), self.config)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events.iloc[0]["trigger"], "voltage_drop")
+        self.assertEqual(events.iloc[0]["vmin_raw"], 9.4)
+        self.assertEqual(events.iloc[0]["start_time"], T0 + pd.Timedelta(seconds=5.0))
+
+    def test_engine_stop_and_quiet_file_are_not_cranks(self):
+        samples = [(0, 900, 14.2), (1, 900, 14.1), (2, 0, 12.6), (3, 0, 12.5)]
+        events = segment_crank_events(pd.DataFrame(_rows("VIN-D", samples)), self.config)
+        self.assertTrue(events.empty)
+
+    def test_epoch_clock_with_many_vins_and_missing_vin(self):
+        # A Pi without RTC reports 1970 timestamps next to current data from 7 more VINs
+        rows = _rows("VIN-0", _crank(0, 9.0), t0=pd.Timestamp("1970-01-01 00:10:00"))
+        for i in range(1, 8):
+            rows += _rows(f"VIN-{i}", _crank(10 * i, 9.0 + i / 10))
+        rows += [dict(row, vin=None) for row in _rows("VIN-X", _crank(5, 8.0))]
+        events = segment_crank_events(pd.DataFrame(rows), self.config)
+
+        self.assertEqual(list(events["vin"]), [f"VIN-{i}" for i in range(8)])
+        self.assertEqual(list(events["vmin_raw"]), [9.0 + i / 10 for i in range(8)])
+        self.assertEqual(set(events["trigger"]), {"rpm"})
+
+    def test_find_vertices_matches_scalar(self):
+        rng = np.random.default_rng(7)
+        t = np.sort(rng.uniform(1.7e9, 1.7e9 + 2, (200, 3)), axis=1)
+        v = rng.uniform(8.0, 12.6, (200, 3))
+        batch = ParabolicInterpolator.find_vertices(t, v, self.config)
+        for i in range(200):
+            scalar = ParabolicInterpolator.find_vertex(list(zip(t[i], v[i])), self.config)
+            if scalar is None:
+                self.assertTrue(np.isnan(batch[i]))
+            else:
+                self.assertEqual(batch[i], scalar)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.capture import VoltageRingBuffer, CrankingCaptureWorker
+
+class TestCrankingCapture(unittest.TestCase):
+    def test_ring_buffer_keeps_newest_samples_in_order(self):
+        buf = VoltageRingBuffer(capacity=3)
+        for i in range(5):
+            buf.append(float(i), 10.0 + i)
+
+        self.assertEqual(len(buf), 3)
+        self.assertEqual(buf.snapshot(), [(2.0, 12.0), (3.0, 13.0), (4.0, 14.0)])
+
+    def test_worker_hands_off_completed_window(self):
+        provider = MagicMock()
+        provider.fetch_raw_voltage.return_value = 9.5
+        worker = CrankingCaptureWorker(provider, window_s=0.1)
+        worker.start()
+
+        self.assertTrue(worker.trigger())
+        self.assertFalse(worker.trigger())  # Already capturing
+
+        deadline = time.time() + 2.0
+        window = None
+        while window is None and time.time() < deadline:
+            window = worker.poll_window()
+            time.sleep(0.01)
+        worker.stop()
+
+        self.assertIsNotNone(window)
+        self.assertGreater(len(window["samples"]), 2)
+        timestamps = [t for t, _ in window["samples"]]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertTrue(all(v == 9.5 for _, v in window["samples"]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.elm327 import ElmTransport, decode_reply, decode_voltage, mode01_request
+
+def _port(*replies):
+    port = MagicMock()
+    port.in_waiting = 0
+    port.read.side_effect = list(replies)
+    return port
+
+class TestElmTransport(unittest.TestCase):
+    def test_decodes_single_and_multi_frame_replies(self):
+        single = bytearray(b"410C1AF8\r")
+        self.assertEqual(decode_reply(single, len(single)), bytes.fromhex("410C1AF8"))
+
+        multi = bytearray(b"008\r0:410D320C1A\r1:F8055A\r")
+        self.assertEqual(decode_reply(multi, len(multi)), bytes.fromhex("410D320C1AF8055A"))
+
+        no_data = bytearray(b"SEARCHING...\rNO DATA\r")
+        self.assertIsNone(decode_reply(no_data, len(no_data)))
+
+        volts = bytearray(b"12.6V\r")
+        self.assertEqual(decode_voltage(volts, len(volts)), 12.6)
+
+    def test_reads_chunks_until_prompt_and_repeats_with_bare_cr(self):
+        port = _port(b"410C", b"1AF8\r\r>", b"410C1B00\r\r>")
+        transport = ElmTransport(port)
+
+        self.assertEqual(transport.query(mode01_request(0x0C)), bytes.fromhex("410C1AF8"))
+        self.assertEqual(transport.query(mode01_request(0x0C)), bytes.fromhex("410C1B00"))
+        self.assertEqual(port.write.call_args_list[0][0][0], b"010C1\r")
+        self.assertEqual(port.write.call_args_list[1][0][0], b"\r")
+
+    def test_timeout_returns_none(self):
+        transport = ElmTransport(_port(b""))
+        self.assertIsNone(transport.query(mode01_request(0x0C)))
+
+if __name__ == "__main__":
+    unittest.main()
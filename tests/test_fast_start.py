@@ -0,0 +1,66 @@
+import subprocess
+import sys
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.infrastructure import AWSCloudPublisher
+
+class TestFastStart(unittest.TestCase):
+    def test_simulated_start_does_not_import_obd(self):
+        code = (
+            "import sys\n"
+            "from hardware.src.app import SmartDriveApp\n"
+            "from hardware.src.providers import SimulatedOBDProvider\n"
+            "SmartDriveApp('V1', provider=SimulatedOBDProvider('V1'))\n"
+            "print('obd' in sys.modules, 'AWSIoTPythonSDK' in sys.modules)\n"
+        )
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "False False")
+
+    def test_messages_held_until_background_connect(self):
+        client = MagicMock()
+        client.connect.return_value = True
+        publisher = AWSCloudPublisher(None)
+        publisher.online.clear()  # As connect_in_background() does before the thread starts
+
+        publisher.publish_telemetry({"vin": "V1", "n": 1})
+        publisher.publish_event("V1", "VAMPIRE_DRAIN", "11.2V")
+        self.assertEqual(len(publisher._pending), 2)
+
+        publisher.connect_in_background(lambda: client).join(timeout=5)
+        self.assertTrue(publisher.online.is_set())
+        client.publish.assert_not_called()  # Held messages go out with the next publish
+
+        publisher.publish_telemetry({"vin": "V1", "n": 2})
+        topics = [c[0][0] for c in client.publish.call_args_list]
+        self.assertEqual(topics, ["vehicle/V1/telemetry", "vehicle/V1/alerts", "vehicle/V1/telemetry"])
+        self.assertEqual(len(publisher._pending), 0)
+
+    def test_failed_publish_without_spool_is_held_in_order(self):
+        client = MagicMock()
+        client.publish.side_effect = [True, ConnectionError("offline"), ConnectionError("offline"), True, True, True]
+        publisher = AWSCloudPublisher(client)
+
+        publisher.publish_telemetry({"vin": "V1", "n": 1})
+        publisher.publish_event("V1", "VAMPIRE_DRAIN", "11.2V")  # Does not raise: held
+        publisher.publish_crank_event({"vin": "V1", "vmin": 9.6})  # Retry of the alert fails: queued behind it
+        self.assertEqual(len(publisher._pending), 2)
+        self.assertEqual(client.publish.call_count, 3)
+
+        publisher.publish_metrics({"vin": "V1"})
+        topics = [c[0][0] for c in client.publish.call_args_list]
+        self.assertEqual(topics, ["vehicle/V1/telemetry", "vehicle/V1/alerts", "vehicle/V1/alerts",
+                                  "vehicle/V1/alerts", "vehicle/V1/events", "vehicle/V1/metrics"])
+        self.assertEqual(len(publisher._pending), 0)
+
+    def test_retries_until_connected(self):
+        client = MagicMock()
+        client.connect.side_effect = [False, True]
+        publisher = AWSCloudPublisher(None)
+        publisher.CONNECT_RETRY_DELAYS = (0.0,)
+
+        publisher.connect_in_background(lambda: client).join(timeout=5)
+        self.assertIs(publisher.client, client)
+        self.assertEqual(client.connect.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.metrics import LatencyHistogram, GatewayMetrics
+from hardware.src.app import SmartDriveApp
+from hardware.src.clock import VirtualClock
+from hardware.src.providers.simulated import SimulatedOBDProvider
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_percentiles_follow_log_buckets(self):
+        hist = LatencyHistogram()
+        for _ in range(99):
+            hist.observe(0.001)
+        hist.observe(0.5)
+
+        self.assertLessEqual(hist.percentile(0.5), 0.00128)
+        self.assertGreaterEqual(hist.percentile(0.5), 0.001)
+        self.assertEqual(hist.percentile(1.0), 0.5)
+        self.assertEqual(hist.snapshot()["count"], 100)
+
+    def test_snapshot_reset_rolls_the_window(self):
+        clock = VirtualClock(start=0)
+        metrics = GatewayMetrics(export_interval=10, clock=clock)
+        metrics.observe("query", 0.002)
+        metrics.count("dropped_samples")
+        for _ in range(50):
+            metrics.record_sample(0.1)
+        clock.advance(10)
+
+        self.assertTrue(metrics.due())
+        snapshot = metrics.snapshot(reset=True)
+        self.assertEqual(snapshot["sample_rate"], {"achieved_hz": 5.0, "target_hz": 10.0})
+        self.assertEqual(snapshot["stages"]["query"]["count"], 1)
+        self.assertFalse(metrics.due())
+        self.assertEqual(metrics.snapshot()["stages"]["query"]["count"], 0)
+        self.assertEqual(metrics.snapshot()["counters"], {"dropped_samples": 1})
+
+    def test_app_exports_periodic_metrics_message(self):
+        clock = VirtualClock(start=1_700_000_000)
+        provider = SimulatedOBDProvider("TEST-VIN-999", scenario="NORMAL_START", clock=clock)
+        publisher = MagicMock()
+        publisher.spool = None
+        app = SmartDriveApp("TEST-VIN-999", publisher=publisher, provider=provider, clock=clock,
+                            metrics=GatewayMetrics(export_interval=30, clock=clock))
+
+        app.run(duration=65)
+
+        self.assertEqual(publisher.publish_metrics.call_count, 2)
+        snapshot = publisher.publish_metrics.call_args[0][0]
+        self.assertEqual(snapshot["vin"], "TEST-VIN-999")
+        self.assertGreater(snapshot["stages"]["process"]["count"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import MagicMock
+import obd
+from hardware.src.providers.real import RealOBDProvider, parse_multi_pid_response
+
+class FakeResponse:
+    def __init__(self, value):
+        self.value = value
+
+    def is_null(self):
+        return self.value is None
+
+class TestMultiPidBatching(unittest.TestCase):
+    def setUp(self):
+        self.provider = RealOBDProvider(vin="TEST-VIN-999", port="/dev/null")
+        self.connection = MagicMock()
+        self.connection.status.return_value = obd.OBDStatus.CAR_CONNECTED
+        self.connection.supports.return_value = True
+        self.provider.connection = self.connection
+        self.provider._prepare_batch_command()
+
+    def test_parse_multi_pid_response(self):
+        """Speed 50 km/h, 1726 RPM, 50 °C coolant in one reply."""
+        raw = parse_multi_pid_response(bytes([0x41, 0x0D, 0x32, 0x0C, 0x1A, 0xF8, 0x05, 0x5A]))
+        self.assertEqual(bytes(raw[0x0D]), b"\x32")
+        self.assertEqual(bytes(raw[0x0C]), b"\x1a\xf8")
+        self.assertEqual(bytes(raw[0x05]), b"\x5a")
+
+    def test_batched_fetch_uses_single_mode01_round_trip(self):
+        def query(cmd, force=False):
+            if cmd is self.provider._batch_command:
+                return FakeResponse(bytes([0x41, 0x0D, 0x32, 0x0C, 0x1A, 0xF8, 0x05, 0x5A]))
+            return FakeResponse(None)  # ELM_VOLTAGE
+
+        self.connection.query.side_effect = query
+        data = self.provider.fetch_data()
+
+        self.assertEqual(self.connection.query.call_count, 2)
+        self.assertEqual(data.speed, 50.0)
+        self.assertEqual(data.rpm, 1726.0)
+        self.assertEqual(data.coolant_temp, 50.0)
+
+    def test_falls_back_to_per_pid_after_rejections(self):
+        self.connection.query.return_value = FakeResponse(None)
+        for _ in range(RealOBDProvider.BATCH_REJECT_LIMIT):
+            self.provider.fetch_data()
+
+        self.assertIsNone(self.provider._batch_command)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import MagicMock
+from hardware.src import scheduler as polling
+from hardware.src.scheduler import PidScheduler
+from hardware.src.app import SmartDriveApp
+from hardware.src.clock import VirtualClock
+from hardware.src.providers.simulated import SimulatedOBDProvider
+
+class TestPidScheduler(unittest.TestCase):
+    def test_earliest_deadline_first_with_per_state_rates(self):
+        rates = {polling.STEADY: {"rpm": 1.0, "coolant_temp": 30.0}}
+        scheduler = PidScheduler(rates=rates, state=polling.STEADY)
+
+        polled = []
+        now = 0.0
+        while now < 60.0:
+            field = scheduler.next_field(now)
+            if field is None:
+                now += scheduler.delay(now)
+            else:
+                polled.append(field)
+
+        self.assertEqual(polled[0], "rpm")  # Same deadline: priority decides
+        self.assertEqual(polled.count("coolant_temp"), 2)
+        self.assertEqual(polled.count("rpm"), 60)
+
+    def test_state_switch_drops_signals_and_polls_immediately(self):
+        scheduler = PidScheduler(state=polling.STEADY)
+        scheduler.set_state(polling.CRANKING, 10.0)
+        self.assertEqual(scheduler.delay(10.0), 0.0)
+
+        fields = {scheduler.next_field(10.0 + i * 0.05) for i in range(40)}
+        self.assertNotIn("coolant_temp", fields)
+        self.assertNotIn("speed", fields)
+
+    def test_late_link_skips_missed_deadlines(self):
+        scheduler = PidScheduler(rates={polling.PARKED: {"voltage": 1.0}})
+        scheduler.next_field(0.0)
+        scheduler.next_field(5.5)  # Link was busy for 5 s
+        self.assertEqual(scheduler.skipped, 4)
+        self.assertAlmostEqual(scheduler.delay(5.5), 1.0)
+
+    def test_app_spends_crank_link_time_on_voltage(self):
+        clock = VirtualClock(start=1_700_000_000)
+        provider = SimulatedOBDProvider("TEST-VIN-999", scenario="NORMAL_START", clock=clock)
+        scheduler = PidScheduler()
+        app = SmartDriveApp("TEST-VIN-999", publisher=MagicMock(), provider=provider,
+                            clock=clock, scheduler=scheduler)
+
+        app.run(duration=60)
+
+        self.assertEqual(scheduler.state, polling.STEADY)
+        self.assertGreater(scheduler.polls["voltage"], scheduler.polls["coolant_temp"])
+        self.assertIsNotNone(app.last_crank)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import math
+import os
+import statistics
+import sys
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.capture import CrankingCaptureWorker
+from hardware.src.clock import VirtualClock
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+from config import ProcessorConfig
+from domain.plateau import PlateauEstimator
+from domain.math_services import CrankingAnalysisContext, PlateauAveragingProcessor
+
+# 20 Hz crank: inrush dip, rippling plateau, recovery after the window
+POINTS = [(100.0 + i * 0.05, 7.0 if i < 2 else 9.6 + (0.2 if i % 2 else -0.2)) for i in range(20)]
+
+class TestPlateauEstimator(unittest.TestCase):
+    def test_emits_when_window_closes(self):
+        estimator = PlateauEstimator()
+        emitted = [i for i, (t, v) in enumerate(POINTS) if estimator.add(t, v) is not None]
+
+        self.assertEqual(emitted, [13])  # First sample past 100.0 + 0.1 + 0.5
+        plateau = [v for t, v in POINTS[2:13]]
+        result = estimator.result
+        self.assertEqual(result.plateau_voltage, math.fsum(plateau) / len(plateau))
+        self.assertEqual(result.inrush_min, 7.0)
+        self.assertEqual(result.sample_count, 11)
+        self.assertAlmostEqual(estimator.variance, statistics.variance(plateau))
+        self.assertIsNone(estimator.add(200.0, 12.0))  # Closed: later samples are ignored
+
+    def test_processor_streams_without_reading_past_the_window(self):
+        consumed = []
+
+        def stream():
+            for point in POINTS:
+                consumed.append(point)
+                yield point
+
+        analyzer = CrankingAnalysisContext(PlateauAveragingProcessor())
+        plateau = analyzer.analyze(stream(), ProcessorConfig())
+
+        self.assertEqual(len(consumed), 14)
+        self.assertEqual(plateau, analyzer.estimator(ProcessorConfig()).consume(POINTS).plateau_voltage)
+
+    def test_short_stream_is_rejected(self):
+        estimator = PlateauEstimator()
+        estimator.add(0.0, 9.0)
+        self.assertIsNone(estimator.finish())
+
+    def test_capture_stops_at_window_close(self):
+        clock = VirtualClock(start=0)
+        provider = MagicMock()
+        provider.fetch_raw_voltage.side_effect = lambda: (clock.sleep(0.04), 9.5)[1]
+        worker = CrankingCaptureWorker(provider, clock=clock)
+
+        worker.capture_inline()
+        window = worker.poll_window()
+
+        self.assertLess(clock.monotonic(), 0.7)  # Not the full 1 s capture
+        self.assertEqual(window["analysis"].plateau_voltage, 9.5)
+        # 3 inrush samples at 25 Hz, and the one that closed the window
+        self.assertEqual(window["analysis"].sample_count, len(window["samples"]) - 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+import index
+from config import ProcessorConfig
+from service import ETLService
+from bronze_reader import read_bronze_json
+from infrastructure.object_store import LocalObjectStore
+
+BRONZE, SILVER = "bronze", "silver"
+
+def _line(vin, second, rpm, volts):
+    ts = f"2026-01-10T07:00:{second:02d}"
+    return json.dumps({"vin": vin, "timestamp": ts, "pids": [
+        {"pid_code": "RPM", "value": rpm, "timestamp": ts},
+        {"pid_code": "BATTERY_VOLTAGE", "value": volts, "timestamp": ts}]})
+
+class TestProcessorLambda(unittest.TestCase):
+    """Full handler on the local S3 stand-in (SMARTDRIVE_LOCAL_S3_ROOT)."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.bronze = LocalObjectStore(os.path.join(self.root, BRONZE))
+        self.silver = LocalObjectStore(os.path.join(self.root, SILVER))
+        env = {"SMARTDRIVE_LOCAL_S3_ROOT": self.root, "SILVER_BUCKET_NAME": SILVER}
+        self.env = patch.dict(os.environ, env)
+        self.env.start()
+        index._etl = None
+
+    def tearDown(self):
+        self.env.stop()
+        index._etl = None
+        shutil.rmtree(self.root)
+
+    def _event(self, keys):
+        records = []
+        for key in keys:
+            body = {"Records": [{"s3": {"bucket": {"name": BRONZE}, "object": {"key": key}}}]}
+            records.append({"messageId": key, "body": json.dumps(body)})
+        return {"Records": records}
+
+    def test_batch_writes_one_file_per_partition(self):
+        keys = []
+        for i, vin in enumerate(["VIN-A", "VIN-A", "VIN-B"]):
+            key = f"raw/{vin}/{i}.json"
+            crank = [(10 * i, 0, 12.6), (10 * i + 1, 250, [9.6, 9.7, 9.8][i]), (10 * i + 2, 250, 10.1), (10 * i + 3, 900, 14.1)]
+            self.bronze.put(key, "\n".join(_line(vin, *s) for s in crank).encode("utf-8"))
+            keys.append(key)
+
+        result = index.lambda_handler(self._event(keys), None)
+        self.assertEqual(result["bronze_objects"], 3)
+
+        raw = [o.key for o in self.silver.list("processed_telemetry/")]
+        self.assertEqual(len(raw), 2)  # VIN-A (two objects) and VIN-B, same date
+        self.assertTrue(raw[0].startswith("processed_telemetry/vin=VIN-A/date=2026-01-10/"))
+        rows = pq.read_table(io.BytesIO(self.silver.get(raw[0])))
+        self.assertEqual(rows.num_rows, 16)
+        self.assertNotIn("vin", rows.column_names)  # Hive partition column
+        ts = rows.column("timestamp").to_pylist()
+        self.assertEqual(ts, sorted(ts))
+
+        events = [pq.read_table(io.BytesIO(self.silver.get(o.key))) for o in self.silver.list("crank_events/")]
+        vmins = sorted(v for t in events for v in t.column("vmin_raw").to_pylist())
+        self.assertEqual(vmins, [9.6, 9.7, 9.8])
+
+    def test_module_state_is_reused(self):
+        self.bronze.put("raw/VIN-A/0.json", _line("VIN-A", 0, 0, 12.6).encode("utf-8"))
+        index.lambda_handler(self._event(["raw/VIN-A/0.json"]), None)
+        etl = index._etl
+        index.lambda_handler(self._event(["raw/VIN-A/0.json"]), None)
+        self.assertIs(index._etl, etl)
+        self.assertIs(etl.config, index.CONFIG)
+
+    def test_missing_object_is_a_partial_batch_failure(self):
+        self.bronze.put("raw/VIN-A/0.json", _line("VIN-A", 0, 0, 12.6).encode("utf-8"))
+        result = index.lambda_handler(self._event(["raw/VIN-A/0.json", "raw/VIN-A/gone.json"]), None)
+
+        self.assertEqual(result["batchItemFailures"], [{"itemIdentifier": "raw/VIN-A/gone.json"}])
+        self.assertEqual(len(self.silver.list("processed_telemetry/")), 1)  # The rest is still written
+
+    def test_rows_without_vin_are_dropped(self):
+        lines = [_line("VIN-A", 0, 0, 12.6), _line(None, 1, 0, 12.5)]
+        self.bronze.put("raw/VIN-A/0.json", "\n".join(lines).encode("utf-8"))
+        result = index.lambda_handler(self._event(["raw/VIN-A/0.json"]), None)
+
+        self.assertEqual(result["batchItemFailures"], [])
+        raw = [o.key for o in self.silver.list("processed_telemetry/")]
+        self.assertEqual(len(raw), 1)
+        self.assertTrue(raw[0].startswith("processed_telemetry/vin=VIN-A/"))
+        self.assertEqual(pq.read_table(io.BytesIO(self.silver.get(raw[0]))).num_rows, 2)
+
+    def test_direct_s3_trigger_failure_raises(self):
+        record = {"s3": {"bucket": {"name": BRONZE}, "object": {"key": "raw/VIN-A/gone.json"}}}
+        with self.assertRaises(RuntimeError):
+            index.lambda_handler({"Records": [record]}, None)
+
+class _BarrierRepo:
+    """Minden letöltés megvárja a többit: soros feldolgozásnál a barrier lejár."""
+
+    def __init__(self, blobs, parties):
+        self.blobs = blobs
+        self.barrier = threading.Barrier(parties, timeout=5)
+        self.saved = []
+
+    def fetch_table(self, bucket, key):
+        self.barrier.wait()
+        return read_bronze_json(self.blobs[key])
+
+    def save_table_to_parquet(self, table, prefix, compression="snappy"):
+        self.saved.append((prefix, table))
+
+class TestConcurrentFetch(unittest.TestCase):
+
+    def test_objects_are_fetched_concurrently_and_merged(self):
+        blobs = {f"{i}.json": _line("VIN-A", i, 0, 12.6).encode("utf-8") for i in range(4)}
+        repo = _BarrierRepo(blobs, parties=4)
+        failed = ETLService(repo, ProcessorConfig(fetch_concurrency=4)).process_batch([(BRONZE, k) for k in blobs])
+
+        self.assertEqual(failed, [])
+        raw = [t for prefix, t in repo.saved if prefix == "processed_telemetry"]
+        self.assertEqual(len(raw), 1)  # One merged write for the batch
+        self.assertEqual(raw[0].num_rows, 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.app import SmartDriveApp
+from hardware.src.clock import VirtualClock
+from hardware.src.providers.simulated import SimulatedOBDProvider
+
+TRACE = """t,speed,rpm,voltage,coolant_temp
+0,0,0,12.6,5
+3600,0,0,11.4,5
+"""
+
+class TestVirtualClockReplay(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as f:
+            f.write(TRACE)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_hour_of_parking_replays_instantly(self):
+        clock = VirtualClock(start=1_700_000_000)
+        provider = SimulatedOBDProvider.from_trace("TEST-VIN-999", self.path, clock=clock)
+        app = SmartDriveApp(vin="TEST-VIN-999", publisher=MagicMock(), provider=provider, clock=clock)
+
+        app.run(duration=2 * 3600)
+
+        self.assertGreaterEqual(clock.time(), 1_700_000_000 + 2 * 3600)
+        self.assertTrue(app.power_saving_active)
+        self.assertEqual(app.current_interval, SmartDriveApp.INTERVAL_SLEEP)
+
+    def test_trace_values_hold_until_next_row(self):
+        clock = VirtualClock(start=0)
+        provider = SimulatedOBDProvider.from_trace("TEST-VIN-999", self.path, clock=clock)
+        clock.advance(3599)
+        self.assertEqual(provider.fetch_data().voltage, 12.6)
+        clock.advance(1)
+        self.assertEqual(provider.fetch_data().voltage, 11.4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pyarrow as pa
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+from config import ProcessorConfig
+from compaction import PartitionCompactor
+from repository import S3Repository
+from rollups import build_rollup, merge_rollups, read_rollup
+from service import ETLService
+from infrastructure.object_store import LocalObjectStore
+
+T0 = 1768028400 * 1_000_000  # 2026-01-10 07:00:00 UTC, us
+
+def _long_table(seed=7, n=600):
+    rng = np.random.default_rng(seed)
+    ts = T0 + np.sort(rng.integers(0, 3 * 3600 * 1_000_000, n))
+    pids = np.where(rng.random(n) < 0.5, "BATTERY_VOLTAGE", "RPM")
+    values = np.where(pids == "BATTERY_VOLTAGE", np.round(rng.uniform(11.5, 14.5, n), 2),
+                      np.round(rng.uniform(600, 3000, n)))
+    return pa.table({
+        "pid_code": pa.array(pids.tolist()),
+        "value": pa.array(values),
+        "timestamp": pa.array(ts, pa.timestamp("us")),
+        "vin": pa.array(["VIN-A"] * n),
+    })
+
+class TestRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.config = ProcessorConfig()
+
+    def test_aggregates_match_direct_computation(self):
+        table = _long_table()
+        rollup = build_rollup(table, 3600, self.config)
+
+        pids = np.array(table.column("pid_code").to_pylist())
+        values = table.column("value").to_numpy()
+        hours = (table.column("timestamp").cast(pa.int64()).to_numpy() - T0) // 3_600_000_000
+        for row in rollup.to_pylist():
+            hour = (int(pa.scalar(row["bucket_start"], pa.timestamp("us")).cast(pa.int64()).as_py()) - T0) // 3_600_000_000
+            selected = values[(pids == row["pid_code"]) & (hours == hour)]
+            self.assertEqual(row["count"], len(selected))
+            self.assertEqual(row["min"], selected.min())
+            self.assertEqual(row["max"], selected.max())
+            self.assertAlmostEqual(row["mean"], selected.mean())
+            self.assertEqual(row["last"], selected[-1])
+            if row["pid_code"] == "BATTERY_VOLTAGE":
+                ordered = np.sort(selected)
+                self.assertAlmostEqual(row["p50"], ordered[int(np.ceil(0.5 * len(ordered))) - 1])
+                self.assertAlmostEqual(row["p95"], ordered[int(np.ceil(0.95 * len(ordered))) - 1])
+            else:
+                self.assertIsNone(row["p50"])
+        self.assertEqual(sum(rollup.column("count").to_pylist()), table.num_rows)
+
+    def test_late_data_merges_to_full_recompute(self):
+        table = _long_table()
+        # Páros sorok most, páratlanok "később": ugyanazokba a rekeszekbe esnek
+        early = table.take(pa.array(np.arange(0, table.num_rows, 2)))
+        late = table.take(pa.array(np.arange(1, table.num_rows, 2)))
+        for seconds in (1, 60, 3600):
+            full = build_rollup(table, seconds, self.config)
+            parts = pa.concat_tables([build_rollup(late, seconds, self.config),
+                                      build_rollup(early, seconds, self.config)])
+            merged = merge_rollups(parts, self.config)
+            # Az összeadás sorrendje eltér: sum/mean lebegőpontos tűréssel
+            for column in ("sum", "mean"):
+                np.testing.assert_allclose(merged.column(column).to_numpy(), full.column(column).to_numpy())
+            exact = [c for c in full.column_names if c not in ("sum", "mean")]
+            self.assertEqual(merged.select(exact).to_pylist(), full.select(exact).to_pylist())
+
+class TestRollupTier(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"SMARTDRIVE_LOCAL_S3_ROOT": self.root})
+        self.env.start()
+        self.config = ProcessorConfig()
+        self.bronze = LocalObjectStore(os.path.join(self.root, "bronze"))
+        self.silver = LocalObjectStore(os.path.join(self.root, "silver"))
+        self.etl = ETLService(S3Repository("silver"), self.config)
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.root)
+
+    def _ingest(self, name, seconds):
+        lines = [json.dumps({"vin": "VIN-A", "timestamp": f"2026-01-10T07:{s // 60:02d}:{s % 60:02d}", "pids": [
+            {"pid_code": "BATTERY_VOLTAGE", "value": 12.0 + (s % 7) / 10}]}) for s in seconds]
+        self.bronze.put(name, "\n".join(lines).encode("utf-8"))
+        self.etl.process_batch([("bronze", name)])
+
+    def test_rollups_stay_correct_across_batches_and_compaction(self):
+        self._ingest("0.json", range(0, 120, 2))
+        self._ingest("1.json", range(1, 120, 2))  # Késő adat ugyanarra a két percre
+        self.assertEqual(len(self.silver.list("rollups_1m/vin=VIN-A/date=2026-01-10/")), 2)
+
+        before = read_rollup(self.silver, self.config, "1m", "VIN-A", "2026-01-10", "2026-01-10")
+        self.assertEqual(before.column("count").to_pylist(), [60, 60])
+        self.assertEqual(len(read_rollup(self.silver, self.config, "1s", "VIN-A", "2026-01-10", "2026-01-10")), 120)
+        hourly = read_rollup(self.silver, self.config, "1h", "VIN-A", "2026-01-10", "2026-01-10")
+        self.assertEqual((hourly.column("count")[0].as_py(), hourly.column("last")[0].as_py()), (120, 12.0))
+
+        PartitionCompactor(self.silver, self.config).compact("rollups_1m/")
+        self.assertEqual(len(self.silver.list("rollups_1m/vin=VIN-A/date=2026-01-10/")), 1)
+        after = read_rollup(self.silver, self.config, "1m", "VIN-A", "2026-01-10", "2026-01-10")
+        self.assertEqual(after.to_pylist(), before.to_pylist())
+
+if __name__ == '__main__':
+    unittest.main()
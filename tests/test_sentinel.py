@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from hardware.src.app import SmartDriveApp
+from hardware.src.domain import TelemetryData
+from hardware.src.clock import VirtualClock
+from hardware.src.scheduler import SentinelScheduler
+from hardware.src.providers.simulated import SimulatedOBDProvider
+
+START = 1_700_000_000
+
+class TestSentinelScheduler(unittest.TestCase):
+    def test_wake_shortens_as_the_threshold_nears(self):
+        sentinel = SentinelScheduler(threshold=11.5)
+        wakes = []
+        for t, volts in ((0, 12.4), (1800, 12.2), (3600, 12.0), (5400, 11.8), (7200, 11.6)):
+            sentinel.observe(t, volts)
+            wakes.append(sentinel.next_wake(volts))
+
+        self.assertAlmostEqual(sentinel.slope() * 3600, -0.4)
+        self.assertAlmostEqual(wakes[-1], 0.5 * 0.1 / (0.4 / 3600))
+        self.assertEqual(wakes, sorted(wakes, reverse=True))
+
+    def test_holding_battery_sleeps_longest(self):
+        sentinel = SentinelScheduler(threshold=11.5)
+        sentinel.observe(0, 12.6)
+        sentinel.observe(1800, 12.6)
+        self.assertEqual(sentinel.next_wake(12.6), SentinelScheduler.MAX_WAKE)
+
+    def test_off_trend_read_asks_for_follow_up(self):
+        sentinel = SentinelScheduler(threshold=11.5)
+        sentinel.observe(0, 12.6)
+        sentinel.observe(1800, 12.6)
+        self.assertTrue(sentinel.changed(3600, 12.1))  # Headlights switched on
+        self.assertTrue(sentinel.observe(3600, 12.1))
+        self.assertEqual(sentinel.next_wake(12.1), SentinelScheduler.MIN_WAKE)
+
+
+class TestSentinelReplay(unittest.TestCase):
+    def setUp(self):
+        # Parked, 0.3 V/h parasitic drain from 12.6 V: reaches 11.5 V at t = 13200 s
+        rows = ["t,speed,rpm,voltage,coolant_temp"]
+        rows += [f"{k * 600},0,0,{12.6 - 0.05 * k:.2f},5" for k in range(30)]
+        fd, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(rows) + "\n")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_drain_alert_with_few_wakes(self):
+        clock = VirtualClock(start=START)
+        provider = SimulatedOBDProvider.from_trace("V1", self.path, clock=clock)
+        publisher = MagicMock()
+        app = SmartDriveApp(vin="V1", publisher=publisher, provider=provider, clock=clock)
+
+        app.run(duration=8 * 3600)
+
+        publisher.publish_event.assert_called_once()
+        vin, event_type, _ = publisher.publish_event.call_args[0]
+        self.assertEqual((vin, event_type), ("V1", "VAMPIRE_DRAIN"))
+        alerted = datetime.fromisoformat(publisher.publish_event.call_args[1]["timestamp"]).timestamp()
+        self.assertLessEqual(alerted - (START + 13200), SentinelScheduler.MIN_WAKE)
+
+        self.assertTrue(app.power_saving_active)
+        self.assertLess(app.metrics.counters["sentinel_wakes"], 30)
+        # Metrics only from the first parked minutes: no radio wakes once the sentinel runs
+        self.assertLessEqual(publisher.publish_metrics.call_count, SmartDriveApp.PARKED_IDLE_S / 60)
+
+    def test_async_mode_routes_alert_and_flush_to_outbox(self):
+        clock = VirtualClock(start=START)
+        provider = SimulatedOBDProvider.from_trace("V1", self.path, clock=clock)
+        publisher = MagicMock(framing=True)
+        app = SmartDriveApp(vin="V1", publisher=publisher, provider=provider, clock=clock)
+        queued = []
+        app.outbox = queued.append  # AsyncGatewayRuntime: the outbound queue
+
+        # Below the vampire threshold: enters the sentinel (flush) and alerts in one step
+        app._process_sample(TelemetryData("V1", START, 0.0, 0.0, 11.4, 5.0))
+
+        # Nothing ran on the logic (event loop) thread; the cloud worker runs the calls in order
+        publisher.flush.assert_not_called()
+        publisher.publish_event.assert_not_called()
+        for call in queued:
+            call()
+        self.assertEqual([c[0] for c in publisher.method_calls], ["flush", "publish_event"])
+
+if __name__ == "__main__":
+    unittest.main()
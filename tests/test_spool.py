@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.spool import SegmentQueue, pack_message, unpack_message
+from hardware.src.infrastructure import AWSCloudPublisher
+from hardware.src.app import SmartDriveApp
+from hardware.src.clock import VirtualClock
+from hardware.src.providers.simulated import SimulatedOBDProvider
+
+class TestSegmentQueue(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_alerts_drain_before_telemetry(self):
+        spool = SegmentQueue(self.directory)
+        spool.append("telemetry", b"t1")
+        spool.append("alerts", b"a1")
+        spool.append("telemetry", b"t2")
+
+        sent = []
+        spool.drain(lambda r: sent.append(r) or True)
+        self.assertEqual(sent, [b"a1", b"t1", b"t2"])
+        self.assertEqual(spool.depth, 0)
+
+    def test_cursor_and_torn_write_survive_restart(self):
+        spool = SegmentQueue(self.directory, segment_bytes=64)
+        for i in range(10):
+            spool.append("telemetry", b"record-%d" % i)
+        spool.drain(lambda r: True, max_batch=4)
+        spool.close()
+
+        # Simulate a power cut in the middle of an append
+        lane_dir = os.path.join(self.directory, "telemetry")
+        last = sorted(n for n in os.listdir(lane_dir) if n.endswith(".seg"))[-1]
+        with open(os.path.join(lane_dir, last), "ab") as f:
+            f.write(b"\x20\x00\x00\x00garbage")
+
+        restarted = SegmentQueue(self.directory, segment_bytes=64)
+        self.assertEqual(restarted.depth, 6)
+        sent = []
+        restarted.drain(lambda r: sent.append(r) or True)
+        self.assertEqual(sent, [b"record-%d" % i for i in range(4, 10)])
+
+    def test_bounded_size_evicts_oldest_telemetry_first(self):
+        spool = SegmentQueue(self.directory, max_bytes=200, segment_bytes=50)
+        spool.append("alerts", b"alert")
+        for i in range(20):
+            spool.append("telemetry", b"sample-%02d" % i)
+
+        self.assertLessEqual(spool.size_bytes, 200)
+        self.assertGreater(spool.evicted_records, 0)
+        self.assertEqual(spool.stats()["lanes"]["alerts"], 1)
+
+        sent = []
+        spool.drain(lambda r: sent.append(r) or True)
+        self.assertEqual(sent[0], b"alert")
+        self.assertEqual(sent[-1], b"sample-19")
+
+    def test_publisher_spools_while_offline_and_drains_on_reconnect(self):
+        client = MagicMock()
+        client.publish.return_value = False
+        publisher = AWSCloudPublisher(client, spool=SegmentQueue(self.directory))
+
+        publisher.publish_telemetry({"vin": "V1", "n": 1})
+        publisher.publish_telemetry({"vin": "V1", "n": 2})
+        self.assertEqual(publisher.queue_stats()["depth"], 2)
+
+        client.publish.reset_mock()
+        client.publish.return_value = True
+        publisher.publish_telemetry({"vin": "V1", "n": 3})
+
+        self.assertEqual(publisher.queue_stats()["depth"], 0)
+        payloads = [c[0][1] for c in client.publish.call_args_list]
+        self.assertEqual(payloads, ['{"vin": "V1", "n": 1}', '{"vin": "V1", "n": 2}', '{"vin": "V1", "n": 3}'])
+
+    def test_message_round_trip(self):
+        self.assertEqual(unpack_message(pack_message("vehicle/V1/frames", b"SDF1\x00", 1)),
+                         ("vehicle/V1/frames", b"SDF1\x00", 1))
+
+class TestDrainWhilePolling(unittest.TestCase):
+    PUBACK_S = 0.05
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_backlog_drains_in_slices_between_polls(self):
+        clock = VirtualClock(start=1_700_000_000)
+        client = MagicMock()
+        client.publish.return_value = False
+        publisher = AWSCloudPublisher(client, spool=SegmentQueue(self.directory))
+        for n in range(500):  # Backlog from a long outage
+            publisher.publish_telemetry({"vin": "V1", "n": n})
+        self.assertEqual(publisher.spool.depth, 500)
+
+        # Back online: every QoS 1 publish waits for its PUBACK
+        client.publish.side_effect = lambda *args: clock.advance(self.PUBACK_S) or True
+        provider = SimulatedOBDProvider("V1", scenario="TRACE", clock=clock, trace=[(0.0, 50.0, 800.0, 14.1, 85.0)])
+        polls = []
+        fetch = provider.fetch_into
+        provider.fetch_into = lambda buffer: polls.append(clock.monotonic()) or fetch(buffer)
+        app = SmartDriveApp("V1", provider=provider, publisher=publisher, clock=clock)
+        app.run(duration=60)
+
+        gaps = [b - a for a, b in zip(polls, polls[1:])]
+        slice_s = (AWSCloudPublisher.DRAIN_SLICE + 2) * self.PUBACK_S  # Slice + the sample + metrics
+        self.assertLessEqual(max(gaps), SmartDriveApp.INTERVAL_STEADY + slice_s + 1e-6)
+        self.assertLess(publisher.spool.depth, 500)  # Still draining, one slice per publish
+
+if __name__ == "__main__":
+    unittest.main()
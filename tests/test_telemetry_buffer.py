@@ -0,0 +1,45 @@
+import unittest
+from hardware.src.domain import TelemetryBuffer, TelemetryData
+
+class TestTelemetryBuffer(unittest.TestCase):
+    def _filled(self, n, capacity=4):
+        buf = TelemetryBuffer("V1", capacity=capacity)
+        for i in range(n):
+            buf.append(1000.0 + i, 0.0, 800.0 + i, 12.0 + i / 10, 80.0)
+        return buf
+
+    def test_wraps_around_past_capacity(self):
+        buf = self._filled(6)
+        self.assertEqual(len(buf), 4)
+        self.assertEqual(buf.written, 6)
+        self.assertEqual(list(buf.column("timestamp")), [1002.0, 1003.0, 1004.0, 1005.0])
+
+    def test_column_last_across_the_wrap(self):
+        buf = self._filled(6)  # Slots: [1004, 1005, 1002, 1003]
+        self.assertEqual(list(buf.column("rpm", last=3)), [803.0, 804.0, 805.0])
+        self.assertEqual(list(buf.column("rpm", last=1)), [805.0])
+        self.assertEqual(list(buf.column("rpm", last=10)), [802.0, 803.0, 804.0, 805.0])
+        self.assertEqual(list(TelemetryBuffer("V1").column("rpm", last=3)), [])
+
+    def test_record_raises_once_overwritten(self):
+        buf = self._filled(6)
+        self.assertEqual(buf.record(2).timestamp, 1002.0)
+        self.assertEqual(buf.record(5).timestamp, 1005.0)
+        with self.assertRaises(IndexError):
+            buf.record(1)  # Overwritten by sample 5
+        with self.assertRaises(IndexError):
+            buf.record(6)  # Not written yet
+
+    def test_record_view_is_overwritten_on_wrap(self):
+        buf = self._filled(1)
+        view = buf.record(0)
+        frozen = view.freeze()
+        self.assertEqual((view.vin, view.rpm, view.voltage), ("V1", 800.0, 12.0))
+
+        for i in range(4):  # Sample 4 lands in slot 0
+            buf.append(2000.0 + i, 0.0, 900.0 + i, 14.0, 85.0)
+        self.assertEqual(view.timestamp, 2003.0)  # The view follows its slot
+        self.assertEqual(frozen, TelemetryData("V1", 1000.0, 0.0, 800.0, 12.0, 80.0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+from hardware.src.infrastructure import AWSCloudPublisher
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_functions", "processor"))
+from repository import S3Repository
+from frame_codec import FrameDecodeError, decode_frame, encode_frame
+
+class TestTelemetryFrames(unittest.TestCase):
+    def _payload(self, ts_str, rpm, voltage):
+        return {
+            "vin": "TESTVIN123",
+            "timestamp": ts_str,
+            "rpm": rpm,
+            "voltage": voltage,
+            "pids": [
+                {"pid_code": "RPM", "value": rpm, "timestamp": ts_str},
+                {"pid_code": "BATTERY_VOLTAGE", "value": voltage, "timestamp": ts_str}
+            ]
+        }
+
+    def test_frame_round_trip_through_silver_decoder(self):
+        client = MagicMock()
+        publisher = AWSCloudPublisher(client, framing=True, frame_max_samples=3)
+        publisher.publish_telemetry(self._payload("2026-01-10T08:00:00", 0.0, 12.6))
+        publisher.publish_telemetry(self._payload("2026-01-10T08:00:00.100000", 250.0, 9.5))
+        self.assertFalse(client.publish.called)
+
+        publisher.publish_telemetry(self._payload("2026-01-10T08:00:05", 1200.0, 14.4))
+        topic, frame, qos = client.publish.call_args[0]
+        self.assertEqual(topic, "vehicle/TESTVIN123/frames")
+
+        repo = S3Repository.__new__(S3Repository)
+        repo.s3_client = MagicMock()
+        repo.s3_client.get_object.return_value = {"Body": MagicMock(read=lambda: frame)}
+        df = repo.fetch_json_as_df("bronze", "raw/TESTVIN123/1.sdf")
+
+        self.assertEqual(len(df), 6)
+        voltage = df[df["pid_code"] == "BATTERY_VOLTAGE"]
+        self.assertEqual(voltage["value"].tolist(), [12.6, 9.5, 14.4])
+        self.assertEqual(str(voltage["timestamp"].iloc[1]), "2026-01-10 08:00:00.100000")
+        self.assertTrue((df["vin"] == "TESTVIN123").all())
+
+    def test_corrupt_frames_are_skipped_not_failed(self):
+        rows = [(1_768_032_000_000 + 100 * i, {"BATTERY_VOLTAGE": 12.6}) for i in range(20)]
+        compressed = encode_frame("TESTVIN123", rows)
+        corrupt = compressed[:5] + bytes(b ^ 0xFF for b in compressed[5:])   # zlib.error
+        truncated = encode_frame("TESTVIN123", rows, compress=False)[:-7]   # struct.error
+
+        repo = S3Repository.__new__(S3Repository)
+        repo.s3_client = MagicMock()
+        for blob in (corrupt, truncated):
+            with self.assertRaises(FrameDecodeError):
+                decode_frame(blob)
+            repo.s3_client.get_object.return_value = {"Body": MagicMock(read=lambda: blob)}
+            # Logged and skipped: retrying cannot fix the content, so it is no fetch failure
+            self.assertEqual(repo.fetch_table("bronze", "raw/TESTVIN123/bad.sdf").num_rows, 0)
+
+if __name__ == "__main__":
+    unittest.main()